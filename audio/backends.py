@@ -0,0 +1,159 @@
+"""
+Звуковые бэкенды.
+
+Игра и шар обращаются к звуку только через интерфейс AudioBackend.
+Реализации:
+- pygame: SoundManager, микшер pygame;
+- null: ничего не делает и не инициализирует микшер (CI, боты, экспорт);
+- recording: записывает события (тик, эффект) для проверок в тестах.
+"""
+
+from abc import ABC, abstractmethod
+from typing import List, Tuple, Optional
+
+
+class AudioBackend(ABC):
+    """Базовый интерфейс звукового бэкенда."""
+
+    def play_paddle_hit(self, x=None):
+        """Проиграть звук удара шара по платформе (x - позиция для панорамы)"""
+        self._play_sound('paddle_hit', x)
+
+    def play_brick_hit(self, x=None):
+        """Проиграть звук удара шара по кирпичу (x - позиция для панорамы)"""
+        self._play_sound('brick_hit', x)
+
+    def play_wall_hit(self, x=None):
+        """Проиграть звук удара шара по стене (x - позиция для панорамы)"""
+        self._play_sound('wall_hit', x)
+
+    def play_ball_lost(self):
+        """Проиграть звук потери шара"""
+        self._play_sound('ball_lost')
+
+    def play_game_over(self):
+        """Проиграть звук Game Over"""
+        self._play_sound('game_over')
+
+    def play_level_complete(self):
+        """Проиграть звук завершения уровня"""
+        self._play_sound('level_complete')
+
+    def play_victory(self):
+        """Проиграть звук победы"""
+        self._play_sound('victory')
+
+    def play_ball_launch(self):
+        """Проиграть звук запуска шара"""
+        self._play_sound('ball_launch')
+
+    def play_level_start(self):
+        """Проиграть звук начала уровня"""
+        self._play_sound('level_start')
+
+    @abstractmethod
+    def _play_sound(self, sound_key, x=None):
+        """Запросить проигрывание эффекта (x - позиция X источника)."""
+
+    def play_music(self, key):
+        """Запросить фоновую музыку для состояния (None - тишина)."""
+
+    def preload_music(self, key):
+        """Заранее подготовить трек, который скоро понадобится."""
+
+    def end_frame(self):
+        """Завершить кадр: проиграть эффекты, накопленные за кадр."""
+
+    def is_loaded(self):
+        """Проверить, готов ли бэкенд к проигрыванию."""
+        return True
+
+    def wait_until_loaded(self, timeout=None):
+        """Дождаться готовности бэкенда."""
+        return True
+
+    def set_sound_volume(self, volume):
+        """Установить громкость эффектов (0.0 - 1.0)."""
+
+    def mute_all(self):
+        """Выключить звук."""
+        self.set_sound_volume(0.0)
+
+    def unmute_all(self):
+        """Включить звук."""
+        self.set_sound_volume(0.7)
+
+
+class NullAudioBackend(AudioBackend):
+    """Бэкенд без звука: все вызовы ничего не стоят."""
+
+    def _play_sound(self, sound_key, x=None):
+        pass
+
+
+class RecordingAudioBackend(AudioBackend):
+    """
+    Бэкенд, записывающий события вместо проигрывания.
+
+    Каждый вызов сохраняется как (тик, эффект); тик увеличивается
+    в end_frame(), то есть совпадает с номером кадра игрового цикла.
+    Позиции источников (или None) пишутся в positions параллельно events.
+    """
+
+    def __init__(self):
+        """Инициализация записи."""
+        self.tick = 0
+        self.events: List[Tuple[int, str]] = []
+        self.positions: List[Optional[float]] = []
+        self.music_requests: List[Tuple[int, Optional[str]]] = []
+
+    def _play_sound(self, sound_key, x=None):
+        self.events.append((self.tick, sound_key))
+        self.positions.append(x)
+
+    def play_music(self, key):
+        self.music_requests.append((self.tick, key))
+
+    def end_frame(self):
+        self.tick += 1
+
+    def effects(self) -> List[str]:
+        """Список записанных эффектов без тиков."""
+        return [effect for _, effect in self.events]
+
+    def clear(self):
+        """Очистить записанные события."""
+        self.events.clear()
+        self.positions.clear()
+        self.music_requests.clear()
+
+
+AUDIO_BACKENDS = ("pygame", "null", "recording")
+
+
+def create_audio_backend(name: Optional[str] = None) -> AudioBackend:
+    """
+    Создать звуковой бэкенд по имени.
+
+    Args:
+        name: pygame, null или recording (по умолчанию - AUDIO_BACKEND из config).
+
+    Returns:
+        Экземпляр AudioBackend.
+    """
+    if name is None:
+        try:
+            from config import AUDIO_BACKEND
+        except ImportError:
+            AUDIO_BACKEND = "pygame"
+        name = AUDIO_BACKEND
+
+    if name == "pygame":
+        from audio.sound_manager import SoundManager
+        return SoundManager()
+    if name == "null":
+        return NullAudioBackend()
+    if name == "recording":
+        return RecordingAudioBackend()
+
+    raise ValueError(f"Неизвестный звуковой бэкенд: {name}")
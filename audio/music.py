@@ -0,0 +1,136 @@
+"""
+Фоновая музыка по состояниям игры.
+
+Треки проигрываются потоково через pygame.mixer.music: в памяти
+находится только буфер декодера, а не весь трек. Смена трека идёт
+без блокировки кадра: текущий трек затухает (fadeout асинхронный),
+а следующий запускается с нарастанием громкости в update(), когда
+затухание закончилось. Файл следующего трека заранее подгружается
+в кэш ОС (preload), чтобы старт не ждал диск.
+"""
+
+import os
+from typing import Dict, Optional
+
+import pygame
+
+try:
+    from config import MUSIC_DIR, MUSIC_TRACKS, MUSIC_FADE_MS
+except ImportError:
+    MUSIC_DIR = "audio/music"
+    MUSIC_TRACKS = {}
+    MUSIC_FADE_MS = 800
+
+
+class MusicPlayer:
+    """Потоковый проигрыватель музыки с переходами между треками."""
+
+    def __init__(self, volume: float = 0.5, music_dir: str = MUSIC_DIR,
+                 tracks: Dict[str, str] = MUSIC_TRACKS, fade_ms: int = MUSIC_FADE_MS):
+        """
+        Инициализация проигрывателя.
+
+        Args:
+            volume: Громкость музыки (0.0 - 1.0).
+            music_dir: Директория с треками.
+            tracks: Соответствие ключей состояний и файлов.
+            fade_ms: Длительность затухания и нарастания в мс.
+        """
+        self.volume = volume
+        self.music_dir = music_dir
+        self.tracks = tracks
+        self.fade_ms = fade_ms
+
+        self.current_path: Optional[str] = None
+        self.target_path: Optional[str] = None
+        self._fading = False
+        self._resolved: Dict[str, Optional[str]] = {}
+
+    def resolve(self, key: Optional[str]) -> Optional[str]:
+        """
+        Найти файл трека по ключу.
+
+        Ключи вида "level_3" без собственного трека используют трек "level".
+
+        Returns:
+            Путь к файлу или None, если трека нет.
+        """
+        if key is None:
+            return None
+        if key in self._resolved:
+            return self._resolved[key]
+
+        filename = self.tracks.get(key)
+        if filename is None and key.startswith("level_"):
+            filename = self.tracks.get("level")
+
+        path = None
+        if filename:
+            candidate = os.path.join(self.music_dir, filename)
+            if os.path.exists(candidate):
+                path = candidate
+
+        self._resolved[key] = path
+        return path
+
+    def preload(self, key: str) -> None:
+        """
+        Подготовить трек заранее: найти файл и попросить ОС прочитать его
+        в кэш страниц, не загружая трек в память процесса.
+        """
+        path = self.resolve(key)
+        if path is None or not hasattr(os, "posix_fadvise"):
+            return
+
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
+    def request(self, key: Optional[str]) -> None:
+        """
+        Запросить трек для состояния (None - тишина).
+
+        Если играет другой трек, он затухает, а новый запустится
+        в update() после окончания затухания.
+        """
+        path = self.resolve(key)
+        self.target_path = path
+        if path == self.current_path and not self._fading:
+            return
+
+        if pygame.mixer.music.get_busy():
+            if not self._fading:
+                pygame.mixer.music.fadeout(self.fade_ms)
+                self._fading = True
+        else:
+            self._start(path)
+
+    def update(self) -> None:
+        """Продолжить переход между треками (вызывается раз в кадр)."""
+        if self._fading and not pygame.mixer.music.get_busy():
+            self._fading = False
+            self._start(self.target_path)
+
+    def set_volume(self, volume: float) -> None:
+        """Установить громкость музыки (0.0 - 1.0)."""
+        self.volume = max(0.0, min(1.0, volume))
+        pygame.mixer.music.set_volume(self.volume)
+
+    def _start(self, path: Optional[str]) -> None:
+        """Запустить трек с нарастанием громкости."""
+        self.current_path = path
+        if path is None:
+            return
+
+        try:
+            pygame.mixer.music.load(path)
+            pygame.mixer.music.set_volume(self.volume)
+            pygame.mixer.music.play(loops=-1, fade_ms=self.fade_ms)
+        except pygame.error as e:
+            print(f"Не удалось проиграть музыку {path}: {e}")
+            self.current_path = None
@@ -2,16 +2,39 @@
 
 import pygame
 import os
+import threading
+import time
 
+from audio import synth, variants
+from audio.backends import AudioBackend
+from audio.music import MusicPlayer
 
-class SoundManager:
-   
+try:
+    from config import SOUND_VOICE_LIMITS, SOUND_PANNED_EFFECTS
+except ImportError:
+    SOUND_VOICE_LIMITS = {}
+    SOUND_PANNED_EFFECTS = ()
 
-    def __init__(self):
-        
-        pygame.mixer.init()
-        
+# Звуки, уже декодированные в этом процессе (путь -> pygame.mixer.Sound).
+# Перезапуск игры создаёт новый SoundManager, но не декодирует файлы заново.
+_SOUND_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+# Банки стерео вариантов эффектов (путь исходного звука -> таблица вариантов)
+_VARIANT_CACHE = {}
+
+
+class SoundManager(AudioBackend):
+    """Звуковой бэкенд на микшере pygame."""
+
+    def __init__(self, async_load=True):
+        """
+        Инициализация менеджера звуков.
         
+        Args:
+            async_load: Загружать звуки в фоновом потоке. Пока звук
+                не загружен, его проигрывание молча пропускается.
+        """
         self.sounds_dir = "audio/sounds/"
         
         
@@ -30,10 +53,82 @@ class SoundManager:
         self.music_volume = 0.5
         self.sound_volume = 0.7
         
-        self._load_sounds()
+        self.load_time = None
+        self._loaded = threading.Event()
+        
+        # Пулы зарезервированных каналов по эффектам и эффекты текущего кадра
+        self._channels = {}
+        self._next_voice = {}
+        self._pending = {}
+        
+        # Варианты эффектов [панорама][высота тона] и очередной вариант высоты
+        self.variants = {}
+        self._next_pitch = {}
+        
+        # Музыка создаётся после инициализации микшера; запрос до этого запоминается
+        self.music = None
+        self._music_request = None
+        self._music_request_pending = False
+        
+        if async_load:
+            self._loader = threading.Thread(target=self._load_all, name="sound-loader",
+                                            daemon=True)
+            self._loader.start()
+        else:
+            self._loader = None
+            self._load_all()
+
+    def _load_all(self):
+        """Инициализировать микшер и загрузить звуки, замерив время."""
+        start = time.perf_counter()
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+        except pygame.error as e:
+            print(f"Звук недоступен: {e}")
+            self._loaded.set()
+            return
+        
+        decoded, sounds = self._load_sounds()
+        self._build_variants(sounds)
+        self._reserve_channels()
+        self.music = MusicPlayer(self.music_volume)
+        self.load_time = time.perf_counter() - start
+        # Звуки публикуются последними: _play_sound пропускает эффект, пока
+        # его звука нет, и к этому моменту пулы каналов и варианты готовы
+        self.sounds = sounds
+        self._loaded.set()
+        
+        if decoded:
+            print(f"♪ Загружено звуков: {decoded} за {self.load_time * 1000:.0f} мс")
+
+    def is_loaded(self):
+        """Проверить, завершена ли загрузка звуков."""
+        return self._loaded.is_set()
+
+    def wait_until_loaded(self, timeout=None):
+        """
+        Дождаться окончания загрузки звуков.
+        
+        Args:
+            timeout: Максимальное время ожидания в секундах.
+        
+        Returns:
+            True если загрузка завершена.
+        """
+        return self._loaded.wait(timeout)
 
     def _load_sounds(self):
+        """
+        Загрузить звуковые файлы, используя кэш процесса.
+        
+        Звуки собираются в отдельный словарь и не видны игровому потоку
+        до конца загрузки (см. _load_all).
         
+        Returns:
+            Кортеж (количество звуков, загруженных с диска или
+            синтезированных; словарь звуков по ключам self.sounds).
+        """
         sound_files = {
             'paddle_hit': 'paddle_hit.wav',
             'brick_hit': 'brick_hit.wav',
@@ -46,58 +141,201 @@ class SoundManager:
             'level_start': 'level_start.wav',
         }
         
+        sounds = dict(self.sounds)
+        decoded = 0
         for sound_key, filename in sound_files.items():
             try:
                 path = os.path.join(self.sounds_dir, filename)
-                if os.path.exists(path):
-                    self.sounds[sound_key] = pygame.mixer.Sound(path)
-                    self.sounds[sound_key].set_volume(self.sound_volume)
+                with _CACHE_LOCK:
+                    sound = _SOUND_CACHE.get(path)
+                    if sound is None and os.path.exists(path):
+                        sound = pygame.mixer.Sound(path)
+                        _SOUND_CACHE[path] = sound
+                        decoded += 1
+                if sound is not None:
+                    sound.set_volume(self.sound_volume)
+                    sounds[sound_key] = sound
             except pygame.error as e:
                 print(f"Не удалось загрузить звук {filename}: {e}")
+        
+        # Эффекты без файла синтезируются (или берутся из кэша на диске)
+        for sound_key in synth.SYNTH_PRESETS:
+            if sounds.get(sound_key) is not None:
+                continue
+            cache_path = f"synth:{sound_key}"
+            try:
+                with _CACHE_LOCK:
+                    sound = _SOUND_CACHE.get(cache_path)
+                    if sound is None:
+                        sound = synth.load_or_synthesize(sound_key)
+                        if sound is not None:
+                            _SOUND_CACHE[cache_path] = sound
+                            decoded += 1
+                if sound is not None:
+                    sound.set_volume(self.sound_volume)
+                    sounds[sound_key] = sound
+            except pygame.error as e:
+                print(f"Не удалось синтезировать звук {sound_key}: {e}")
+        
+        return decoded, sounds
 
-    def play_paddle_hit(self):
-        """Проиграть звук удара шара по платформе"""
-        self._play_sound('paddle_hit')
-
-    def play_brick_hit(self):
-        """Проиграть звук удара шара по кирпичу"""
-        self._play_sound('brick_hit')
+    def _build_variants(self, sounds=None):
+        """
+        Построить банки стерео вариантов для эффектов ударов.
+        
+        Банк строится один раз на процесс для каждого исходного звука;
+        при ошибке эффект проигрывается без панорамы. Банки и счётчики
+        высоты тона подменяются вместе, когда все банки построены.
+        
+        Args:
+            sounds: Словарь звуков (по умолчанию - self.sounds).
+        """
+        if not variants.VARIANTS_AVAILABLE:
+            return
+        if sounds is None:
+            sounds = self.sounds
+        
+        tables = {}
+        next_pitch = {}
+        for sound_key in SOUND_PANNED_EFFECTS:
+            sound = sounds.get(sound_key)
+            if sound is None:
+                continue
+            try:
+                with _CACHE_LOCK:
+                    table = _VARIANT_CACHE.get(sound)
+                    if table is None:
+                        table = variants.build_variants(sound)
+                        _VARIANT_CACHE[sound] = table
+            except (ValueError, pygame.error) as e:
+                print(f"Не удалось построить варианты звука {sound_key}: {e}")
+                continue
+            
+            for row in table:
+                for variant in row:
+                    variant.set_volume(self.sound_volume)
+            tables[sound_key] = table
+            next_pitch[sound_key] = 0
+        
+        # Счётчики раньше банков: _select_sound берёт счётчик найденного банка
+        self._next_pitch = next_pitch
+        self.variants = tables
 
-    def play_wall_hit(self):
-        """Проиграть звук удара шара по стене"""
-        self._play_sound('wall_hit')
+    def _reserve_channels(self):
+        """
+        Зарезервировать для каждого эффекта собственный пул каналов.
+        
+        Размер пула равен лимиту голосов эффекта, поэтому эффекты не
+        отбирают каналы друг у друга и нагрузка на микшер ограничена.
+        """
+        limits = {key: SOUND_VOICE_LIMITS.get(key, 1) for key in self.sounds}
+        total = sum(limits.values())
+        
+        try:
+            if pygame.mixer.get_num_channels() < total:
+                pygame.mixer.set_num_channels(total)
+            pygame.mixer.set_reserved(total)
+            
+            channels = {}
+            channel_id = 0
+            for key, limit in limits.items():
+                channels[key] = [pygame.mixer.Channel(channel_id + i) for i in range(limit)]
+                channel_id += limit
+        except pygame.error as e:
+            print(f"Не удалось зарезервировать каналы: {e}")
+            return
+        
+        self._next_voice = {key: 0 for key in channels}
+        self._channels = channels
 
-    def play_ball_lost(self):
-        """Проиграть звук потери шара"""
-        self._play_sound('ball_lost')
+    def _play_sound(self, sound_key, x=None):
+        
+        # Незагруженные (или ещё загружающиеся) звуки пропускаются.
+        # Повторные вызовы одного эффекта в кадре схлопываются в один,
+        # позиция берётся из последнего вызова.
+        if self.sounds.get(sound_key) is not None:
+            self._pending[sound_key] = x
 
-    def play_game_over(self):
-        """Проиграть звук Game Over"""
-        self._play_sound('game_over')
+    def play_music(self, key):
+        """Запросить фоновую музыку для состояния (None - тишина)."""
+        self._music_request = key
+        if self.music is not None:
+            self.music.request(key)
+        else:
+            self._music_request_pending = True
 
-    def play_level_complete(self):
-        """Проиграть звук завершения уровня"""
-        self._play_sound('level_complete')
+    def preload_music(self, key):
+        """Заранее подготовить трек, который скоро понадобится."""
+        if self.music is not None:
+            self.music.preload(key)
 
-    def play_victory(self):
-        """Проиграть звук победы"""
-        self._play_sound('victory')
+    def set_music_volume(self, volume):
+        """Установить громкость музыки (0.0 - 1.0)."""
+        self.music_volume = max(0.0, min(1.0, volume))
+        if self.music is not None:
+            self.music.set_volume(self.music_volume)
 
-    def play_ball_launch(self):
-        """Проиграть звук запуска шара"""
-        self._play_sound('ball_launch')
+    def end_frame(self):
+        """Проиграть эффекты, запрошенные за кадр (каждый не более одного раза)."""
+        music = self.music
+        if music is not None:
+            # Запрос, сделанный до окончания фоновой загрузки
+            if self._music_request_pending:
+                self._music_request_pending = False
+                music.request(self._music_request)
+            music.update()
+        
+        if not self._pending:
+            return
+        
+        for sound_key, x in self._pending.items():
+            self._play_now(sound_key, x)
+        self._pending.clear()
 
-    def play_level_start(self):
-        """Проиграть звук начала уровня"""
-        self._play_sound('level_start')
+    def _select_sound(self, sound_key, x=None):
+        """
+        Выбрать звук для проигрывания.
+        
+        Для эффекта с банком вариантов и известной позицией берётся вариант
+        ступени панорамы по x; варианты высоты тона чередуются по кругу.
+        """
+        table = self.variants.get(sound_key)
+        if table is None or x is None:
+            return self.sounds[sound_key]
+        
+        row = table[variants.pan_index(x, len(table))]
+        pitch = self._next_pitch[sound_key]
+        self._next_pitch[sound_key] = (pitch + 1) % len(row)
+        return row[pitch]
 
-    def _play_sound(self, sound_key):
+    def _play_now(self, sound_key, x=None):
+        """
+        Проиграть эффект на канале из его пула.
         
-        if sound_key in self.sounds and self.sounds[sound_key] is not None:
-            try:
-                self.sounds[sound_key].play()
-            except pygame.error as e:
-                print(f"Ошибка при проигрывании звука {sound_key}: {e}")
+        Каналы пула используются по кругу: берётся первый свободный,
+        начиная с очередного; если все заняты, перезапускается очередной,
+        то есть самый давно запущенный голос этого же эффекта.
+        """
+        sound = self._select_sound(sound_key, x)
+        channels = self._channels.get(sound_key)
+        try:
+            if not channels:
+                sound.play()
+                return
+            
+            count = len(channels)
+            start = self._next_voice[sound_key]
+            voice = start
+            for offset in range(count):
+                candidate = (start + offset) % count
+                if not channels[candidate].get_busy():
+                    voice = candidate
+                    break
+            
+            channels[voice].play(sound)
+            self._next_voice[sound_key] = (voice + 1) % count
+        except pygame.error as e:
+            print(f"Ошибка при проигрывании звука {sound_key}: {e}")
 
     def set_sound_volume(self, volume):
         
@@ -105,11 +343,7 @@ class SoundManager:
         for sound in self.sounds.values():
             if sound is not None:
                 sound.set_volume(self.sound_volume)
-
-    def mute_all(self):
-       
-        self.set_sound_volume(0.0)
-
-    def unmute_all(self):
-        
-        self.set_sound_volume(0.7)
+        for table in self.variants.values():
+            for row in table:
+                for variant in row:
+                    variant.set_volume(self.sound_volume)
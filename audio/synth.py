@@ -0,0 +1,205 @@
+"""
+Процедурный синтез звуковых эффектов.
+
+Для эффектов без WAV файла в audio/sounds звук строится из параметров:
+последовательность нот со сдвигом частоты, форма волны и огибающая.
+Готовый PCM сохраняется на диск в .npy, ключом служит хэш параметров
+и формата микшера, поэтому при следующих запусках буфер только
+отображается в память (mmap) без повторного синтеза.
+"""
+
+import hashlib
+import json
+import os
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from config import SOUND_CACHE_DIR
+except ImportError:
+    SOUND_CACHE_DIR = "audio/cache"
+
+SYNTH_AVAILABLE = np is not None
+
+# Версия алгоритма синтеза: при изменении кода старый кэш не используется
+SYNTH_VERSION = 1
+
+# Ноты: (начальная частота Гц, конечная частота Гц, длительность с)
+SYNTH_PRESETS = {
+    'ball_lost': {
+        'waveform': 'square',
+        'notes': [(440, 110, 0.45)],
+        'volume': 0.35,
+        'decay': 2.0,
+    },
+    'game_over': {
+        'waveform': 'triangle',
+        'notes': [(392, 392, 0.2), (330, 330, 0.2), (262, 262, 0.2), (196, 150, 0.6)],
+        'volume': 0.5,
+        'decay': 1.5,
+    },
+    'level_complete': {
+        'waveform': 'square',
+        'notes': [(523, 523, 0.1), (659, 659, 0.1), (784, 784, 0.25)],
+        'volume': 0.3,
+        'decay': 1.0,
+    },
+    'victory': {
+        'waveform': 'square',
+        'notes': [(523, 523, 0.12), (659, 659, 0.12), (784, 784, 0.12), (1047, 1047, 0.5)],
+        'volume': 0.3,
+        'decay': 1.0,
+    },
+    'ball_launch': {
+        'waveform': 'sine',
+        'notes': [(300, 900, 0.12)],
+        'volume': 0.5,
+        'decay': 3.0,
+    },
+    'level_start': {
+        'waveform': 'triangle',
+        'notes': [(262, 262, 0.1), (392, 392, 0.1), (523, 523, 0.2)],
+        'volume': 0.5,
+        'decay': 1.0,
+    },
+}
+
+ATTACK_SECONDS = 0.005
+
+
+def _waveform(name, phase):
+    """Значения формы волны для массива фаз (в периодах)."""
+    frac = phase - np.floor(phase)
+    if name == 'square':
+        return np.where(frac < 0.5, 1.0, -1.0)
+    if name == 'triangle':
+        return 4.0 * np.abs(frac - 0.5) - 1.0
+    if name == 'saw':
+        return 2.0 * frac - 1.0
+    return np.sin(2 * np.pi * frac)
+
+
+def synthesize(params, sample_rate):
+    """
+    Синтезировать моно сигнал по параметрам.
+
+    Args:
+        params: Словарь параметров из SYNTH_PRESETS.
+        sample_rate: Частота дискретизации.
+
+    Returns:
+        Массив float32 со значениями в диапазоне [-1, 1].
+    """
+    parts = []
+    for freq_start, freq_end, duration in params['notes']:
+        samples = max(1, int(sample_rate * duration))
+        t = np.arange(samples, dtype=np.float64) / sample_rate
+
+        # Фаза через накопленную частоту, чтобы сдвиг частоты был плавным
+        freq = np.linspace(freq_start, freq_end, samples)
+        phase = np.cumsum(freq) / sample_rate
+        wave = _waveform(params['waveform'], phase)
+
+        envelope = np.exp(-params['decay'] * t / duration)
+        attack = min(samples, int(sample_rate * ATTACK_SECONDS))
+        if attack:
+            envelope[:attack] *= np.linspace(0.0, 1.0, attack)
+
+        parts.append(wave * envelope)
+
+    signal = np.concatenate(parts) * params['volume']
+    return signal.astype(np.float32)
+
+
+def to_mixer_format(signal, size, channels):
+    """
+    Преобразовать сигнал в формат микшера для pygame.sndarray.
+
+    Args:
+        signal: Моно сигнал float32 в диапазоне [-1, 1].
+        size: Размер сэмпла из pygame.mixer.get_init() (например, -16).
+        channels: Количество каналов микшера.
+
+    Returns:
+        Массив NumPy подходящего типа и формы.
+    """
+    if size == -16:
+        pcm = (signal * 32767).astype(np.int16)
+    elif size == 16:
+        pcm = (signal * 32767 + 32768).astype(np.uint16)
+    elif size == -8:
+        pcm = (signal * 127).astype(np.int8)
+    elif size == 8:
+        pcm = (signal * 127 + 128).astype(np.uint8)
+    elif size == 32:
+        pcm = signal.astype(np.float32)
+    else:
+        pcm = (signal * 2147483647).astype(np.int32)
+
+    if channels > 1:
+        pcm = np.repeat(pcm[:, np.newaxis], channels, axis=1)
+    return np.ascontiguousarray(pcm)
+
+
+def cache_key(effect, params, mixer_format):
+    """Ключ кэша: хэш параметров синтеза и формата микшера."""
+    payload = json.dumps(
+        {
+            'effect': effect,
+            'params': params,
+            'mixer': list(mixer_format),
+            'version': SYNTH_VERSION,
+        },
+        sort_keys=True
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def load_or_synthesize(effect, params=None, cache_dir=SOUND_CACHE_DIR):
+    """
+    Получить звук эффекта из кэша на диске или синтезировать его.
+
+    Микшер должен быть инициализирован.
+
+    Args:
+        effect: Ключ эффекта (например, 'ball_lost').
+        params: Параметры синтеза (по умолчанию - из SYNTH_PRESETS).
+        cache_dir: Директория кэша PCM.
+
+    Returns:
+        pygame.mixer.Sound или None, если синтез недоступен.
+    """
+    if not SYNTH_AVAILABLE:
+        return None
+
+    params = params or SYNTH_PRESETS.get(effect)
+    mixer_format = pygame.mixer.get_init()
+    if params is None or not mixer_format:
+        return None
+
+    sample_rate, size, channels = mixer_format
+    path = os.path.join(cache_dir, f"{effect}-{cache_key(effect, params, mixer_format)}.npy")
+
+    if os.path.exists(path):
+        try:
+            return pygame.sndarray.make_sound(np.load(path, mmap_mode='r'))
+        except (ValueError, OSError, pygame.error) as e:
+            print(f"Повреждён кэш звука {path}: {e}")
+
+    pcm = to_mixer_format(synthesize(params, sample_rate), size, channels)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.save(f, pcm)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Не удалось сохранить кэш звука {path}: {e}")
+
+    return pygame.sndarray.make_sound(pcm)
@@ -0,0 +1,121 @@
+"""
+Банк стерео вариантов звуковых эффектов.
+
+Для эффектов удара строится таблица вариантов [панорама][высота тона]:
+PCM звука один раз через pygame.sndarray сдвигается по высоте
+(передискретизация) и раскладывается по каналам с постоянной мощностью.
+Во время игры вариант выбирается по позиции X шара простым индексом,
+без вычислений громкости каналов на каждое проигрывание.
+"""
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from config import (WINDOW_WIDTH, SOUND_PAN_STEPS, SOUND_PAN_WIDTH,
+                        SOUND_PITCH_VARIANTS)
+except ImportError:
+    WINDOW_WIDTH = 800
+    SOUND_PAN_STEPS = 5
+    SOUND_PAN_WIDTH = 0.8
+    SOUND_PITCH_VARIANTS = (1.0,)
+
+VARIANTS_AVAILABLE = np is not None
+
+
+def pan_gains(pan):
+    """
+    Громкость левого и правого каналов для панорамы.
+
+    Args:
+        pan: Панорама от -1.0 (слева) до 1.0 (справа).
+
+    Returns:
+        (левый, правый); в центре оба канала равны 1.0.
+    """
+    angle = (pan + 1.0) * np.pi / 4
+    return float(np.cos(angle) * np.sqrt(2)), float(np.sin(angle) * np.sqrt(2))
+
+
+def pan_index(x, steps=SOUND_PAN_STEPS, width=WINDOW_WIDTH):
+    """
+    Номер ступени панорамы для позиции X.
+
+    Args:
+        x: Позиция X на экране.
+        steps: Количество ступеней панорамы.
+        width: Ширина экрана.
+
+    Returns:
+        Индекс от 0 (левый край) до steps - 1 (правый край).
+    """
+    index = int(x * steps / width)
+    if index < 0:
+        return 0
+    if index >= steps:
+        return steps - 1
+    return index
+
+
+def build_variants(sound, pan_steps=SOUND_PAN_STEPS, pan_width=SOUND_PAN_WIDTH,
+                   pitches=SOUND_PITCH_VARIANTS):
+    """
+    Построить таблицу вариантов звука.
+
+    Микшер должен быть инициализирован.
+
+    Args:
+        sound: Исходный pygame.mixer.Sound.
+        pan_steps: Количество ступеней панорамы.
+        pan_width: Крайняя панорама (1.0 - полностью в один канал).
+        pitches: Множители высоты тона.
+
+    Returns:
+        Список pan_steps списков по len(pitches) звуков.
+    """
+    pcm = pygame.sndarray.array(sound)
+    dtype = pcm.dtype
+    stereo = pcm.ndim == 2 and pcm.shape[1] >= 2
+
+    # Беззнаковые форматы хранят тишину в середине диапазона
+    offset = 0.0
+    if np.issubdtype(dtype, np.unsignedinteger):
+        offset = (np.iinfo(dtype).max + 1) / 2
+    if np.issubdtype(dtype, np.integer):
+        low, high = np.iinfo(dtype).min - offset, np.iinfo(dtype).max - offset
+    else:
+        low, high = -1.0, 1.0
+
+    mono = pcm.astype(np.float32) - offset
+    if mono.ndim == 2:
+        mono = mono.mean(axis=1)
+
+    source = np.arange(len(mono), dtype=np.float32)
+    resampled = []
+    for pitch in pitches:
+        length = max(1, int(len(mono) / pitch))
+        resampled.append(np.interp(np.arange(length, dtype=np.float32) * pitch, source, mono))
+
+    pans = np.linspace(-pan_width, pan_width, pan_steps) if pan_steps > 1 else [0.0]
+    table = []
+    for pan in pans:
+        left, right = pan_gains(pan) if stereo else (1.0, 1.0)
+        row = []
+        for signal in resampled:
+            if stereo:
+                out = np.zeros((len(signal), pcm.shape[1]), dtype=np.float32)
+                out[:, 0] = signal * left
+                out[:, 1] = signal * right
+            elif pcm.ndim == 2:
+                out = np.repeat(signal[:, np.newaxis], pcm.shape[1], axis=1)
+            else:
+                out = signal
+            out = np.clip(out, low, high) + offset
+            row.append(pygame.sndarray.make_sound(np.ascontiguousarray(out.astype(dtype))))
+        table.append(row)
+
+    return table
@@ -0,0 +1,696 @@
+"""
+Замеры производительности Breakout.
+
+Каждый замер - отдельная функция benchmark_*, которая печатает
+результаты и возвращает их словарём. Запуск всех замеров:
+
+    python benchmarks.py
+
+или одного по имени:
+
+    python benchmarks.py music_memory
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+
+def _write_test_track(path, seconds, sample_rate=44100):
+    """Записать тестовый WAV трек (стерео, 16 бит) заданной длины."""
+    frame = b"\x00\x10\x00\xf0"
+    with wave.open(path, "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(frame * int(sample_rate * seconds))
+
+
+def _format_kb(size):
+    return f"{size / 1024:10.1f} КБ"
+
+
+def benchmark_music_memory(track_path=None, seconds=60):
+    """
+    Память трека при потоковом проигрывании и при загрузке в Sound.
+
+    pygame.mixer.Sound декодирует весь трек в RAM, а pygame.mixer.music
+    держит только буфер декодера. Замер сравнивает размер декодированного
+    PCM с размером файла и время запуска обоих вариантов.
+
+    Args:
+        track_path: Путь к треку (по умолчанию - сгенерированный WAV).
+        seconds: Длина сгенерированного трека в секундах.
+
+    Returns:
+        Словарь с результатами.
+    """
+    print("=" * 60)
+    print("Музыка: потоковое проигрывание против Sound")
+    print("=" * 60)
+
+    pygame.mixer.init()
+    temp_dir = None
+    try:
+        if track_path is None:
+            temp_dir = tempfile.TemporaryDirectory()
+            track_path = os.path.join(temp_dir.name, "track.wav")
+            _write_test_track(track_path, seconds)
+
+        start = time.perf_counter()
+        pygame.mixer.music.load(track_path)
+        pygame.mixer.music.play()
+        stream_ms = (time.perf_counter() - start) * 1000
+        pygame.mixer.music.stop()
+        pygame.mixer.music.unload()
+
+        start = time.perf_counter()
+        sound = pygame.mixer.Sound(track_path)
+        sound_ms = (time.perf_counter() - start) * 1000
+        decoded = len(sound.get_raw())
+
+        result = {
+            "file_bytes": os.path.getsize(track_path),
+            "decoded_bytes": decoded,
+            "stream_start_ms": stream_ms,
+            "sound_load_ms": sound_ms,
+        }
+    finally:
+        pygame.mixer.quit()
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    print(f"Размер файла:              {_format_kb(result['file_bytes'])}")
+    print(f"Sound в памяти (PCM):      {_format_kb(result['decoded_bytes'])}")
+    print(f"Запуск потока music:       {result['stream_start_ms']:10.2f} мс")
+    print(f"Загрузка в Sound:          {result['sound_load_ms']:10.2f} мс")
+    return result
+
+
+def benchmark_panned_effects(triggers=2000):
+    """
+    Банк стерео вариантов эффектов: память, время построения и задержка.
+
+    Сравнивает выбор готового варианта по позиции с расчётом громкости
+    каналов на каждое проигрывание (Channel.set_volume).
+
+    Args:
+        triggers: Количество проигрываний для замера задержки.
+
+    Returns:
+        Словарь с результатами.
+    """
+    from audio import sound_manager, variants
+    from config import SOUND_PANNED_EFFECTS, WINDOW_WIDTH
+
+    print("=" * 60)
+    print("Стерео варианты эффектов ударов")
+    print("=" * 60)
+
+    pygame.mixer.init()
+    try:
+        manager = sound_manager.SoundManager(async_load=False)
+        start = time.perf_counter()
+        manager.variants.clear()
+        sound_manager._VARIANT_CACHE.clear()
+        manager._build_variants()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        base_bytes = sum(len(manager.sounds[key].get_raw()) for key in manager.variants)
+        variant_bytes = sum(
+            len(variant.get_raw())
+            for table in manager.variants.values() for row in table for variant in row
+        )
+
+        positions = [i * WINDOW_WIDTH / triggers for i in range(triggers)]
+        key = SOUND_PANNED_EFFECTS[0]
+
+        start = time.perf_counter()
+        for x in positions:
+            manager._play_now(key, x)
+        bank_us = (time.perf_counter() - start) * 1e6 / triggers
+
+        channel = pygame.mixer.Channel(0)
+        sound = manager.sounds[key]
+        start = time.perf_counter()
+        for x in positions:
+            left, right = variants.pan_gains(x / WINDOW_WIDTH * 2 - 1)
+            channel.play(sound)
+            channel.set_volume(min(1.0, left), min(1.0, right))
+        volume_us = (time.perf_counter() - start) * 1e6 / triggers
+        pygame.mixer.stop()
+
+        result = {
+            "build_ms": build_ms,
+            "base_bytes": base_bytes,
+            "variant_bytes": variant_bytes,
+            "bank_trigger_us": bank_us,
+            "volume_trigger_us": volume_us,
+        }
+    finally:
+        pygame.mixer.quit()
+
+    print(f"Построение банка:          {result['build_ms']:10.2f} мс")
+    print(f"Исходные звуки:            {_format_kb(result['base_bytes'])}")
+    print(f"Банк вариантов:            {_format_kb(result['variant_bytes'])}")
+    print(f"Проигрывание из банка:     {result['bank_trigger_us']:10.2f} мкс")
+    print(f"Проигрывание с set_volume: {result['volume_trigger_us']:10.2f} мкс")
+    return result
+
+
+def benchmark_quality_levels(frames=500):
+    """
+    Отрисовка кирпичей, шара и полного пула частиц на каждом уровне качества.
+
+    Args:
+        frames: Количество отрисованных кадров на уровень.
+
+    Returns:
+        Словарь {уровень: время кадра в мс}.
+    """
+    from config import PARTICLE_CAPACITY, WINDOW_WIDTH, WINDOW_HEIGHT
+    from graphics.particles import ParticleSystem, NUMPY_AVAILABLE
+    from graphics.quality import QUALITY_LEVELS
+    from graphics.renderer import Renderer
+    from main import Ball, Level
+
+    print("=" * 60)
+    print("Уровни качества: время отрисовки кадра")
+    print("=" * 60)
+
+    pygame.font.init()
+    screen = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    renderer = Renderer(screen)
+    level = Level(1, "medium")
+    level.generate()
+    bricks = level.bricks.get_active_bricks()
+    ball = Ball(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
+    particles = None
+    if NUMPY_AVAILABLE:
+        particles = ParticleSystem()
+
+    result = {}
+    for settings in QUALITY_LEVELS:
+        renderer.set_quality(settings)
+        if particles is not None:
+            # Частиц столько, сколько выпускается на этом уровне
+            particles.clear()
+            particles.emit(WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2, 0,
+                           PARTICLE_CAPACITY * settings["particle_scale"], speed=(0.0, 20.0))
+            particles.update()
+        best = None
+        for _ in range(3):
+            start = time.perf_counter()
+            for _ in range(frames):
+                renderer.draw_bricks(bricks)
+                renderer.draw_ball(ball)
+                if particles is not None:
+                    renderer.draw_particles(particles)
+            elapsed = (time.perf_counter() - start) * 1000 / frames
+            best = elapsed if best is None else min(best, elapsed)
+        result[settings["name"]] = best
+        print(f"{settings['name']:<8} {best:8.3f} мс/кадр")
+    return result
+
+
+def benchmark_particles_draw(frames=200):
+    """
+    Отрисовка полного пула частиц: смешивание в пикселях против blits().
+
+    Args:
+        frames: Количество отрисованных кадров.
+
+    Returns:
+        Словарь {способ: (время кадра в мс, пик выделенной памяти в КБ)}.
+    """
+    import tracemalloc
+    import numpy as np
+    from config import PARTICLE_CAPACITY, WINDOW_WIDTH, WINDOW_HEIGHT
+    from graphics.particles import ParticleSystem
+
+    print("=" * 60)
+    print(f"Частицы: отрисовка {PARTICLE_CAPACITY} частиц")
+    print("=" * 60)
+
+    particles = ParticleSystem()
+    particles.emit(WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2, 0, PARTICLE_CAPACITY, speed=(0.0, 20.0))
+    particles.update()
+    alive = np.flatnonzero(particles.life > 0)
+    screen = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+
+    methods = {
+        "pixels": lambda: particles.draw(screen),
+        "sprites_blits": lambda: particles._draw_sprites(screen, alive),
+    }
+    result = {}
+    for name, draw in methods.items():
+        draw()
+        start = time.perf_counter()
+        for _ in range(frames):
+            draw()
+        frame_ms = (time.perf_counter() - start) * 1000 / frames
+        tracemalloc.start()
+        draw()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        result[name] = (frame_ms, peak / 1024)
+        print(f"{name:<14} {frame_ms:8.3f} мс/кадр, пик памяти {peak / 1024:8.1f} КБ")
+    return result
+
+
+def _fill_stats_log(path, count):
+    """Быстро заполнить журнал статистики одинаковыми записями."""
+    record = {
+        "timestamp": "2025-01-01T00:00:00", "player_name": "Bench", "score": 100,
+        "level_reached": 1, "difficulty": "medium", "game_duration": 60.0, "won": False,
+    }
+    line = (json.dumps(record) + "\n").encode("utf-8")
+    chunk = line * 10000
+    with open(path, "wb") as f:
+        for _ in range(count // 10000):
+            f.write(chunk)
+        f.write(line * (count % 10000))
+
+
+def benchmark_stats_append(sizes=(0, 10_000, 100_000, 1_000_000), saves=200):
+    """
+    Задержка сохранения игры в зависимости от размера истории.
+
+    Args:
+        sizes: Размеры истории (записей) перед замером.
+        saves: Количество сохранений на каждый размер.
+
+    Returns:
+        Словарь {размер истории: средняя задержка в мс}.
+    """
+    from core.stats_manager import StatsManager
+
+    print("=" * 60)
+    print("Статистика: задержка сохранения игры")
+    print("=" * 60)
+
+    result = {}
+    with tempfile.TemporaryDirectory() as stats_dir:
+        manager = StatsManager(stats_dir=stats_dir)
+        for size in sizes:
+            _fill_stats_log(manager.storage.log.path, size)
+            # Первое сохранение перестраивает индексы по дописанной истории
+            manager.save_game_result("Bench", 0, 1, "medium", 60.0, False)
+            start = time.perf_counter()
+            for i in range(saves):
+                manager.save_game_result("Bench", i, 1, "medium", 60.0, False)
+            result[size] = (time.perf_counter() - start) * 1000 / saves
+            print(f"История {size:>9} игр:     {result[size]:10.3f} мс")
+    return result
+
+
+def _generate_stats_records(count, players=1000, seed=0):
+    """Сгенерировать разнообразные записи об играх."""
+    import random
+    rng = random.Random(seed)
+    difficulties = ("easy", "medium", "hard")
+    for i in range(count):
+        yield {
+            "timestamp": f"2025-01-01T00:00:00.{i % 1000000:06d}",
+            "player_name": f"Player{rng.randrange(players)}",
+            "score": rng.randrange(0, 5000, 10),
+            "level_reached": rng.randint(1, 5),
+            "difficulty": rng.choice(difficulties),
+            "game_duration": round(rng.uniform(10, 600), 2),
+            "won": rng.random() < 0.2,
+        }
+
+
+def _best_ms(func, repeat=3):
+    """Лучшее время вызова функции в мс из нескольких попыток."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def benchmark_stats_backends(count=200_000):
+    """
+    Запросы статистики в журнале JSON Lines и в базе SQLite.
+
+    Args:
+        count: Количество записей в истории.
+
+    Returns:
+        Словарь {хранилище: {запрос: время в мс}}.
+    """
+    from core.stats_manager import StatsManager
+
+    print("=" * 60)
+    print(f"Статистика: jsonl против sqlite ({count} игр)")
+    print("=" * 60)
+
+    result = {}
+    with tempfile.TemporaryDirectory() as stats_dir:
+        for backend in ("jsonl", "sqlite"):
+            manager = StatsManager(stats_dir=os.path.join(stats_dir, backend), backend=backend)
+            manager.storage.append_many(_generate_stats_records(count))
+
+            result[backend] = {
+                "save": _best_ms(lambda: manager.save_game_result(
+                    "Bench", 100, 1, "medium", 60.0, False)),
+                "player": _best_ms(lambda: manager.get_player_stats("Player7")),
+                "top10": _best_ms(lambda: manager.get_high_scores(10)),
+                "summary": _best_ms(manager.get_statistics_summary),
+            }
+            manager.storage.close()
+
+    print(f"{'Запрос':<20}{'jsonl, мс':>12}{'sqlite, мс':>12}")
+    for query in result["jsonl"]:
+        print(f"{query:<20}{result['jsonl'][query]:12.2f}{result['sqlite'][query]:12.2f}")
+    return result
+
+
+def _save_stats_worker(stats_dir, player_name, saves):
+    """Сохранить saves игр из отдельного процесса."""
+    from core.stats_manager import StatsManager
+
+    manager = StatsManager(stats_dir=stats_dir)
+    for i in range(saves):
+        manager.save_game_result(player_name, i, 1, "medium", 60.0, False)
+
+
+def benchmark_stats_concurrent(processes=(1, 2, 4, 8), saves=200):
+    """
+    Сохранение игр из нескольких процессов одновременно.
+
+    Каждый процесс пишет свой сегмент журнала; после замера проверяется,
+    что ни одна запись не потеряна.
+
+    Args:
+        processes: Количества одновременно пишущих процессов.
+        saves: Сохранений в каждом процессе.
+
+    Returns:
+        Словарь {процессов: сохранений в секунду}.
+    """
+    import multiprocessing
+    from core.stats_manager import StatsManager
+
+    print("=" * 60)
+    print("Статистика: одновременная запись из нескольких процессов")
+    print("=" * 60)
+
+    result = {}
+    for count in processes:
+        with tempfile.TemporaryDirectory() as stats_dir:
+            workers = [multiprocessing.Process(target=_save_stats_worker,
+                                               args=(stats_dir, f"P{i}", saves))
+                       for i in range(count)]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - start
+
+            saved = sum(1 for _ in StatsManager(stats_dir=stats_dir).iter_stats())
+            result[count] = count * saves / elapsed
+            print(f"Процессов {count:>2}: {result[count]:10.0f} игр/с, "
+                  f"сохранено {saved} из {count * saves}")
+    return result
+
+
+def benchmark_stats_partitions(months=24, per_month=20_000):
+    """
+    Запросы за диапазон времени при разделах по месяцам.
+
+    Args:
+        months: Количество месяцев истории.
+        per_month: Игр в месяце.
+
+    Returns:
+        Словарь {запрос: время в мс}.
+    """
+    from core.stats_manager import StatsManager
+
+    print("=" * 60)
+    print(f"Статистика: разделы по месяцам ({months} x {per_month} игр)")
+    print("=" * 60)
+
+    result = {}
+    with tempfile.TemporaryDirectory() as stats_dir:
+        manager = StatsManager(stats_dir=stats_dir)
+        with open(manager.storage.log.path, "w", encoding="utf-8") as f:
+            records = _generate_stats_records(months * per_month)
+            for i, record in enumerate(records):
+                month = i // per_month
+                record["timestamp"] = (f"{2024 + month // 12}-{month % 12 + 1:02d}-"
+                                       f"{i % 28 + 1:02d}T12:00:00.{i:06d}")
+                f.write(json.dumps(record) + "\n")
+
+        start = time.perf_counter()
+        manager.compact_stats(force=True)
+        result["compact"] = (time.perf_counter() - start) * 1000
+        last = sorted(manager.storage.partitions())[-1]
+
+        result["top10_month"] = _best_ms(lambda: manager.get_high_scores(10, since=f"{last}-01"))
+        result["top10_all_scan"] = _best_ms(
+            lambda: manager.get_high_scores(10, since="0000-01-01"))
+        result["summary_month"] = _best_ms(
+            lambda: manager.get_statistics_summary(since=f"{last}-01"))
+
+    for name, ms in result.items():
+        print(f"{name:<16} {ms:10.1f} мс")
+    return result
+
+
+def benchmark_stats_columns(count=1_000_000):
+    """
+    Двоичные записи NumPy против потокового прохода по журналу.
+
+    Группировки по сложности и игроку, рейтинг и статистика за период,
+    а также стоимость дозаписи игры в файл записей.
+
+    Args:
+        count: Количество записей в истории.
+
+    Returns:
+        Словарь {замер: время в мс}.
+    """
+    from core.stats_manager import StatsManager
+    from core.stats_index import RunningAggregates
+
+    print("=" * 60)
+    print(f"Статистика: двоичные записи NumPy ({count} игр)")
+    print("=" * 60)
+
+    result = {}
+    since = "2025-01-01T00:00:00.5"
+    with tempfile.TemporaryDirectory() as stats_dir:
+        manager = StatsManager(stats_dir=stats_dir)
+        manager.storage.append_many(_generate_stats_records(count))
+
+        def streamed():
+            groups = {}
+            for record in manager.iter_stats():
+                groups.setdefault(record["difficulty"], RunningAggregates()).add(record)
+            return groups
+
+        result["stream_difficulty"] = _best_ms(streamed, repeat=1)
+        result["stream_top_range"] = _best_ms(
+            lambda: manager.get_high_scores(10, since=since), repeat=1)
+        start = time.perf_counter()
+        manager.get_columns()
+        result["records_build"] = (time.perf_counter() - start) * 1000
+        result["records_load"] = _best_ms(
+            lambda: StatsManager(stats_dir=stats_dir).get_columns())
+        result["group_difficulty"] = _best_ms(lambda: manager.get_group_stats("difficulty"))
+        result["group_player"] = _best_ms(lambda: manager.get_group_stats("player"))
+        result["top_range"] = _best_ms(lambda: manager.get_high_scores(10, since=since))
+        result["summary_range"] = _best_ms(
+            lambda: manager.get_statistics_summary(since=since))
+
+        # Первое сохранение строит индексы журнала
+        manager.save_game_result("Bench", 0, 1, "medium", 60.0, False)
+        saves = 20
+        start = time.perf_counter()
+        for i in range(saves):
+            manager.save_game_result("Bench", i, 1, "medium", 60.0, False)
+        result["save_with_records"] = (time.perf_counter() - start) * 1000 / saves
+
+    for name, ms in result.items():
+        print(f"{name:<18} {ms:10.1f} мс")
+    return result
+
+
+def benchmark_stats_player(count=1_000_000):
+    """
+    История одного игрока: индекс игроков против прохода по журналу.
+
+    Args:
+        count: Количество записей в истории (1000 игроков).
+
+    Returns:
+        Словарь {замер: время в мс}.
+    """
+    from core.stats_manager import StatsManager
+
+    print("=" * 60)
+    print(f"Статистика: игры одного игрока ({count} игр)")
+    print("=" * 60)
+
+    result = {}
+    with tempfile.TemporaryDirectory() as stats_dir:
+        manager = StatsManager(stats_dir=stats_dir)
+        manager.storage.append_many(_generate_stats_records(count))
+
+        result["stream_player"] = _best_ms(
+            lambda: list(manager.iter_stats(
+                filter=lambda stat: stat["player_name"] == "Player7")), repeat=1)
+        manager.get_columns()
+        start = time.perf_counter()
+        games = manager.get_player_stats("Player7")
+        result["index_build"] = (time.perf_counter() - start) * 1000
+        result["index_load"] = _best_ms(
+            lambda: StatsManager(stats_dir=stats_dir).get_player_stats("Player7", limit=10))
+        result["player_all"] = _best_ms(lambda: manager.get_player_stats("Player7"))
+        result["player_last_10"] = _best_ms(lambda: manager.get_player_stats("Player7", limit=10))
+        print(f"Игр игрока: {len(games)}")
+
+    for name, ms in result.items():
+        print(f"{name:<18} {ms:10.2f} мс")
+    return result
+
+
+def benchmark_stats_distribution(count=200_000):
+    """
+    Процентильный ранг и квантили: скетч из индекса против прохода по истории.
+
+    Args:
+        count: Количество записей в истории.
+
+    Returns:
+        Словарь {замер: время в мс}.
+    """
+    from core.stats_manager import StatsManager
+    from core.stats_index import ScoreDistribution
+
+    print("=" * 60)
+    print(f"Статистика: распределения счёта ({count} игр)")
+    print("=" * 60)
+
+    result = {}
+    with tempfile.TemporaryDirectory() as stats_dir:
+        manager = StatsManager(stats_dir=stats_dir)
+        manager.storage.append_many(_generate_stats_records(count))
+
+        def scanned():
+            scores = [record["score"] for record in manager.iter_stats()]
+            below = sum(1 for score in scores if score < 2500)
+            same = sum(1 for score in scores if score == 2500)
+            return (below + same / 2) / len(scores) * 100
+
+        result["scan_rank"] = _best_ms(scanned, repeat=1)
+        start = time.perf_counter()
+        distribution = manager.get_distribution()
+        result["index_build"] = (time.perf_counter() - start) * 1000
+        result["index_load"] = _best_ms(
+            lambda: StatsManager(stats_dir=stats_dir).get_distribution())
+        result["sketch_rank"] = _best_ms(lambda: manager.get_percentile_rank(2500))
+        result["sketch_quantiles"] = _best_ms(lambda: distribution.quantiles())
+        result["merge"] = _best_ms(
+            lambda: ScoreDistribution.from_dict(distribution.to_dict()).merge(distribution))
+        print(f"Ранг 2500: по истории {scanned():.2f}%, "
+              f"по скетчу {manager.get_percentile_rank(2500):.2f}%")
+
+    for name, ms in result.items():
+        print(f"{name:<18} {ms:10.3f} мс")
+    return result
+
+
+def benchmark_stats_query(count=1_000_000):
+    """
+    Запрос --query: время до первой строки и до конца вывода.
+
+    Args:
+        count: Количество записей в истории.
+
+    Returns:
+        Словарь {замер: время в мс}.
+    """
+    from core.stats_manager import StatsManager
+    from core.stats_output import write_records
+
+    print("=" * 60)
+    print(f"Статистика: потоковый запрос ({count} игр)")
+    print("=" * 60)
+
+    class FirstWrite(io.StringIO):
+        """Поток, запоминающий момент первой записи строк."""
+
+        first = None
+
+        def write(self, text):
+            if self.first is None and "\n" in text:
+                self.first = time.perf_counter()
+            return super().write(text)
+
+    def run(fmt, **filters):
+        out = FirstWrite()
+        start = time.perf_counter()
+        write_records(manager.query(**filters), fmt, out)
+        return (out.first - start) * 1000, (time.perf_counter() - start) * 1000
+
+    result = {}
+    with tempfile.TemporaryDirectory() as stats_dir:
+        manager = StatsManager(stats_dir=stats_dir)
+        manager.storage.append_many(_generate_stats_records(count))
+
+        result["first_row_all"], result["json_all"] = run("json")
+        result["first_row_newest"], _ = run("json", descending=True)
+        manager.get_high_scores()
+        _, result["top_score_10"] = run("table", sort="score", descending=True, limit=10)
+        _, result["won_by_duration_10"] = run("table", won=True, sort="duration", limit=10)
+
+    for name, ms in result.items():
+        print(f"{name:<18} {ms:10.2f} мс")
+    return result
+
+
+BENCHMARKS = {
+    "music_memory": benchmark_music_memory,
+    "panned_effects": benchmark_panned_effects,
+    "particles_draw": benchmark_particles_draw,
+    "quality_levels": benchmark_quality_levels,
+    "stats_append": benchmark_stats_append,
+    "stats_backends": benchmark_stats_backends,
+    "stats_concurrent": benchmark_stats_concurrent,
+    "stats_partitions": benchmark_stats_partitions,
+    "stats_columns": benchmark_stats_columns,
+    "stats_distribution": benchmark_stats_distribution,
+    "stats_player": benchmark_stats_player,
+    "stats_query": benchmark_stats_query,
+}
+
+
+def main():
+    """Запустить замеры, переданные в аргументах, или все."""
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"❌ Неизвестный замер: {name}")
+            continue
+        BENCHMARKS[name]()
+        print()
+
+
+if __name__ == "__main__":
+    main()
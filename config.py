@@ -57,7 +57,32 @@ STATS_DIR = "stats"
 MAX_LEVEL = 5
 
 # Параметры статистики
-STATS_FILE = "game_stats.json"
+STATS_FILE = "game_stats.json"         # Старый формат (JSON массив), мигрируется
+STATS_LOG_FILE = "game_stats.jsonl"    # Общий журнал прежнего формата, раскладывается по разделам
+STATS_DB_FILE = "game_stats.db"        # База SQLite
+STATS_BACKEND = "jsonl"                # Хранилище: jsonl или sqlite
+STATS_INDEX_DIR = "index"              # Поддиректория индексов журнала
+STATS_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Журналы больше не кэшируются в памяти
+STATS_LEADERBOARD_SIZE = 100           # Игр в рейтинге (общем и по сложностям)
+STATS_INDEX_SAVE_EVERY = 32            # Сохранений игр между записью индексов на диск
+STATS_PLAYERS_PRECISION = 12           # Бит номера регистра оценки числа игроков (2^p байт)
+STATS_WRITER_QUEUE_SIZE = 64           # Результатов в очереди фоновой записи
+STATS_WRITER_PUT_TIMEOUT = 0.005       # Секунд ожидания места в полной очереди (затем - список ожидания)
+STATS_WRITER_OVERFLOW_SIZE = 1024      # Результатов в списке ожидания (сверх него запись отбрасывается)
+STATS_SEGMENT_DIR = "segments"         # Поддиректория журналов отдельных процессов
+STATS_SEGMENT_MAX_BYTES = 1024 * 1024  # Журналы вне разделов больше - раскладываются по разделам
+STATS_SEGMENT_MAX_FILES = 16           # Или если журналов вне разделов больше этого
+STATS_IMPORT_CHUNK = 100_000           # Импортируемых записей, сортируемых в памяти за раз
+STATS_PARTITION_DIR = "partitions"     # Поддиректория разделов по месяцам
+STATS_RETENTION_MONTHS = None          # Хранить месяцев (None - всю историю)
+STATS_COLUMNS_DIR = "columns"          # Поддиректория двоичных записей NumPy для аналитики
+STATS_PLAYER_INDEX_TAIL = 4096         # Новых игр сверх индекса игроков до его перестроения
+STATS_SKETCH_ACCURACY = 0.01           # Относительная погрешность квантилей счёта и длительности
+STATS_HISTOGRAM_BINS = {               # Гистограммы: поле -> (ширина интервала, интервалов)
+    "score": (100, 50),
+    "game_duration": (30, 40),
+}
+STATS_QUERY_BATCH = 500                # Строк вывода запроса в одной записи в поток
 STATS_DIR = "stats"
 
 # Множители сложности (скорость)
@@ -72,4 +97,50 @@ DIFFICULTY_LIVES = {
     "easy": 5,
     "medium": 3,
     "hard": 1,
-}
\ No newline at end of file
+}
+# Адаптивное качество графики
+QUALITY_AUTO = True               # Включить регулятор качества
+QUALITY_WINDOW = 30               # Кадров в окне усреднения
+QUALITY_DOWNGRADE_RATIO = 0.85    # Доля бюджета кадра, выше которой качество снижается
+QUALITY_UPGRADE_RATIO = 0.5       # Доля бюджета кадра, ниже которой качество повышается
+QUALITY_UPGRADE_WINDOWS = 4       # Сколько «лёгких» окон подряд нужно для повышения
+
+# Масштабирование вывода
+SCALE_MODE = "nearest"            # integer, nearest или smooth
+
+# Частицы
+PARTICLE_CAPACITY = 4096          # Размер пула частиц
+PARTICLE_LIFE = 40                # Время жизни частицы в кадрах
+PARTICLE_DEBRIS = 24              # Осколков на кирпич
+PARTICLE_SPARKS = 8               # Искр на кирпич
+PARTICLE_GRAVITY = 0.15           # Ускорение вниз за кадр
+PARTICLE_SIZE = 3                 # Размер спрайта частицы в пикселях
+PARTICLE_FADE_STEPS = 4           # Ступеней затухания (спрайтов на цвет)
+
+# Звук: лимит одновременных голосов на эффект (остальные эффекты - 1 голос)
+SOUND_VOICE_LIMITS = {
+    "brick_hit": 3,
+    "wall_hit": 2,
+    "paddle_hit": 2,
+}
+
+# Кэш синтезированных звуков
+SOUND_CACHE_DIR = "audio/cache"
+
+# Звуковой бэкенд: pygame, null или recording
+AUDIO_BACKEND = "pygame"
+
+# Фоновая музыка (потоковое проигрывание из MUSIC_DIR)
+MUSIC_DIR = "audio/music"
+MUSIC_FADE_MS = 800               # Длительность затухания/нарастания при смене трека
+MUSIC_TRACKS = {
+    "menu": "menu.ogg",
+    "level": "level.ogg",         # Для level_N без своего трека
+    "victory": "victory.ogg",
+}
+
+# Стерео панорама эффектов ударов по позиции X шара
+SOUND_PANNED_EFFECTS = ("paddle_hit", "brick_hit", "wall_hit")
+SOUND_PAN_STEPS = 5               # Ступеней панорамы от левого края до правого
+SOUND_PAN_WIDTH = 0.8             # Крайняя панорама (1.0 - только один канал)
+SOUND_PITCH_VARIANTS = (0.96, 1.0, 1.04)  # Варианты высоты тона, чередуются
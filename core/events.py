@@ -0,0 +1,87 @@
+"""
+Очередь игровых событий.
+
+Физика за шаг только складывает события в очередь, а звук, счёт,
+частицы и прочие потребители обрабатывают их пакетом после шага.
+Очередь выделяет массивы один раз и переиспользует их каждый кадр.
+"""
+
+from typing import Any, Callable, List
+
+# Типы событий
+WALL_HIT = 0
+PADDLE_HIT = 1
+BRICK_DESTROYED = 2
+BALL_LOST = 3
+LEVEL_COMPLETE = 4
+BALL_LAUNCH = 5
+
+EVENT_NAMES = {
+    WALL_HIT: "wall_hit",
+    PADDLE_HIT: "paddle_hit",
+    BRICK_DESTROYED: "brick_destroyed",
+    BALL_LOST: "ball_lost",
+    LEVEL_COMPLETE: "level_complete",
+    BALL_LAUNCH: "ball_launch",
+}
+
+EVENT_QUEUE_CAPACITY = 256
+
+
+class EventQueue:
+    """
+    Очередь событий фиксированной ёмкости.
+
+    Событие i хранится в параллельных массивах: kinds[i], xs[i], ys[i]
+    и refs[i] (ссылка на объект, например разрушенный кирпич).
+    Потребители читают первые count элементов.
+    """
+
+    def __init__(self, capacity: int = EVENT_QUEUE_CAPACITY):
+        """
+        Инициализация очереди.
+
+        Args:
+            capacity: Максимальное количество событий за шаг.
+        """
+        self.capacity = capacity
+        self.kinds: List[int] = [0] * capacity
+        self.xs: List[float] = [0.0] * capacity
+        self.ys: List[float] = [0.0] * capacity
+        self.refs: List[Any] = [None] * capacity
+        self.count = 0
+        self.dropped = 0
+
+    def push(self, kind: int, x: float = 0.0, y: float = 0.0, ref: Any = None) -> None:
+        """
+        Добавить событие.
+
+        Args:
+            kind: Тип события.
+            x: Координата X места события.
+            y: Координата Y места события.
+            ref: Связанный объект.
+        """
+        i = self.count
+        if i >= self.capacity:
+            self.dropped += 1
+            return
+
+        self.kinds[i] = kind
+        self.xs[i] = x
+        self.ys[i] = y
+        self.refs[i] = ref
+        self.count = i + 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self) -> None:
+        """Очистить очередь, отпустив ссылки на объекты."""
+        refs = self.refs
+        for i in range(self.count):
+            refs[i] = None
+        self.count = 0
+
+
+EventConsumer = Callable[[EventQueue], None]
@@ -117,7 +117,7 @@ class Game:
             if collided:
                 brick.destroy()
                 self.level.on_brick_destroyed()
-                self.sound_manager.play_brick_hit()
+                self.sound_manager.play_brick_hit(self.ball.x)
                 self.ball.increase_speed(1.01)
         
         # Удалить разрушенные кирпичи
@@ -186,6 +186,7 @@ class Game:
         while self.running:
             self.handle_events()
             self.update()
+            self.sound_manager.end_frame()
             self.render()
             self.clock.tick(FPS)
         
@@ -0,0 +1,65 @@
+"""
+Запись и воспроизведение игровых сессий.
+
+Игра детерминирована, поэтому для повтора достаточно параметров игры
+и покадрового ввода: нажатых в кадре клавиш и удерживаемых стрелок.
+"""
+
+import json
+from typing import List, Tuple
+
+# Биты удерживаемых клавиш
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+
+
+class Replay:
+    """Запись одной сессии: параметры игры и ввод по кадрам."""
+
+    def __init__(self, player_name: str, difficulty: str, max_levels: int):
+        """
+        Инициализация записи.
+
+        Args:
+            player_name: Имя игрока.
+            difficulty: Уровень сложности.
+            max_levels: Максимальный номер уровня.
+        """
+        self.player_name = player_name
+        self.difficulty = difficulty
+        self.max_levels = max_levels
+        self.frames: List[Tuple[List[int], int]] = []
+
+    def add_frame(self, keys_down: List[int], held: int) -> None:
+        """
+        Добавить ввод очередного кадра.
+
+        Args:
+            keys_down: Коды клавиш, нажатых в этом кадре.
+            held: Битовая маска удерживаемых клавиш (INPUT_LEFT/INPUT_RIGHT).
+        """
+        self.frames.append((list(keys_down), held))
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def save(self, path: str) -> None:
+        """Сохранить запись в JSON файл."""
+        data = {
+            "player_name": self.player_name,
+            "difficulty": self.difficulty,
+            "max_levels": self.max_levels,
+            "frames": [[keys, held] for keys, held in self.frames],
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        """Загрузить запись из JSON файла."""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        replay = cls(data["player_name"], data["difficulty"], data["max_levels"])
+        replay.frames = [(list(keys), held) for keys, held in data["frames"]]
+        return replay
@@ -0,0 +1,652 @@
+"""
+Двоичное представление истории игр для аналитики на NumPy.
+
+Каждая игра - запись фиксированного размера (RECORD_FIELDS, 32 байта):
+время, счёт, длительность, номер игрока, уровень, код сложности
+и победа. Записи лежат подряд в records.bin, имена игроков - в таблице
+players.jsonl (строка на игрока, номер игрока - номер строки), коды
+сложностей и подпись хранилища - в meta.json. Файл записей
+отображается в память как структурный массив NumPy, поэтому запросы
+выполняются векторно, без объектов Python на каждую запись.
+
+Новые игры дописываются в конец файлов. meta.json заменяется последним
+и задаёт число действительных записей: прерванная дозапись не читается
+и обрезается при следующей. Группировки по сложности и игроку считаются
+векторно (bincount и ufunc.at по кодам групп). Индекс игроков
+(PlayerIndex) хранит номера записей каждого игрока, поэтому история
+одного игрока читается без просмотра остальных игр.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from core.stats_index import _plain, _tuples
+from core.stats_storage import acquire_lock, release_lock
+
+COLUMNS_AVAILABLE = np is not None
+
+# Поле записи -> тип; порядок полей выравнивает запись без пропусков
+RECORD_FIELDS = (
+    ("timestamp", "<M8[us]"),
+    ("score", "<i8"),
+    ("game_duration", "<f8"),
+    ("player", "<i4"),
+    ("level_reached", "<i2"),
+    ("difficulty", "u1"),
+    ("won", "?"),
+)
+RECORD_DTYPE = np.dtype(list(RECORD_FIELDS)) if COLUMNS_AVAILABLE else None
+
+# Версия формата файлов (меняется вместе с RECORD_FIELDS)
+FORMAT_VERSION = 1
+
+# Записей, накапливаемых в списках перед преобразованием в массив
+BUILD_CHUNK = 65536
+
+RECORDS_FILE = "records.bin"
+PLAYERS_FILE = "players.jsonl"
+META_FILE = "meta.json"
+LOCK_FILE = "write.lock"
+PLAYER_ORDER_FILE = "player_order.npy"
+PLAYER_OFFSETS_FILE = "player_offsets.npy"
+PLAYER_INDEX_FILE = "player_index.json"
+
+
+def encode_records(records: Iterable[Dict[str, Any]], difficulties: List[str],
+                   players: List[str]):
+    """
+    Записи об играх в виде структурного массива RECORD_DTYPE.
+
+    Args:
+        records: Записи.
+        difficulties: Сложности; дополняется новыми (код - индекс в списке).
+        players: Имена игроков; дополняется новыми (номер - индекс в списке).
+
+    Returns:
+        Массив NumPy.
+    """
+    difficulty_codes = {name: code for code, name in enumerate(difficulties)}
+    player_ids = {name: code for code, name in enumerate(players)}
+    chunks = []
+    buffer = {name: [] for name, _ in RECORD_FIELDS}
+
+    def flush():
+        if buffer["score"]:
+            chunk = np.empty(len(buffer["score"]), dtype=RECORD_DTYPE)
+            for name, values in buffer.items():
+                chunk[name] = values
+                values.clear()
+            chunks.append(chunk)
+
+    for record in records:
+        difficulty = record["difficulty"]
+        code = difficulty_codes.get(difficulty)
+        if code is None:
+            code = difficulty_codes[difficulty] = len(difficulties)
+            difficulties.append(difficulty)
+        name = record["player_name"]
+        player = player_ids.get(name)
+        if player is None:
+            player = player_ids[name] = len(players)
+            players.append(name)
+
+        buffer["timestamp"].append(record["timestamp"])
+        buffer["score"].append(record["score"])
+        buffer["game_duration"].append(record["game_duration"])
+        buffer["player"].append(player)
+        buffer["level_reached"].append(record["level_reached"])
+        buffer["difficulty"].append(code)
+        buffer["won"].append(record["won"])
+        if len(buffer["score"]) >= BUILD_CHUNK:
+            flush()
+    flush()
+
+    if not chunks:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+
+class StatsColumns:
+    """Записи истории игр (структурный массив) и таблицы сложностей и игроков."""
+
+    def __init__(self, records, difficulties: List[str], players: List[str],
+                 signature=None):
+        """
+        Инициализация представления.
+
+        Args:
+            records: Структурный массив RECORD_DTYPE (в памяти или отображённый).
+            difficulties: Сложности; код сложности - индекс в списке.
+            players: Имена игроков; номер игрока - индекс в списке.
+            signature: Подпись хранилища, которой соответствуют записи.
+        """
+        self.records = records
+        self.columns = {name: records[name] for name in RECORD_DTYPE.names}
+        self.difficulties = difficulties
+        self.players = players
+        self.signature = signature
+        # Описание файлов, из которых загружены записи (None - только в памяти)
+        self.stored: Optional[Dict[str, Any]] = None
+        self._player_ids: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, name: str):
+        return self.columns[name]
+
+    @classmethod
+    def build(cls, records: Iterable[Dict[str, Any]], signature=None) -> "StatsColumns":
+        """Построить представление по записям."""
+        difficulties, players = [], []
+        return cls(encode_records(records, difficulties, players),
+                   difficulties, players, signature)
+
+    def extended(self, records: Iterable[Dict[str, Any]], signature=None) -> "StatsColumns":
+        """
+        Представление с дописанными записями в памяти (текущее не меняется).
+
+        Args:
+            records: Новые записи.
+            signature: Подпись хранилища после этих записей.
+
+        Returns:
+            Новый StatsColumns.
+        """
+        difficulties, players = list(self.difficulties), list(self.players)
+        rows = encode_records(records, difficulties, players)
+        return StatsColumns(np.concatenate([self.records, rows]), difficulties, players,
+                            signature)
+
+    def player_id(self, name: str) -> Optional[int]:
+        """Номер игрока в таблице или None, если игр с таким именем нет."""
+        if self._player_ids is None:
+            self._player_ids = {player: code for code, player in enumerate(self.players)}
+        return self._player_ids.get(name)
+
+    def scan_player(self, player: int):
+        """Номера записей игрока проходом по столбцу игроков (без индекса)."""
+        return np.flatnonzero(self.columns["player"] == player)
+
+    def record(self, position: int) -> Dict[str, Any]:
+        """Запись об игре в формате журнала."""
+        row = self.records[position]
+        return {
+            "timestamp": row["timestamp"].item().isoformat(),
+            "player_name": self.players[row["player"]],
+            "score": int(row["score"]),
+            "level_reached": int(row["level_reached"]),
+            "difficulty": self.difficulties[row["difficulty"]],
+            "game_duration": float(row["game_duration"]),
+            "won": bool(row["won"]),
+        }
+
+    def time_mask(self, since: Optional[str] = None, until: Optional[str] = None):
+        """
+        Маска игр в диапазоне времени.
+
+        Args:
+            since: Не раньше этого момента (ISO строка).
+            until: Раньше этого момента.
+
+        Returns:
+            Булев массив или None, если диапазон не задан.
+        """
+        if since is None and until is None:
+            return None
+        timestamps = self.columns["timestamp"]
+        mask = np.ones(len(self), dtype=bool)
+        if since is not None:
+            mask &= timestamps >= np.datetime64(since, "us")
+        if until is not None:
+            mask &= timestamps < np.datetime64(until, "us")
+        return mask
+
+    def _select(self, mask) -> Dict[str, Any]:
+        """Столбцы, отфильтрованные маской."""
+        if mask is None:
+            return self.columns
+        return {name: column[mask] for name, column in self.columns.items()}
+
+    @staticmethod
+    def _summary(games, wins, score_sum, max_score, min_score, duration_sum,
+                 players) -> Dict[str, Any]:
+        """Словарь статистики в формате StatsManager.get_statistics_summary."""
+        games, wins = int(games), int(wins)
+        return {
+            "total_games": games,
+            "wins": wins,
+            "losses": games - wins,
+            "win_rate": round((wins / games) * 100, 2),
+            "average_score": round(float(score_sum) / games, 2),
+            "max_score": int(max_score),
+            "min_score": int(min_score),
+            "average_duration": round(float(duration_sum) / games, 2),
+            "unique_players": int(players)
+        }
+
+    def summary(self, mask=None) -> Optional[Dict[str, Any]]:
+        """
+        Общая статистика.
+
+        Args:
+            mask: Маска учитываемых игр (None - все).
+
+        Returns:
+            Словарь или None, если игр нет.
+        """
+        columns = self._select(mask)
+        score = columns["score"]
+        if not len(score):
+            return None
+        players = np.count_nonzero(np.bincount(columns["player"], minlength=len(self.players)))
+        return self._summary(len(score), np.count_nonzero(columns["won"]), score.sum(),
+                             score.max(), score.min(), columns["game_duration"].sum(), players)
+
+    def top(self, limit: int, difficulty: Optional[str] = None,
+            mask=None) -> List[Dict[str, Any]]:
+        """
+        Лучшие игры по убыванию счёта; при равном счёте выше более ранняя.
+
+        Args:
+            limit: Количество игр.
+            difficulty: Сложность или None для всех игр.
+            mask: Маска учитываемых игр (None - все).
+
+        Returns:
+            Список записей.
+        """
+        if difficulty is not None:
+            if difficulty not in self.difficulties:
+                return []
+            selected = self.columns["difficulty"] == self.difficulties.index(difficulty)
+            mask = selected if mask is None else mask & selected
+        positions = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        if limit <= 0 or not len(positions):
+            return []
+
+        scores = self.columns["score"][positions]
+        if limit < len(positions):
+            # Порог - limit-й по величине счёт; равные ему игры остаются кандидатами
+            kth = len(scores) - limit
+            threshold = np.partition(scores, kth)[kth]
+            candidates = scores >= threshold
+            positions, scores = positions[candidates], scores[candidates]
+        order = np.lexsort((positions, self.columns["timestamp"][positions], -scores))[:limit]
+        return [self.record(position) for position in positions[order]]
+
+    def group_stats(self, by: str = "difficulty", mask=None) -> Dict[str, Dict[str, Any]]:
+        """
+        Статистика по группам.
+
+        Args:
+            by: difficulty (по сложности) или player (по игроку).
+            mask: Маска учитываемых игр (None - все).
+
+        Returns:
+            Словарь {сложность или имя игрока: статистика}.
+        """
+        if by == "difficulty":
+            key, names = "difficulty", self.difficulties
+        elif by == "player":
+            key, names = "player", self.players
+        else:
+            raise ValueError(f"Неизвестная группировка: {by}")
+
+        columns = self._select(mask)
+        codes = columns[key].astype(np.intp)
+        groups = len(names)
+        games = np.bincount(codes, minlength=groups)
+        wins = np.bincount(codes, weights=columns["won"], minlength=groups)
+        score_sum = np.bincount(codes, weights=columns["score"], minlength=groups)
+        duration_sum = np.bincount(codes, weights=columns["game_duration"], minlength=groups)
+
+        present = np.flatnonzero(games)
+        if not len(present):
+            return {}
+        score = columns["score"]
+        max_score = np.full(groups, np.iinfo(score.dtype).min, dtype=score.dtype)
+        min_score = np.full(groups, np.iinfo(score.dtype).max, dtype=score.dtype)
+        np.maximum.at(max_score, codes, score)
+        np.minimum.at(min_score, codes, score)
+
+        # Уникальные игроки группы - занятые ячейки таблицы (группа, игрок)
+        if by == "player":
+            players = np.ones(groups, dtype=np.int64)
+        else:
+            seen = np.zeros(groups * len(self.players), dtype=bool)
+            seen[codes * len(self.players) + columns["player"]] = True
+            players = seen.reshape(groups, len(self.players)).sum(axis=1)
+
+        return {
+            names[group]: self._summary(games[group], wins[group], score_sum[group],
+                                        max_score[group], min_score[group],
+                                        duration_sum[group], players[group])
+            for group in present
+        }
+
+
+class PlayerIndex:
+    """
+    Номера записей каждого игрока в формате CSR.
+
+    order - номера записей, сгруппированные по игроку (внутри игрока
+    по возрастанию), offsets[p]:offsets[p + 1] - отрезок order игрока p.
+    Индекс охватывает первые count записей файла; игры, дописанные
+    позже, находятся просмотром хвоста столбца игроков.
+    """
+
+    def __init__(self, order, offsets, count: int, inode: Optional[int] = None):
+        """
+        Инициализация индекса.
+
+        Args:
+            order: Номера записей, сгруппированные по игроку.
+            offsets: Начало отрезка каждого игрока в order (и длина order в конце).
+            count: Количество записей, по которым построен индекс.
+            inode: Файл записей, для которого построен индекс.
+        """
+        self.order = order
+        self.offsets = offsets
+        self.count = count
+        self.inode = inode
+
+    @classmethod
+    def build(cls, columns: StatsColumns) -> "PlayerIndex":
+        """Построить индекс по всем записям представления."""
+        player = columns["player"]
+        offsets = np.zeros(len(columns.players) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(player, minlength=len(columns.players)), out=offsets[1:])
+        inode = columns.stored["inodes"][0] if columns.stored is not None else None
+        return cls(np.argsort(player, kind="stable"), offsets, len(columns), inode)
+
+    def covers(self, columns: StatsColumns) -> bool:
+        """Построен ли индекс по началу файла записей columns."""
+        return (columns.stored is not None and self.inode == columns.stored["inodes"][0]
+                and self.count <= len(columns))
+
+    def positions(self, columns: StatsColumns, player: int):
+        """
+        Номера записей игрока по возрастанию.
+
+        Args:
+            columns: Представление, для которого построен индекс.
+            player: Номер игрока.
+
+        Returns:
+            Массив номеров записей.
+        """
+        if player + 1 < len(self.offsets):
+            head = self.order[self.offsets[player]:self.offsets[player + 1]]
+        else:
+            head = np.empty(0, dtype=np.intp)
+        tail = np.flatnonzero(columns["player"][self.count:] == player) + self.count
+        return np.concatenate([head, tail])
+
+
+def load_player_index(directory: str, columns: StatsColumns) -> Optional[PlayerIndex]:
+    """
+    Загрузить индекс игроков, построенный по началу файла записей columns.
+
+    Args:
+        directory: Директория файлов.
+        columns: Загруженное из файлов представление.
+
+    Returns:
+        PlayerIndex или None, если индекса нет, он повреждён или устарел.
+    """
+    try:
+        with open(os.path.join(directory, PLAYER_INDEX_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        index = PlayerIndex(
+            np.load(os.path.join(directory, PLAYER_ORDER_FILE), mmap_mode="r"),
+            np.load(os.path.join(directory, PLAYER_OFFSETS_FILE), mmap_mode="r"),
+            meta["count"], meta["inode"])
+        # Файлы, заменённые другим процессом во время чтения
+        if len(index.order) != index.count or int(index.offsets[-1]) != index.count:
+            return None
+        return index if index.covers(columns) else None
+    except (OSError, ValueError, KeyError, TypeError, IndexError):
+        return None
+
+
+def save_player_index(directory: str, index: PlayerIndex) -> None:
+    """
+    Сохранить индекс игроков (описание последним).
+
+    Если файлы записывает другой процесс, сохранение пропускается.
+
+    Args:
+        directory: Директория файлов.
+        index: Индекс.
+    """
+    lock_path = os.path.join(directory, LOCK_FILE)
+    if not acquire_lock(lock_path):
+        return
+    try:
+        suffix = f".{os.getpid()}.tmp"
+        for name, array in ((PLAYER_ORDER_FILE, index.order),
+                            (PLAYER_OFFSETS_FILE, index.offsets)):
+            path = os.path.join(directory, name)
+            with open(path + suffix, 'wb') as f:
+                np.save(f, np.asarray(array))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + suffix, path)
+        path = os.path.join(directory, PLAYER_INDEX_FILE)
+        with open(path + suffix, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"count": index.count, "inode": index.inode}))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + suffix, path)
+    finally:
+        release_lock(lock_path)
+
+
+def _read_meta(directory: str) -> Optional[Dict[str, Any]]:
+    """Описание файлов записей или None, если его нет или формат другой."""
+    try:
+        with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("format") == FORMAT_VERSION else None
+
+
+def _write_meta(directory: str, meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Заменить описание атомарно; возвращает его в прочитанном из JSON виде."""
+    meta = _plain(meta)
+    path = os.path.join(directory, META_FILE)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(meta, ensure_ascii=False))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return meta
+
+
+def _encode_players(names: List[str]) -> bytes:
+    """Строки таблицы игроков."""
+    return "".join(json.dumps(name, ensure_ascii=False) + "\n" for name in names).encode('utf-8')
+
+
+def load_columns(directory: str) -> Optional[StatsColumns]:
+    """
+    Загрузить записи с подписью хранилища, для которой они сохранены.
+
+    Файл записей отображается в память (только чтение); байты после
+    последней записи из meta.json (прерванная дозапись) не читаются.
+
+    Args:
+        directory: Директория файлов.
+
+    Returns:
+        StatsColumns или None, если файлов нет или они повреждены.
+    """
+    meta = _read_meta(directory)
+    if meta is None:
+        return None
+    try:
+        count = meta["count"]
+        records_path = os.path.join(directory, RECORDS_FILE)
+        players_path = os.path.join(directory, PLAYERS_FILE)
+        # Файлы, заменённые другим процессом после записи описания
+        if [os.stat(records_path).st_ino, os.stat(players_path).st_ino] != meta["inodes"]:
+            return None
+        if os.path.getsize(records_path) < count * RECORD_DTYPE.itemsize:
+            return None
+        if count:
+            records = np.memmap(records_path, dtype=RECORD_DTYPE, mode="r",
+                                shape=(count,)).view(np.ndarray)
+        else:
+            records = np.empty(0, dtype=RECORD_DTYPE)
+        with open(players_path, 'rb') as f:
+            players = [json.loads(line) for line in f.read(meta["players_bytes"]).splitlines()]
+        if len(players) != meta["players"]:
+            return None
+        columns = StatsColumns(records, meta["difficulties"], players,
+                               _tuples(meta["signature"]))
+        columns.stored = meta
+        return columns
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _meta(directory: str, count: int, difficulties: List[str], players: List[str],
+          players_bytes: int, signature) -> Dict[str, Any]:
+    """Описание файлов: число записей, таблицы и подпись хранилища."""
+    return {
+        "format": FORMAT_VERSION,
+        "signature": signature,
+        "count": count,
+        "players": len(players),
+        "players_bytes": players_bytes,
+        "difficulties": difficulties,
+        "inodes": [os.stat(os.path.join(directory, name)).st_ino
+                   for name in (RECORDS_FILE, PLAYERS_FILE)],
+    }
+
+
+def save_columns(directory: str, columns: StatsColumns) -> StatsColumns:
+    """
+    Записать файлы заново (временные файлы и замена, описание последним).
+
+    Если файлы записывает другой процесс, запись пропускается.
+
+    Args:
+        directory: Директория файлов.
+        columns: Представление (с подписью хранилища).
+
+    Returns:
+        Представление, отображённое из записанных файлов, или columns.
+    """
+    os.makedirs(directory, exist_ok=True)
+    lock_path = os.path.join(directory, LOCK_FILE)
+    if not acquire_lock(lock_path):
+        return columns
+    try:
+        players = _encode_players(columns.players)
+        suffix = f".{os.getpid()}.tmp"
+        for name, write in ((RECORDS_FILE, lambda f: np.asarray(columns.records).tofile(f)),
+                            (PLAYERS_FILE, lambda f: f.write(players))):
+            path = os.path.join(directory, name)
+            with open(path + suffix, 'wb') as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + suffix, path)
+        _write_meta(directory, _meta(directory, len(columns), columns.difficulties,
+                                     columns.players, len(players), columns.signature))
+    finally:
+        release_lock(lock_path)
+    return load_columns(directory) or columns
+
+
+def append_columns(directory: str, columns: StatsColumns,
+                   records: Iterable[Dict[str, Any]], signature) -> StatsColumns:
+    """
+    Дописать записи в конец файлов, из которых загружено представление.
+
+    Если файлы с тех пор изменил другой процесс или их пишет он сейчас,
+    записи дописываются только в памяти.
+
+    Args:
+        directory: Директория файлов.
+        columns: Текущее представление.
+        records: Новые записи.
+        signature: Подпись хранилища после этих записей.
+
+    Returns:
+        Новое представление.
+    """
+    difficulties, players = list(columns.difficulties), list(columns.players)
+    rows = encode_records(records, difficulties, players)
+    lock_path = os.path.join(directory, LOCK_FILE)
+    if columns.stored is not None and acquire_lock(lock_path):
+        try:
+            stored = columns.stored
+            if _read_meta(directory) == stored:
+                with open(os.path.join(directory, RECORDS_FILE), 'r+b') as f:
+                    # Обрезать остаток прерванной дозаписи
+                    f.truncate(stored["count"] * RECORD_DTYPE.itemsize)
+                    f.seek(0, os.SEEK_END)
+                    rows.tofile(f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                with open(os.path.join(directory, PLAYERS_FILE), 'r+b') as f:
+                    f.truncate(stored["players_bytes"])
+                    f.seek(0, os.SEEK_END)
+                    f.write(_encode_players(players[len(columns.players):]))
+                    f.flush()
+                    os.fsync(f.fileno())
+                    players_bytes = f.tell()
+                _write_meta(directory, _meta(directory, stored["count"] + len(rows),
+                                             difficulties, players, players_bytes, signature))
+                loaded = load_columns(directory)
+                if loaded is not None:
+                    return loaded
+        except OSError:
+            pass
+        finally:
+            release_lock(lock_path)
+
+    # Файлы уже дополнил другой процесс
+    loaded = load_columns(directory)
+    if loaded is not None and loaded.signature == signature:
+        return loaded
+    return StatsColumns(np.concatenate([columns.records, rows]), difficulties, players,
+                        signature)
+
+
+def retag_columns(directory: str, columns: StatsColumns, signature) -> StatsColumns:
+    """
+    Отметить записи новой подписью хранилища без перезаписи файлов
+    (записи не менялись, например после сжатия журналов).
+
+    Args:
+        directory: Директория файлов.
+        columns: Представление, верное для новой подписи.
+        signature: Новая подпись хранилища.
+
+    Returns:
+        Представление с новой подписью.
+    """
+    lock_path = os.path.join(directory, LOCK_FILE)
+    if columns.stored is not None and acquire_lock(lock_path):
+        try:
+            if _read_meta(directory) == columns.stored:
+                columns.stored = _write_meta(directory, dict(columns.stored,
+                                                             signature=signature))
+        except OSError:
+            pass
+        finally:
+            release_lock(lock_path)
+    columns.signature = signature
+    return columns
@@ -0,0 +1,743 @@
+"""
+Индексы статистики, хранящиеся рядом с журналом.
+
+Индекс обновляется на каждое сохранение игры за время, не зависящее
+от размера истории, и сохраняется в JSON файл вместе с подписью
+хранилища, для которой он построен. Если подпись не совпадает (журнал
+менял другой процесс или индекс устарел), индекс перестраивается
+по всем записям.
+
+Скетчи квантилей и гистограммы распределения (ScoreDistribution)
+складываются (merge), поэтому распределения нескольких машин
+объединяются без исходных записей.
+"""
+
+import base64
+import hashlib
+import heapq
+import json
+import math
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    from config import (STATS_LEADERBOARD_SIZE, STATS_SKETCH_ACCURACY, STATS_HISTOGRAM_BINS,
+                        STATS_PLAYERS_PRECISION)
+except ImportError:
+    STATS_LEADERBOARD_SIZE = 100
+    STATS_PLAYERS_PRECISION = 12
+    STATS_SKETCH_ACCURACY = 0.01
+    STATS_HISTOGRAM_BINS = {"score": (100, 50), "game_duration": (30, 40)}
+
+
+class StatsIndex(ABC):
+    """Базовый класс индекса статистики."""
+
+    # Имя файла индекса (без расширения)
+    name = ""
+
+    @abstractmethod
+    def add(self, record: Dict[str, Any]) -> None:
+        """Учесть новую запись."""
+
+    @abstractmethod
+    def to_dict(self) -> Dict[str, Any]:
+        """Представление для сохранения в JSON."""
+
+    @classmethod
+    @abstractmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StatsIndex":
+        """Восстановить индекс из сохранённого представления."""
+
+    def comparable(self) -> Dict[str, Any]:
+        """
+        Представление для сверки с индексом, построенным заново.
+
+        Поля, зависящие от порядка добавления записей, но не от их
+        набора, здесь должны быть приведены к общему виду.
+        """
+        return self.to_dict()
+
+    @classmethod
+    def build(cls, records: Iterable[Dict[str, Any]]) -> "StatsIndex":
+        """Построить индекс по всем записям."""
+        index = cls()
+        for record in records:
+            index.add(record)
+        return index
+
+
+# Начало отсчёта для числового ключа времени записи
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _time_rank(timestamp: Any) -> float:
+    """
+    Время записи в секундах для сравнения в куче.
+
+    Часовой пояс не учитывается, чтобы порядок совпадал со сравнением
+    ISO строк (как ORDER BY timestamp в SQLite). Некорректное время
+    считается самым ранним.
+    """
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return 0.0
+    return (moment.replace(tzinfo=None) - _EPOCH).total_seconds()
+
+
+class Leaderboard(StatsIndex):
+    """
+    Лучшие N игр: общий рейтинг и рейтинги по сложностям.
+
+    Каждый рейтинг - куча минимумов из N элементов (счёт, -время,
+    -номер записи, запись): в корне худшая из лучших игр, поэтому новая
+    игра проверяется и вставляется за O(log N). При равном счёте выше
+    стоит более ранняя по времени игра, как в SQLite (score DESC,
+    timestamp), поэтому порядок не зависит от порядка дозаписи.
+    """
+
+    name = "leaderboard"
+    OVERALL = "all"
+
+    def __init__(self, size: int = STATS_LEADERBOARD_SIZE):
+        """
+        Инициализация рейтинга.
+
+        Args:
+            size: Количество хранимых лучших игр в каждом рейтинге.
+        """
+        self.size = size
+        self.count = 0
+        self.heaps: Dict[str, List[list]] = {}
+
+    def add(self, record: Dict[str, Any]) -> None:
+        seq = self.count
+        self.count += 1
+        for key in (self.OVERALL, record["difficulty"]):
+            self._push(key, self._entry(seq, record))
+
+    @staticmethod
+    def _entry(seq: int, record: Dict[str, Any]) -> list:
+        """Элемент кучи для записи с номером seq."""
+        return [record["score"], -_time_rank(record.get("timestamp")), -seq, record]
+
+    def _push(self, key: str, entry: list) -> None:
+        """Добавить игру в рейтинг, если она входит в лучшие N."""
+        heap = self.heaps.setdefault(key, [])
+        if len(heap) < self.size:
+            heapq.heappush(heap, entry)
+        elif entry[:3] > heap[0][:3]:
+            heapq.heapreplace(heap, entry)
+
+    def top(self, limit: int, difficulty: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Лучшие игры по убыванию счёта.
+
+        Args:
+            limit: Количество игр (не больше size).
+            difficulty: Сложность или None для общего рейтинга.
+
+        Returns:
+            Список записей.
+        """
+        heap = self.heaps.get(difficulty or self.OVERALL, [])
+        return [entry[3] for entry in heapq.nlargest(limit, heap, key=lambda e: e[:3])]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "count": self.count,
+            "heaps": {
+                key: [[-entry[2], entry[3]] for entry in heap]
+                for key, heap in self.heaps.items()
+            },
+        }
+
+    def comparable(self) -> Dict[str, Any]:
+        # Устройство куч зависит от порядка добавления, сверяются рейтинги
+        return {
+            "size": self.size,
+            "count": self.count,
+            "heaps": {key: self.top(self.size, key) for key in sorted(self.heaps)},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Leaderboard":
+        index = cls(data["size"])
+        index.count = data["count"]
+        for key, entries in data["heaps"].items():
+            heap = [cls._entry(seq, record) for seq, record in entries]
+            heapq.heapify(heap)
+            index.heaps[key] = heap
+        return index
+
+
+class DistinctCounter:
+    """
+    Оценка количества различных значений (HyperLogLog).
+
+    Значение хешируется в 64 бита: первые p бит выбирают регистр,
+    в регистре хранится наибольший номер первой единицы в остальных
+    битах. Размер - 2^p байт при любом количестве значений, погрешность
+    около 1.04 / sqrt(2^p). Пока значений не больше EXACT_LIMIT, они
+    хранятся и явно, и количество точное.
+    """
+
+    # Значений, которые хранятся явно для точного подсчёта
+    EXACT_LIMIT = 256
+
+    def __init__(self, precision: int = STATS_PLAYERS_PRECISION):
+        """
+        Инициализация пустого счётчика.
+
+        Args:
+            precision: Бит номера регистра (регистров 2^precision).
+        """
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+        self.values: Optional[set] = set()
+
+    def add(self, value: str) -> None:
+        """Учесть значение."""
+        if self.values is not None:
+            self.values.add(value)
+            if len(self.values) > self.EXACT_LIMIT:
+                self.values = None
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        bits = 64 - self.precision
+        register = hashed >> bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[register]:
+            self.registers[register] = rank
+
+    def count(self) -> int:
+        """Оценка количества различных значений."""
+        if self.values is not None:
+            return len(self.values)
+        size = len(self.registers)
+        empty = self.registers.count(0)
+        if empty == size:
+            return 0
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -rank for rank in self.registers)
+        if estimate <= 2.5 * size and empty:
+            estimate = size * math.log(size / empty)
+        return round(estimate)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"precision": self.precision,
+                "registers": base64.b64encode(bytes(self.registers)).decode("ascii"),
+                "values": None if self.values is None else sorted(self.values)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DistinctCounter":
+        counter = cls(data["precision"])
+        registers = base64.b64decode(data["registers"])
+        if len(registers) != len(counter.registers):
+            raise ValueError("Размер регистров не соответствует точности")
+        counter.registers[:] = registers
+        counter.values = None if data["values"] is None else set(data["values"])
+        return counter
+
+
+class RunningAggregates(StatsIndex):
+    """
+    Накопительные агрегаты для общей статистики.
+
+    Каждая игра обновляет счётчики за O(1): количество игр и побед,
+    сумму, минимум и максимум счёта, сумму длительности и оценку
+    количества уникальных игроков (DistinctCounter). Размер агрегатов
+    не зависит ни от числа игр, ни от числа игроков.
+    """
+
+    name = "aggregates"
+
+    def __init__(self):
+        """Инициализация пустых агрегатов."""
+        self.count = 0
+        self.wins = 0
+        self.score_sum = 0
+        self.score_min: Optional[int] = None
+        self.score_max: Optional[int] = None
+        self.duration_sum = 0.0
+        self.players = DistinctCounter()
+
+    def add(self, record: Dict[str, Any]) -> None:
+        score = record["score"]
+        self.count += 1
+        self.wins += 1 if record["won"] else 0
+        self.score_sum += score
+        self.score_min = score if self.score_min is None else min(self.score_min, score)
+        self.score_max = score if self.score_max is None else max(self.score_max, score)
+        self.duration_sum += record["game_duration"]
+        self.players.add(record["player_name"])
+
+    def summary(self) -> Optional[Dict[str, Any]]:
+        """
+        Общая статистика в формате StatsManager.get_statistics_summary.
+
+        Returns:
+            Словарь или None, если игр нет.
+        """
+        total_games = self.count
+        if not total_games:
+            return None
+
+        return {
+            "total_games": total_games,
+            "wins": self.wins,
+            "losses": total_games - self.wins,
+            "win_rate": round((self.wins / total_games) * 100, 2),
+            "average_score": round(self.score_sum / total_games, 2),
+            "max_score": self.score_max,
+            "min_score": self.score_min,
+            "average_duration": round(self.duration_sum / total_games, 2),
+            "unique_players": self.players.count()
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "wins": self.wins,
+            "score_sum": self.score_sum,
+            "score_min": self.score_min,
+            "score_max": self.score_max,
+            "duration_sum": self.duration_sum,
+            "players": self.players.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningAggregates":
+        index = cls()
+        index.count = data["count"]
+        index.wins = data["wins"]
+        index.score_sum = data["score_sum"]
+        index.score_min = data["score_min"]
+        index.score_max = data["score_max"]
+        index.duration_sum = data["duration_sum"]
+        index.players = DistinctCounter.from_dict(data["players"])
+        return index
+
+
+class QuantileSketch:
+    """
+    Скетч квантилей с логарифмическими интервалами (как DDSketch).
+
+    Значение v > 0 попадает в интервал k = ceil(log_gamma(v)), где
+    gamma = (1 + a) / (1 - a): любой квантиль оценивается с относительной
+    погрешностью не больше a. Число интервалов зависит только от
+    разброса значений (логарифмически), а не от числа игр. Скетчи
+    с одинаковой точностью складываются счётчиками интервалов.
+    """
+
+    def __init__(self, accuracy: float = STATS_SKETCH_ACCURACY):
+        """
+        Инициализация пустого скетча.
+
+        Args:
+            accuracy: Относительная погрешность квантилей (0 < a < 1).
+        """
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _key(self, value: float) -> int:
+        """Номер интервала положительного значения."""
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float) -> None:
+        """Учесть значение (значения <= 0 считаются отдельно)."""
+        if value > 0:
+            key = self._key(value)
+            self.buckets[key] = self.buckets.get(key, 0) + 1
+        else:
+            self.zero_count += 1
+        self.count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Прибавить к скетчу другой скетч той же точности."""
+        if other.accuracy != self.accuracy:
+            raise ValueError(f"Несовместимые скетчи: точность {self.accuracy} "
+                             f"и {other.accuracy}")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Оценка квантиля.
+
+        Args:
+            q: Уровень от 0 до 1 (0.5 - медиана).
+
+        Returns:
+            Значение или None, если скетч пуст.
+        """
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return max(self.min, min(0.0, self.max))
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                # Середина интервала (gamma^(k-1), gamma^k] в относительной мере
+                estimate = 2 * self.gamma ** key / (self.gamma + 1)
+                return max(self.min, min(estimate, self.max))
+        return self.max
+
+    def rank(self, value: float) -> Optional[float]:
+        """
+        Процентильный ранг значения.
+
+        Доля значений меньше value плюс половина значений того же
+        интервала, в процентах.
+
+        Args:
+            value: Значение.
+
+        Returns:
+            Ранг от 0 до 100 или None, если скетч пуст.
+        """
+        if not self.count:
+            return None
+        if value > self.max:
+            return 100.0
+        if value < self.min:
+            return 0.0
+        if value <= 0:
+            below, same = 0, self.zero_count
+        else:
+            key = self._key(value)
+            below = self.zero_count + sum(count for bucket, count in self.buckets.items()
+                                          if bucket < key)
+            same = self.buckets.get(key, 0)
+        return round((below + same / 2) / self.count * 100, 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "accuracy": self.accuracy,
+            "buckets": {str(key): count for key, count in sorted(self.buckets.items())},
+            "zero_count": self.zero_count,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(data["accuracy"])
+        sketch.buckets = {int(key): count for key, count in data["buckets"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = sketch.zero_count + sum(sketch.buckets.values())
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        return sketch
+
+
+class Histogram:
+    """
+    Гистограмма с интервалами фиксированной ширины.
+
+    Последний интервал открыт сверху и собирает все большие значения.
+    Гистограммы с одинаковыми интервалами складываются.
+    """
+
+    def __init__(self, width: float, bins: int):
+        """
+        Инициализация пустой гистограммы.
+
+        Args:
+            width: Ширина интервала.
+            bins: Количество интервалов.
+        """
+        self.width = width
+        self.counts = [0] * bins
+
+    def add(self, value: float) -> None:
+        """Учесть значение."""
+        self.counts[max(0, min(int(value // self.width), len(self.counts) - 1))] += 1
+
+    def merge(self, other: "Histogram") -> None:
+        """Прибавить к гистограмме другую с теми же интервалами."""
+        if (other.width, len(other.counts)) != (self.width, len(self.counts)):
+            raise ValueError(f"Несовместимые гистограммы: {len(self.counts)} x {self.width} "
+                             f"и {len(other.counts)} x {other.width}")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def intervals(self) -> List[Dict[str, Any]]:
+        """
+        Интервалы гистограммы.
+
+        Returns:
+            Список {"from", "to" (None у последнего), "count"}.
+        """
+        last = len(self.counts) - 1
+        return [
+            {"from": i * self.width, "to": None if i == last else (i + 1) * self.width,
+             "count": count}
+            for i, count in enumerate(self.counts)
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"width": self.width, "counts": self.counts}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Histogram":
+        histogram = cls(data["width"], len(data["counts"]))
+        histogram.counts = list(data["counts"])
+        return histogram
+
+
+class ScoreDistribution(StatsIndex):
+    """
+    Распределения счёта и длительности: общее и по сложностям.
+
+    Для каждого поля из STATS_HISTOGRAM_BINS хранится скетч квантилей
+    и гистограмма. Каждая игра обновляет их за O(1), а процентильный
+    ранг, квантили и гистограмма вычисляются по интервалам, без записей.
+    Распределения разных машин объединяются методом merge.
+    """
+
+    name = "distribution"
+    OVERALL = "all"
+
+    def __init__(self, accuracy: float = STATS_SKETCH_ACCURACY,
+                 bins: Optional[Dict[str, Tuple[float, int]]] = None):
+        """
+        Инициализация пустого распределения.
+
+        Args:
+            accuracy: Относительная погрешность скетчей.
+            bins: Поле -> (ширина интервала, количество интервалов)
+                (по умолчанию - STATS_HISTOGRAM_BINS).
+        """
+        self.accuracy = accuracy
+        self.bins = {field: tuple(layout)
+                     for field, layout in (bins or STATS_HISTOGRAM_BINS).items()}
+        self.sketches: Dict[str, Dict[str, QuantileSketch]] = {}
+        self.histograms: Dict[str, Dict[str, Histogram]] = {}
+
+    def _group(self, key: str) -> Tuple[Dict[str, QuantileSketch], Dict[str, Histogram]]:
+        """Скетчи и гистограммы группы (создаются при первом обращении)."""
+        if key not in self.sketches:
+            self.sketches[key] = {field: QuantileSketch(self.accuracy) for field in self.bins}
+            self.histograms[key] = {field: Histogram(width, count)
+                                    for field, (width, count) in self.bins.items()}
+        return self.sketches[key], self.histograms[key]
+
+    def add(self, record: Dict[str, Any]) -> None:
+        for key in (self.OVERALL, record["difficulty"]):
+            sketches, histograms = self._group(key)
+            for field in self.bins:
+                sketches[field].add(record[field])
+                histograms[field].add(record[field])
+
+    def merge(self, other: "ScoreDistribution") -> "ScoreDistribution":
+        """
+        Прибавить распределение другой машины или другого журнала.
+
+        Args:
+            other: Распределение с той же точностью и интервалами.
+
+        Returns:
+            Это распределение.
+        """
+        for key, other_sketches in other.sketches.items():
+            sketches, histograms = self._group(key)
+            for field, sketch in other_sketches.items():
+                if field not in sketches:
+                    raise ValueError(f"Поле {field} отсутствует в распределении")
+                sketches[field].merge(sketch)
+                histograms[field].merge(other.histograms[key][field])
+        return self
+
+    def _sketch(self, field: str, difficulty: Optional[str]) -> Optional[QuantileSketch]:
+        """Скетч поля для сложности или None, если игр нет."""
+        return self.sketches.get(difficulty or self.OVERALL, {}).get(field)
+
+    def percentile_rank(self, value: float, difficulty: Optional[str] = None,
+                        field: str = "score") -> Optional[float]:
+        """
+        Процентильный ранг значения (какой процент игр хуже).
+
+        Args:
+            value: Значение (например, счёт игрока).
+            difficulty: Сложность или None для всех игр.
+            field: score или game_duration.
+
+        Returns:
+            Ранг от 0 до 100 или None, если игр нет.
+        """
+        sketch = self._sketch(field, difficulty)
+        return sketch.rank(value) if sketch else None
+
+    def quantiles(self, levels: Sequence[float] = (0.5, 0.9, 0.99),
+                  difficulty: Optional[str] = None,
+                  field: str = "score") -> Optional[Dict[float, float]]:
+        """
+        Квантили поля.
+
+        Args:
+            levels: Уровни от 0 до 1.
+            difficulty: Сложность или None для всех игр.
+            field: score или game_duration.
+
+        Returns:
+            Словарь {уровень: значение} или None, если игр нет.
+        """
+        sketch = self._sketch(field, difficulty)
+        if not sketch:
+            return None
+        return {level: sketch.quantile(level) for level in levels}
+
+    def histogram(self, difficulty: Optional[str] = None,
+                  field: str = "score") -> List[Dict[str, Any]]:
+        """
+        Гистограмма поля (Histogram.intervals).
+
+        Args:
+            difficulty: Сложность или None для всех игр.
+            field: score или game_duration.
+
+        Returns:
+            Список интервалов; пустой, если игр нет.
+        """
+        histogram = self.histograms.get(difficulty or self.OVERALL, {}).get(field)
+        return histogram.intervals() if histogram else []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "accuracy": self.accuracy,
+            "bins": self.bins,
+            "groups": {
+                key: {
+                    field: {"sketch": sketch.to_dict(),
+                            "histogram": self.histograms[key][field].to_dict()}
+                    for field, sketch in sketches.items()
+                }
+                for key, sketches in self.sketches.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ScoreDistribution":
+        index = cls(data["accuracy"], data["bins"])
+        for key, fields in data["groups"].items():
+            index.sketches[key] = {field: QuantileSketch.from_dict(value["sketch"])
+                                   for field, value in fields.items()}
+            index.histograms[key] = {field: Histogram.from_dict(value["histogram"])
+                                     for field, value in fields.items()}
+        return index
+
+
+def _plain(signature):
+    """Подпись в том виде, в каком она читается из JSON (кортежи - списки)."""
+    return json.loads(json.dumps(signature))
+
+
+def _tuples(value):
+    """Подпись, прочитанная из JSON, в исходном виде (списки - кортежи)."""
+    if isinstance(value, list):
+        return tuple(_tuples(item) for item in value)
+    return value
+
+
+def load_index(path: str, index_class, signature) -> Optional[StatsIndex]:
+    """
+    Загрузить индекс, если он построен для текущей подписи хранилища.
+
+    Args:
+        path: Путь к файлу индекса.
+        index_class: Класс индекса.
+        signature: Текущая подпись хранилища.
+
+    Returns:
+        Индекс или None, если файла нет, он повреждён или устарел.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("signature") != _plain(signature):
+            return None
+        return index_class.from_dict(data["index"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def load_stale_index(path: str, index_class) -> Optional[Tuple[Any, StatsIndex]]:
+    """
+    Загрузить индекс вместе с подписью, для которой он сохранён.
+
+    Индексы сохраняются на диск не после каждой игры, поэтому файл
+    может отставать от журнала; такой индекс дополняется записями,
+    дописанными после его подписи (changes_since хранилища).
+
+    Args:
+        path: Путь к файлу индекса.
+        index_class: Класс индекса.
+
+    Returns:
+        (подпись, индекс) или None, если файла нет или он повреждён.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return _tuples(data["signature"]), index_class.from_dict(data["index"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def read_index(path: str, index_class) -> StatsIndex:
+    """
+    Прочитать файл индекса без проверки подписи (например, индекс
+    другой машины для объединения).
+
+    Args:
+        path: Путь к файлу индекса.
+        index_class: Класс индекса.
+
+    Returns:
+        Индекс.
+
+    Raises:
+        OSError, ValueError, KeyError: Файл недоступен или повреждён.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return index_class.from_dict(json.load(f)["index"])
+
+
+def save_index(path: str, index: StatsIndex, signature) -> None:
+    """
+    Сохранить индекс атомарно (временный файл, fsync и переименование).
+
+    Args:
+        path: Путь к файлу индекса.
+        index: Индекс.
+        signature: Подпись хранилища, которой соответствует индекс.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        # dumps (в отличие от dump в файл) использует быстрый кодировщик на C
+        f.write(json.dumps({"signature": signature, "index": index.to_dict()},
+                           ensure_ascii=False))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
@@ -1,36 +1,352 @@
 """
 Модуль для управления статистикой игры Breakout.
-Сохраняет результаты в JSON формат и предоставляет методы для анализа.
+Сохраняет результаты в журналы JSON Lines (сегменты процессов и разделы
+по месяцам) или базу SQLite (STATS_BACKEND) и предоставляет методы
+для анализа.
 """
 
-import json
+import heapq
+import itertools
+import math
 import os
+import shutil
+import threading
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Tuple, Union
+
+from core.stats_index import (StatsIndex, Leaderboard, RunningAggregates, ScoreDistribution,
+                              load_index, load_stale_index, read_index, save_index)
+from core.stats_storage import create_stats_storage, read_stats_file
+from core.stats_columns import (StatsColumns, PlayerIndex, COLUMNS_AVAILABLE, load_columns,
+                                save_columns, append_columns, retag_columns,
+                                load_player_index, save_player_index)
 
 # Импорт из config
 try:
-    from config import STATS_FILE, STATS_DIR
+    from config import (STATS_DIR, STATS_INDEX_DIR, STATS_RETENTION_MONTHS, STATS_COLUMNS_DIR,
+                        STATS_PLAYER_INDEX_TAIL, STATS_INDEX_SAVE_EVERY)
 except ImportError:
-    STATS_FILE = "game_stats.json"
     STATS_DIR = "stats"
+    STATS_INDEX_DIR = "index"
+    STATS_COLUMNS_DIR = "columns"
+    STATS_RETENTION_MONTHS = None
+    STATS_PLAYER_INDEX_TAIL = 4096
+    STATS_INDEX_SAVE_EVERY = 32
+
+# Индексы, поддерживаемые для хранилищ без собственных индексов
+INDEX_CLASSES = (Leaderboard, RunningAggregates, ScoreDistribution)
+
+# Ключи сортировки запроса -> поле записи
+QUERY_SORT_KEYS = {
+    "time": "timestamp",
+    "score": "score",
+    "duration": "game_duration",
+    "level": "level_reached",
+    "player": "player_name",
+}
+
+
+def _iso(moment: Optional[Union[datetime, str]]) -> Optional[str]:
+    """Момент времени в виде ISO строки для сравнения с записями."""
+    if isinstance(moment, datetime):
+        return moment.isoformat()
+    return moment
+
+
+def _same_value(stored: Any, fresh: Any) -> bool:
+    """
+    Совпадение значений индекса с учётом округления сумм.
+
+    Суммы с плавающей точкой зависят от порядка сложения, поэтому
+    сравниваются приближённо; остальные значения - точно.
+    """
+    if isinstance(fresh, float) or isinstance(stored, float):
+        return (isinstance(stored, (int, float)) and isinstance(fresh, (int, float))
+                and math.isclose(stored, fresh, rel_tol=1e-9, abs_tol=1e-9))
+    if isinstance(fresh, dict) and isinstance(stored, dict):
+        return (stored.keys() == fresh.keys()
+                and all(_same_value(stored[key], value) for key, value in fresh.items()))
+    if isinstance(fresh, list) and isinstance(stored, list):
+        return (len(stored) == len(fresh)
+                and all(_same_value(a, b) for a, b in zip(stored, fresh)))
+    return stored == fresh
+
+
+def retention_start(months: int, now: Optional[datetime] = None) -> str:
+    """
+    Первый сохраняемый месяц при хранении последних months месяцев.
+    
+    Args:
+        months: Количество хранимых месяцев, включая текущий.
+        now: Текущий момент (по умолчанию - сейчас).
+    
+    Returns:
+        Месяц в формате ГГГГ-ММ.
+    """
+    now = now or datetime.now()
+    index = now.year * 12 + now.month - 1 - (months - 1)
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
 
 
 class StatsManager:
     """Класс для управления статистикой игр."""
     
-    def __init__(self):
-        """Инициализация менеджера статистики."""
+    def __init__(self, stats_dir: str = STATS_DIR, backend: Optional[str] = None):
+        """
+        Инициализация менеджера статистики.
+        
+        Args:
+            stats_dir: Директория для файлов статистики.
+            backend: Хранилище jsonl или sqlite (по умолчанию - STATS_BACKEND).
+        """
+        self.stats_dir = stats_dir
         self._ensure_stats_dir()
+        self.storage = create_stats_storage(stats_dir, backend)
+        
+        # Загруженные индексы и подпись хранилища, для которой они верны
+        self._indexes: Dict[str, StatsIndex] = {}
+        self._index_signature = None
+        # Игр, сохранённых после последней записи индексов на диск
+        self._unsaved = 0
+        # Игры, ещё не дописанные в двоичные записи:
+        # (подпись записей, подпись после игр, игры)
+        self._staged: Optional[Tuple[Any, Any, List[Dict[str, Any]]]] = None
+        
+        # Столбцовое представление истории (NumPy), строится по запросу
+        self._columns: Optional[StatsColumns] = None
+        self._player_index: Optional[PlayerIndex] = None
+        
+        # Записи может сохранять фоновый поток (StatsWriter)
+        self._lock = threading.RLock()
     
     def _ensure_stats_dir(self) -> None:
         """Создать директорию для статистики если её нет."""
-        if not os.path.exists(STATS_DIR):
-            os.makedirs(STATS_DIR)
+        if not os.path.exists(self.stats_dir):
+            os.makedirs(self.stats_dir)
     
     def _get_stats_path(self) -> str:
-        """Получить полный путь к файлу статистики."""
-        return os.path.join(STATS_DIR, STATS_FILE)
+        """Получить полный путь к файлу, в который сохраняются игры."""
+        return self.storage.path
+    
+    def _index_path(self, index_class) -> str:
+        """Получить путь к файлу индекса."""
+        return os.path.join(self.stats_dir, STATS_INDEX_DIR, f"{index_class.name}.json")
+    
+    def _get_index(self, index_class) -> StatsIndex:
+        """
+        Получить индекс, соответствующий текущим данным.
+        
+        Индекс берётся из памяти или файла, если подпись хранилища
+        не изменилась. Записи, дописанные другими процессами, добавляются
+        к индексам в памяти; при других изменениях индекс
+        перестраивается по всем записям.
+        """
+        with self._lock:
+            return self._get_index_locked(index_class)
+    
+    def _refresh_indexes(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Привести индексы в памяти к текущим данным хранилища.
+        
+        Вызывается под self._lock.
+        
+        Returns:
+            Записи, которыми дополнены индексы, или None, если индексы
+            сброшены и будут построены заново.
+        """
+        signature = self.storage.signature()
+        if signature == self._index_signature:
+            return []
+        
+        changes = None
+        if self._indexes:
+            changes = self.storage.changes_since(self._index_signature)
+        if changes is None:
+            self._indexes.clear()
+            self._unsaved = 0
+            self._index_signature = signature
+            return None
+        
+        self._index_signature, records = changes
+        for index in self._indexes.values():
+            for record in records:
+                index.add(record)
+        return records
+    
+    def _get_index_locked(self, index_class) -> StatsIndex:
+        """Получить индекс; вызывается под self._lock."""
+        self._refresh_indexes()
+        
+        index = self._indexes.get(index_class.name)
+        if index is None:
+            signature = self._index_signature
+            path = self._index_path(index_class)
+            index = load_index(path, index_class, signature)
+            if index is None:
+                index = self._catch_up_index(path, index_class, signature)
+            if index is None:
+                index = index_class.build(self.iter_stats())
+                # Индекс, построенный во время записи другим процессом,
+                # не сохраняется: его подпись неизвестна
+                if self.storage.signature() != signature:
+                    self._indexes.clear()
+                    self._index_signature = None
+                    return index
+                save_index(path, index, signature)
+            self._indexes[index_class.name] = index
+        return index
+    
+    def _catch_up_index(self, path: str, index_class, signature) -> Optional[StatsIndex]:
+        """
+        Дополнить отстающий файл индекса записями, дописанными после него.
+        
+        Вызывается под self._lock.
+        
+        Returns:
+            Индекс для подписи signature (сохраняется на диск) или None,
+            если файла нет или записи менялись не только дозаписью.
+        """
+        stale = load_stale_index(path, index_class)
+        if stale is None:
+            return None
+        changes = self.storage.changes_since(stale[0])
+        if changes is None or changes[0] != signature:
+            return None
+        index = stale[1]
+        for record in changes[1]:
+            index.add(record)
+        save_index(path, index, signature)
+        return index
+    
+    def _save_indexes_locked(self) -> None:
+        """Записать индексы из памяти на диск; вызывается под self._lock."""
+        for index in self._indexes.values():
+            save_index(self._index_path(type(index)), index, self._index_signature)
+        self._unsaved = 0
+    
+    def _flush_locked(self) -> None:
+        """Записать индексы и дописать двоичные записи; вызывается под self._lock."""
+        self._save_indexes_locked()
+        # Двоичные записи дополняются, если они уже ведутся
+        if COLUMNS_AVAILABLE:
+            self._get_columns_locked(build=False)
+    
+    def flush_indexes(self) -> None:
+        """
+        Записать на диск индексы, дополненные после последней записи.
+        
+        Индексы и двоичные записи обновляются на диске раз
+        в STATS_INDEX_SAVE_EVERY игр; перед выходом (StatsWriter.close)
+        записываются оставшиеся. Без этого следующий запуск дополнит
+        их по журналу.
+        """
+        try:
+            with self._lock:
+                if self._unsaved:
+                    self._flush_locked()
+        except OSError as e:
+            print(f"Ошибка сохранения индексов статистики: {e}")
+    
+    def rebuild_indexes(self) -> List[str]:
+        """
+        Перестроить все индексы по записям хранилища.
+        
+        Returns:
+            Имена перестроенных индексов.
+        """
+        if self.storage.indexed:
+            return []
+        
+        with self._lock:
+            signature = self.storage.signature()
+            self._indexes.clear()
+            self._index_signature = signature
+            self._unsaved = 0
+            for index_class in INDEX_CLASSES:
+                index = index_class.build(self.iter_stats())
+                save_index(self._index_path(index_class), index, signature)
+                self._indexes[index_class.name] = index
+            
+            names = [index_class.name for index_class in INDEX_CLASSES]
+            if COLUMNS_AVAILABLE:
+                self._columns = None
+                self._player_index = None
+                shutil.rmtree(self._columns_dir(), ignore_errors=True)
+                self._get_columns_locked()
+                names.append(STATS_COLUMNS_DIR)
+        return names
+    
+    def verify_indexes(self) -> Dict[str, List[str]]:
+        """
+        Сверить сохранённые индексы с построенными заново по записям.
+        
+        Отстающий файл индекса сначала дополняется дописанными записями,
+        как при обычном запросе (например, после импорта).
+        
+        Returns:
+            Словарь {имя индекса: список расхождений}; пустой список -
+            индекс верен.
+        """
+        if self.storage.indexed:
+            return {}
+        
+        self.flush_indexes()
+        report = {}
+        for index_class in INDEX_CLASSES:
+            path = self._index_path(index_class)
+            with self._lock:
+                signature = self.storage.signature()
+                stored = load_index(path, index_class, signature)
+                if stored is None:
+                    stored = self._catch_up_index(path, index_class, signature)
+            fresh = index_class.build(self.iter_stats()).comparable()
+            if stored is None:
+                report[index_class.name] = ["индекс отсутствует или устарел"]
+                continue
+            stored = stored.comparable()
+            problems = []
+            for key, value in fresh.items():
+                if _same_value(stored.get(key), value):
+                    continue
+                if isinstance(value, (dict, list)):
+                    problems.append(key)
+                else:
+                    problems.append(f"{key}: {stored.get(key)!r}, по записям {value!r}")
+            report[index_class.name] = problems
+        return report
+    
+    def make_record(
+        self,
+        player_name: str,
+        score: int,
+        level_reached: int,
+        difficulty: str,
+        game_duration: float,
+        win: bool
+    ) -> Dict[str, Any]:
+        """
+        Создать запись об игре (время - момент вызова).
+        
+        Args:
+            player_name: Имя игрока.
+            score: Финальный счет.
+            level_reached: Достигнутый уровень.
+            difficulty: Сложность (easy/medium/hard).
+            game_duration: Длительность игры в секундах.
+            win: True если игрок победил.
+        
+        Returns:
+            Словарь записи.
+        """
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "player_name": player_name,
+            "score": score,
+            "level_reached": level_reached,
+            "difficulty": difficulty,
+            "game_duration": round(game_duration, 2),
+            "won": win
+        }
     
     def save_game_result(
         self,
@@ -52,35 +368,48 @@ class StatsManager:
             game_duration: Длительность игры в секундах.
             win: True если игрок победил.
         
+        Returns:
+            True если сохранение успешно.
+        """
+        return self.append_record(self.make_record(
+            player_name, score, level_reached, difficulty, game_duration, win
+        ))
+    
+    def append_record(self, game_record: Dict[str, Any]) -> bool:
+        """
+        Сохранить готовую запись об игре и обновить индексы.
+        
+        Безопасно для вызова из фонового потока.
+        
+        Args:
+            game_record: Запись (make_record).
+        
         Returns:
             True если сохранение успешно.
         """
         try:
-            stats_path = self._get_stats_path()
-            
-            # Загрузить существующую статистику
-            if os.path.exists(stats_path):
-                with open(stats_path, 'r', encoding='utf-8') as f:
-                    all_stats = json.load(f)
-            else:
-                all_stats = []
-            
-            # Создать запись об игре
-            game_record = {
-                "timestamp": datetime.now().isoformat(),
-                "player_name": player_name,
-                "score": score,
-                "level_reached": level_reached,
-                "difficulty": difficulty,
-                "game_duration": round(game_duration, 2),
-                "won": win
-            }
-            
-            all_stats.append(game_record)
-            
-            # Сохранить обновленную статистику
-            with open(stats_path, 'w', encoding='utf-8') as f:
-                json.dump(all_stats, f, ensure_ascii=False, indent=2)
+            with self._lock:
+                if self.storage.indexed:
+                    self.storage.append(game_record)
+                    return True
+                
+                # Индексы проверяются до записи, чтобы дополнить их только новыми играми
+                for index_class in INDEX_CLASSES:
+                    self._get_index_locked(index_class)
+                
+                # Дописать одну строку в журнал
+                self.storage.append(game_record)
+                
+                # Индексы дополняются дописанными строками: этой игрой и играми
+                # других процессов, сохранёнными одновременно с ней.
+                # На диск они пишутся раз в STATS_INDEX_SAVE_EVERY игр
+                before = self._index_signature
+                added = self._refresh_indexes()
+                if COLUMNS_AVAILABLE:
+                    self._stage_columns(before, added)
+                self._unsaved += 1
+                if self._unsaved >= STATS_INDEX_SAVE_EVERY:
+                    self._flush_locked()
             
             return True
             
@@ -88,6 +417,72 @@ class StatsManager:
             print(f"Ошибка сохранения статистики: {e}")
             return False
     
+    def compact_stats(self, force: bool = False) -> int:
+        """
+        Сжать хранилище: разложить сегменты процессов по разделам-месяцам.
+        
+        Записи не меняются, поэтому актуальные индексы сохраняются
+        с новой подписью хранилища без перестроения. После сжатия
+        удаляются игры старше STATS_RETENTION_MONTHS месяцев.
+        
+        Args:
+            force: Слить и сегмент этого процесса независимо от размера.
+        
+        Returns:
+            Количество слитых журналов.
+        """
+        try:
+            with self._lock:
+                columns = None
+                if not self.storage.indexed:
+                    for index_class in INDEX_CLASSES:
+                        self._get_index_locked(index_class)
+                    if COLUMNS_AVAILABLE:
+                        columns = self._get_columns_locked(build=False)
+                before = self.storage.signature()
+                valid = bool(self._indexes) and before == self._index_signature
+                folded = self.storage.compact(force)
+                if folded:
+                    signature = self.storage.signature()
+                    if valid:
+                        self._index_signature = signature
+                        self._save_indexes_locked()
+                    if columns is not None and columns.signature == before:
+                        self._columns = retag_columns(self._columns_dir(), columns, signature)
+        except OSError as e:
+            print(f"Ошибка сжатия статистики: {e}")
+            return 0
+        
+        if folded or force:
+            self.apply_retention()
+        return folded
+    
+    def apply_retention(self, months: Optional[int] = STATS_RETENTION_MONTHS) -> int:
+        """
+        Удалить игры старше последних months месяцев (разделы целиком).
+        
+        Args:
+            months: Количество хранимых месяцев, включая текущий
+                (None - хранить всё).
+        
+        Returns:
+            Количество удалённых разделов.
+        """
+        if not months:
+            return 0
+        try:
+            with self._lock:
+                dropped = self.storage.drop_partitions(retention_start(months))
+                if dropped:
+                    # Записи удалены: индексы перестраиваются при следующем запросе
+                    self._indexes.clear()
+                    self._index_signature = None
+                    self._unsaved = 0
+            return dropped
+        except OSError as e:
+            print(f"Ошибка удаления старой статистики: {e}")
+            return 0
+    
     def load_all_stats(self) -> List[Dict[str, Any]]:
         """
         Загрузить всю статистику.
@@ -96,71 +491,446 @@ class StatsManager:
             Список всех игровых записей.
         """
         try:
-            stats_path = self._get_stats_path()
-            if os.path.exists(stats_path):
-                with open(stats_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            return list(self.storage.iter_records())
         except Exception as e:
             print(f"Ошибка загрузки статистики: {e}")
         
         return []
     
-    def get_player_stats(self, player_name: str) -> List[Dict[str, Any]]:
+    def iter_stats(
+        self,
+        filter: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        since: Optional[Union[datetime, str]] = None,
+        until: Optional[Union[datetime, str]] = None,
+        reverse: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Перебрать игры, читая их из хранилища по одной.
+        
+        Память не зависит от размера истории: записи не собираются
+        в список. С границами времени читаются только разделы,
+        пересекающиеся с диапазоном.
+        
+        Args:
+            filter: Функция-условие для записи.
+            since: Только игры не раньше этого момента (datetime или ISO строка).
+            until: Только игры раньше этого момента.
+            reverse: Сначала новые игры. Чтение останавливается на первой
+                игре за границей диапазона (since при reverse, иначе until).
+        
+        Yields:
+            Записи об играх.
+        """
+        since, until = _iso(since), _iso(until)
+        
+        for record in self.storage.iter_records(reverse=reverse, since=since, until=until):
+            timestamp = record["timestamp"]
+            if since is not None and timestamp < since:
+                if reverse:
+                    return
+                continue
+            if until is not None and timestamp >= until:
+                if not reverse:
+                    return
+                continue
+            if filter is None or filter(record):
+                yield record
+    
+    def query(
+        self,
+        player: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        since: Optional[Union[datetime, str]] = None,
+        until: Optional[Union[datetime, str]] = None,
+        won: Optional[bool] = None,
+        min_score: Optional[int] = None,
+        sort: str = "time",
+        descending: bool = False,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Перебрать игры, подходящие под фильтры, в заданном порядке.
+        
+        По времени игры выдаются потоком по мере чтения хранилища.
+        Для других ключей с limit в памяти держатся только offset + limit
+        лучших игр (куча); без limit выборка сортируется целиком.
+        Игры игрока берутся из индекса игроков, а лучшие по счёту -
+        из рейтинга (get_high_scores).
+        
+        Args:
+            player: Только игры этого игрока.
+            difficulty: Только игры этой сложности.
+            since: Только игры не раньше этого момента.
+            until: Только игры раньше этого момента.
+            won: Только победы (True) или только поражения (False).
+            min_score: Только игры со счётом не меньше этого.
+            sort: Ключ сортировки (QUERY_SORT_KEYS).
+            descending: По убыванию ключа.
+            limit: Не больше limit игр.
+            offset: Пропустить первые offset игр.
+        
+        Yields:
+            Записи об играх. При равном ключе раньше идёт более ранняя игра.
+        """
+        field = QUERY_SORT_KEYS.get(sort)
+        if field is None:
+            raise ValueError(f"Неизвестный ключ сортировки: {sort}")
+        since, until = _iso(since), _iso(until)
+        stop = None if limit is None else offset + limit
+        
+        def matches(record: Dict[str, Any]) -> bool:
+            return ((difficulty is None or record["difficulty"] == difficulty)
+                    and (won is None or record["won"] == won)
+                    and (min_score is None or record["score"] >= min_score)
+                    and (since is None or record["timestamp"] >= since)
+                    and (until is None or record["timestamp"] < until))
+        
+        # Лучшие по счёту - из рейтинга; фильтр по счёту оставляет начало списка
+        if sort == "score" and descending and stop is not None and player is None and won is None:
+            top = self.get_high_scores(stop, difficulty, since, until)
+            yield from itertools.islice(filter(matches, top), offset, stop)
+            return
+        
+        newest_first = sort == "time" and descending
+        if player is not None:
+            games = self.get_player_stats(player)
+            records = reversed(games) if newest_first else iter(games)
+        else:
+            records = self.iter_stats(since=since, until=until, reverse=newest_first)
+        records = filter(matches, records)
+        
+        if sort == "time":
+            yield from itertools.islice(records, offset, stop)
+            return
+        
+        if stop is None:
+            # Сортировка устойчива и при reverse: равные игры сохраняют порядок
+            ordered = sorted(records, key=lambda record: record[field], reverse=descending)
+        elif descending:
+            ordered = [record for _, record in heapq.nlargest(
+                stop, enumerate(records), key=lambda item: (item[1][field], -item[0]))]
+        else:
+            ordered = [record for _, record in heapq.nsmallest(
+                stop, enumerate(records), key=lambda item: (item[1][field], item[0]))]
+        yield from itertools.islice(ordered, offset, None)
+    
+    def get_player_stats(
+        self,
+        player_name: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
         """
         Получить статистику конкретного игрока.
         
+        С NumPy игры находятся по индексу игроков: время зависит
+        от числа игр этого игрока, а не от размера истории.
+        
         Args:
             player_name: Имя игрока.
+            limit: Вернуть только limit последних игр (None - все).
+            offset: Пропустить offset последних игр (следующие страницы).
         
         Returns:
-            Список игр этого игрока.
+            Список игр этого игрока в порядке сохранения.
         """
-        all_stats = self.load_all_stats()
-        return [stat for stat in all_stats if stat["player_name"] == player_name]
+        if self.storage.indexed:
+            return self.storage.player_games(player_name, limit, offset)
+        
+        if COLUMNS_AVAILABLE:
+            with self._lock:
+                columns = self._get_columns_locked()
+                positions = self._player_positions(columns, player_name)
+            end = max(len(positions) - offset, 0)
+            start = 0 if limit is None else max(end - limit, 0)
+            return [columns.record(position) for position in positions[start:end]]
+        
+        # С конца истории: последние игры находятся без чтения всего журнала
+        games = self.iter_stats(filter=lambda stat: stat["player_name"] == player_name,
+                                reverse=True)
+        stop = None if limit is None else offset + limit
+        page = list(itertools.islice(games, offset, stop))
+        page.reverse()
+        return page
     
-    def get_high_scores(self, limit: int = 10) -> List[Dict[str, Any]]:
+    def _player_positions(self, columns: StatsColumns, player_name: str):
+        """
+        Номера записей игрока в представлении; вызывается под self._lock.
+        
+        Индекс игроков загружается или перестраивается, когда после
+        его построения сохранено больше STATS_PLAYER_INDEX_TAIL игр.
+        """
+        player = columns.player_id(player_name)
+        if player is None:
+            return []
+        if columns.stored is None:
+            # Представление только в памяти: один векторный проход
+            return columns.scan_player(player)
+        
+        index = self._player_index
+        if index is None or not index.covers(columns):
+            index = load_player_index(self._columns_dir(), columns)
+        if index is None or len(columns) - index.count > STATS_PLAYER_INDEX_TAIL:
+            index = PlayerIndex.build(columns)
+            save_player_index(self._columns_dir(), index)
+        self._player_index = index
+        return index.positions(columns, player)
+    
+    def get_high_scores(
+        self,
+        limit: int = 10,
+        difficulty: Optional[str] = None,
+        since: Optional[Union[datetime, str]] = None,
+        until: Optional[Union[datetime, str]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Получить топ рекордов.
         
         Args:
             limit: Количество рекордов.
+            difficulty: Сложность или None для общего рейтинга.
+            since: Только игры не раньше этого момента (например, за неделю).
+            until: Только игры раньше этого момента.
         
         Returns:
             Список топ игр отсортированных по счету.
         """
-        all_stats = self.load_all_stats()
-        sorted_stats = sorted(all_stats, key=lambda x: x["score"], reverse=True)
-        return sorted_stats[:limit]
+        ranged = since is not None or until is not None
+        if self.storage.indexed and not ranged:
+            return self.storage.high_scores(limit, difficulty)
+        
+        # Рейтинг из индекса: время не зависит от размера истории
+        if not ranged:
+            leaderboard = self._get_index(Leaderboard)
+            if limit <= leaderboard.size:
+                return leaderboard.top(limit, difficulty)
+        
+        # Двоичные записи (если ведутся) просматриваются векторно
+        columns = self._maintained_columns()
+        if columns is not None:
+            return columns.top(limit, difficulty, columns.time_mask(_iso(since), _iso(until)))
+        
+        # В памяти только limit лучших игр; при равном счёте выше более ранняя
+        games = self.iter_stats(
+            filter=None if difficulty is None else lambda stat: stat["difficulty"] == difficulty,
+            since=since,
+            until=until
+        )
+        best = heapq.nsmallest(limit, enumerate(games),
+                               key=lambda item: (-item[1]["score"], item[1]["timestamp"], item[0]))
+        return [stat for _, stat in best]
     
-    def get_statistics_summary(self) -> Optional[Dict[str, Any]]:
+    def get_statistics_summary(
+        self,
+        filter: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        since: Optional[Union[datetime, str]] = None,
+        until: Optional[Union[datetime, str]] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Получить общую статистику.
         
+        Args:
+            filter: Учитывать только игры, подходящие под условие.
+            since: Учитывать только игры не раньше этого момента.
+            until: Учитывать только игры раньше этого момента.
+        
         Returns:
             Словарь с общей статистикой или None если данных нет.
         """
-        all_stats = self.load_all_stats()
-        if not all_stats:
+        if filter is None and (since is not None or until is not None):
+            columns = self._maintained_columns()
+            if columns is not None:
+                return columns.summary(columns.time_mask(_iso(since), _iso(until)))
+        
+        if filter is not None or since is not None or until is not None:
+            # Выборка считается за один потоковый проход
+            return RunningAggregates.build(
+                self.iter_stats(filter, since, until, reverse=True)
+            ).summary()
+        
+        if self.storage.indexed:
+            return self.storage.summary()
+        
+        # Накопительные агрегаты обновляются при каждом сохранении
+        return self._get_index(RunningAggregates).summary()
+    
+    def get_distribution(self, merge_with: Iterable[str] = ()) -> ScoreDistribution:
+        """
+        Получить распределения счёта и длительности (общее и по сложностям).
+        
+        Скетчи и гистограммы обновляются при каждом сохранении, поэтому
+        запросы к ним не читают историю.
+        
+        Args:
+            merge_with: Файлы распределений других машин
+                (stats/index/distribution.json), прибавляемые к своему.
+        
+        Returns:
+            ScoreDistribution.
+        
+        Raises:
+            OSError, ValueError, KeyError: Файл из merge_with недоступен,
+                повреждён или несовместим.
+        """
+        if self.storage.indexed:
+            distribution = ScoreDistribution.build(self.iter_stats())
+        else:
+            distribution = self._get_index(ScoreDistribution)
+        
+        merge_with = list(merge_with)
+        if merge_with:
+            # Копия: индекс в памяти должен соответствовать своему журналу
+            distribution = ScoreDistribution.from_dict(distribution.to_dict())
+            for path in merge_with:
+                distribution.merge(read_index(path, ScoreDistribution))
+        return distribution
+    
+    def get_percentile_rank(self, score: int, difficulty: Optional[str] = None) -> Optional[float]:
+        """
+        Процентильный ранг счёта: какой процент игр набрал меньше.
+        
+        Args:
+            score: Счёт.
+            difficulty: Сложность или None для всех игр.
+        
+        Returns:
+            Ранг от 0 до 100 или None, если игр нет.
+        """
+        return self.get_distribution().percentile_rank(score, difficulty)
+    
+    def _columns_dir(self) -> str:
+        """Директория двоичных записей."""
+        return os.path.join(self.stats_dir, STATS_COLUMNS_DIR)
+    
+    def _maintained_columns(self) -> Optional[StatsColumns]:
+        """Двоичные записи журнала, если они уже ведутся (без построения)."""
+        if not COLUMNS_AVAILABLE or self.storage.indexed:
             return None
+        with self._lock:
+            return self._get_columns_locked(build=False)
+    
+    def get_columns(self, build: bool = True) -> Optional[StatsColumns]:
+        """
+        Получить двоичное представление истории (структурный массив NumPy).
         
-        total_games = len(all_stats)
-        wins = sum(1 for stat in all_stats if stat["won"])
-        losses = total_games - wins
+        Записи отображаются в память из файлов, дополняются играми,
+        дописанными после их сохранения, или строятся заново по всем
+        записям.
         
-        scores = [stat["score"] for stat in all_stats]
-        durations = [stat["game_duration"] for stat in all_stats]
+        Args:
+            build: Построить представление, если его ещё нет
+                (иначе вернуть None).
         
-        return {
-            "total_games": total_games,
-            "wins": wins,
-            "losses": losses,
-            "win_rate": round((wins / total_games) * 100, 2) if total_games else 0,
-            "average_score": round(sum(scores) / total_games, 2) if total_games else 0,
-            "max_score": max(scores) if scores else 0,
-            "min_score": min(scores) if scores else 0,
-            "average_duration": round(sum(durations) / total_games, 2) if total_games else 0,
-            "unique_players": len(set(stat["player_name"] for stat in all_stats))
-        }
+        Returns:
+            StatsColumns или None.
+        
+        Raises:
+            RuntimeError: Если NumPy не установлен.
+        """
+        if not COLUMNS_AVAILABLE:
+            raise RuntimeError("Для двоичного представления статистики нужен NumPy")
+        
+        with self._lock:
+            return self._get_columns_locked(build)
+    
+    def _stage_columns(self, before, added: Optional[List[Dict[str, Any]]]) -> None:
+        """
+        Отложить дозапись игр в двоичные записи до записи индексов.
+        
+        Игры уже прочитаны для индексов, поэтому при дозаписи журнал
+        не читается повторно. Вызывается под self._lock.
+        
+        Args:
+            before: Подпись хранилища до этих игр.
+            added: Игры, дописанные после before (None - индексы сброшены).
+        """
+        staged = self._staged
+        if added is None or self._columns is None:
+            self._staged = None
+        elif staged is not None and staged[1] == before:
+            staged[2].extend(added)
+            self._staged = (staged[0], self._index_signature, staged[2])
+        elif self._columns.signature == before:
+            self._staged = (before, self._index_signature, list(added))
+        else:
+            self._staged = None
+    
+    def _get_columns_locked(self, build: bool = True) -> Optional[StatsColumns]:
+        """Получить двоичное представление; вызывается под self._lock."""
+        directory = self._columns_dir()
+        signature = self.storage.signature()
+        columns = self._columns
+        staged, self._staged = self._staged, None
+        if columns is None and signature is not None:
+            columns = load_columns(directory)
+        if columns is not None and (signature is None or columns.signature != signature):
+            if staged is not None and staged[0] == columns.signature and staged[1] == signature:
+                changes = (signature, staged[2])
+            else:
+                changes = self.storage.changes_since(columns.signature)
+            columns = None if changes is None else append_columns(
+                directory, columns, changes[1], changes[0])
+        
+        if columns is None:
+            self._columns = None
+            if not build:
+                return None
+            columns = StatsColumns.build(self.iter_stats(), signature)
+            # Без подписи (или если записи менялись во время построения)
+            # представление не сохраняется
+            if signature is None or self.storage.signature() != signature:
+                return columns
+            columns = save_columns(directory, columns)
+        
+        self._columns = columns
+        return columns
+    
+    def get_group_stats(
+        self,
+        by: str = "difficulty",
+        since: Optional[Union[datetime, str]] = None,
+        until: Optional[Union[datetime, str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Получить статистику по сложностям или игрокам.
+        
+        С NumPy считается векторно по столбцовому представлению,
+        без него - потоковым проходом по истории.
+        
+        Args:
+            by: difficulty или player.
+            since: Учитывать только игры не раньше этого момента.
+            until: Учитывать только игры раньше этого момента.
+        
+        Returns:
+            Словарь {сложность или имя игрока: статистика в формате
+            get_statistics_summary}.
+        """
+        since, until = _iso(since), _iso(until)
+        if COLUMNS_AVAILABLE:
+            columns = self.get_columns()
+            return columns.group_stats(by, columns.time_mask(since, until))
+        
+        field = {"difficulty": "difficulty", "player": "player_name"}.get(by)
+        if field is None:
+            raise ValueError(f"Неизвестная группировка: {by}")
+        groups: Dict[str, RunningAggregates] = {}
+        for record in self.iter_stats(since=since, until=until):
+            groups.setdefault(record[field], RunningAggregates()).add(record)
+        return {name: aggregates.summary() for name, aggregates in groups.items()}
+    
+    def import_stats(self, path: str) -> int:
+        """
+        Импортировать записи из файла статистики (JSON массив или JSON Lines).
+        
+        Args:
+            path: Путь к файлу.
+        
+        Returns:
+            Количество импортированных записей.
+        """
+        return self.storage.append_many(read_stats_file(path))
     
     def clear_stats(self) -> bool:
         """
@@ -170,9 +940,18 @@ class StatsManager:
             True если очистка успешна.
         """
         try:
-            stats_path = self._get_stats_path()
-            if os.path.exists(stats_path):
-                os.remove(stats_path)
+            with self._lock:
+                self.storage.clear()
+                self._indexes.clear()
+                self._unsaved = 0
+                self._index_signature = None
+                for index_class in INDEX_CLASSES:
+                    path = self._index_path(index_class)
+                    if os.path.exists(path):
+                        os.remove(path)
+                self._columns = None
+                self._player_index = None
+                shutil.rmtree(self._columns_dir(), ignore_errors=True)
             return True
         except Exception as e:
             print(f"Ошибка очистки статистики: {e}")
@@ -0,0 +1,125 @@
+"""
+Потоковый вывод записей статистики в таблицу, JSON Lines или CSV.
+
+Записи форматируются по одной и пишутся в поток пачками по
+STATS_QUERY_BATCH строк: память не зависит от размера выборки,
+а первая строка сбрасывается в поток сразу, не дожидаясь пачки.
+"""
+
+import csv
+import io
+import json
+import sys
+from typing import Any, Callable, Dict, Iterable, Optional, TextIO
+
+try:
+    from config import STATS_QUERY_BATCH
+except ImportError:
+    STATS_QUERY_BATCH = 500
+
+
+# Поддерживаемые форматы вывода
+OUTPUT_FORMATS = ("table", "json", "csv")
+
+# Поля записи в порядке вывода
+FIELDS = ("timestamp", "player_name", "score", "level_reached",
+          "difficulty", "game_duration", "won")
+
+# Столбцы таблицы: (поле, заголовок, ширина)
+TABLE_COLUMNS = (
+    ("timestamp", "Дата", 19),
+    ("player_name", "Игрок", 20),
+    ("score", "Счет", 8),
+    ("level_reached", "Уровень", 7),
+    ("difficulty", "Сложность", 9),
+    ("game_duration", "Время", 8),
+    ("won", "Результат", 9),
+)
+
+
+def _table_line(record: Dict[str, Any]) -> str:
+    """Строка таблицы для записи."""
+    cells = []
+    for field, _, width in TABLE_COLUMNS:
+        value = record.get(field)
+        if field == "won":
+            cell = "Победа" if value else "Проигрыш"
+        elif field == "timestamp":
+            cell = str(value)[:width]
+        elif field == "game_duration":
+            cell = f"{value:.1f}"
+        else:
+            cell = str(value)
+        cells.append(cell.rjust(width) if isinstance(value, (int, float))
+                     and not isinstance(value, bool) else cell.ljust(width))
+    return " ".join(cells).rstrip() + "\n"
+
+
+def _csv_formatter() -> Callable[[Dict[str, Any]], str]:
+    """Форматтер строк CSV с одним переиспользуемым буфером."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    def format_line(record: Dict[str, Any]) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow([record.get(field) for field in FIELDS])
+        return buffer.getvalue()
+
+    return format_line
+
+
+def _json_line(record: Dict[str, Any]) -> str:
+    """Строка JSON Lines для записи."""
+    return json.dumps({field: record.get(field) for field in FIELDS},
+                      ensure_ascii=False) + "\n"
+
+
+def write_records(
+    records: Iterable[Dict[str, Any]],
+    fmt: str = "table",
+    out: Optional[TextIO] = None,
+    batch: int = STATS_QUERY_BATCH
+) -> int:
+    """
+    Вывести записи в поток, не собирая их в список.
+
+    Args:
+        records: Записи об играх (например, StatsManager.query).
+        fmt: Формат вывода из OUTPUT_FORMATS. JSON выводится построчно
+            (JSON Lines), чтобы печать начиналась до конца выборки.
+        out: Поток вывода (по умолчанию sys.stdout).
+        batch: Строк в одной записи в поток.
+
+    Returns:
+        Количество выведенных записей.
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Неизвестный формат вывода: {fmt}")
+    if out is None:
+        out = sys.stdout
+
+    if fmt == "table":
+        format_line = _table_line
+        header = " ".join(title.ljust(width) for _, title, width in TABLE_COLUMNS).rstrip()
+        out.write(header + "\n" + "-" * len(header) + "\n")
+    elif fmt == "csv":
+        format_line = _csv_formatter()
+        out.write(",".join(FIELDS) + "\n")
+    else:
+        format_line = _json_line
+
+    lines = []
+    count = 0
+    for record in records:
+        lines.append(format_line(record))
+        count += 1
+        # Первая строка сразу, дальше пачками
+        if count == 1 or len(lines) >= batch:
+            out.write("".join(lines))
+            out.flush()
+            lines.clear()
+    if lines:
+        out.write("".join(lines))
+    out.flush()
+    return count
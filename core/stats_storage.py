@@ -0,0 +1,1158 @@
+"""
+Хранилища записей статистики.
+
+JsonlStatsStorage хранит журнал игр в формате JSON Lines: одна запись
+на строку. Сохранение игры - дозапись одной строки в конец файла,
+стоимость не зависит от размера истории. Чтение потоковое, в том числе
+с конца файла. Записи журналов до STATS_CACHE_MAX_BYTES кэшируются
+в процессе и проверяются по подписи файла (inode, mtime, размер):
+повторные запросы не читают файл, а сохранение дополняет кэш на месте.
+Большие журналы читаются с постоянным расходом памяти.
+
+SegmentedStatsStorage позволяет нескольким процессам сохранять игры
+одновременно без блокировок: каждый процесс дописывает свой журнал
+(сегмент), а сжатие раскладывает сегменты завершённых процессов
+по разделам-месяцам. Чтение сливает разделы и сегменты по времени игры
+и пропускает разделы вне запрошенного диапазона времени.
+
+SqliteStatsStorage хранит игры в таблице SQLite (режим WAL) с индексами
+по игроку, счёту и сложности; запросы статистики выполняются в базе.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from config import (STATS_BACKEND, STATS_LOG_FILE, STATS_DB_FILE, STATS_FILE,
+                        STATS_CACHE_MAX_BYTES, STATS_SEGMENT_DIR, STATS_SEGMENT_MAX_BYTES,
+                        STATS_PARTITION_DIR, STATS_IMPORT_CHUNK, STATS_SEGMENT_MAX_FILES)
+except ImportError:
+    STATS_BACKEND = "jsonl"
+    STATS_LOG_FILE = "game_stats.jsonl"
+    STATS_DB_FILE = "game_stats.db"
+    STATS_FILE = "game_stats.json"
+    STATS_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    STATS_SEGMENT_DIR = "segments"
+    STATS_SEGMENT_MAX_BYTES = 1024 * 1024
+    STATS_PARTITION_DIR = "partitions"
+    STATS_IMPORT_CHUNK = 100_000
+    STATS_SEGMENT_MAX_FILES = 16
+
+# Размер блока при чтении журнала с конца
+REVERSE_BLOCK_SIZE = 64 * 1024
+
+STATS_BACKENDS = ("jsonl", "sqlite")
+
+RECORD_FIELDS = ("timestamp", "player_name", "score", "level_reached",
+                 "difficulty", "game_duration", "won")
+
+# Записи журналов, прочитанные в этом процессе: путь -> (подпись файла, записи)
+_RECORD_CACHE: Dict[str, Tuple[Tuple[int, int, int], List[Dict[str, Any]]]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Подпись файла для проверки кэшей: (inode, mtime в нс, размер).
+
+    Returns:
+        Кортеж или None, если файла нет.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _parse_line(line) -> Optional[Dict[str, Any]]:
+    """Разобрать строку журнала; пустые и повреждённые строки дают None."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+
+def _timestamp(record: Dict[str, Any]) -> str:
+    """Ключ слияния журналов: время игры."""
+    return record["timestamp"]
+
+
+def _pid_alive(pid: int) -> bool:
+    """
+    Проверить, работает ли процесс.
+
+    Если проверка недоступна (не POSIX или неизвестный pid), процесс
+    считается работающим: его сегмент не сжимается, но продолжает читаться.
+    """
+    if pid <= 0 or pid == os.getpid() or os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _reverse_lines(f, block_size: int = REVERSE_BLOCK_SIZE) -> Iterator[bytes]:
+    """
+    Читать строки двоичного файла с конца блоками фиксированного размера.
+
+    В памяти находится один блок и неполная строка на его границе.
+    """
+    f.seek(0, os.SEEK_END)
+    position = f.tell()
+    tail = b""
+    while position > 0:
+        size = min(block_size, position)
+        position -= size
+        f.seek(position)
+        lines = (f.read(size) + tail).split(b"\n")
+        # Первая строка блока может начинаться в предыдущем блоке
+        tail = lines.pop(0)
+        yield from reversed(lines)
+    yield tail
+
+
+def acquire_lock(lock_path: str) -> bool:
+    """
+    Захватить файловую блокировку (файл с pid владельца).
+
+    Блокировка завершённого процесса снимается.
+
+    Args:
+        lock_path: Путь к файлу блокировки.
+
+    Returns:
+        True если блокировка получена.
+    """
+    for _ in range(2):
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                with open(lock_path, 'r', encoding='utf-8') as f:
+                    owner = int(f.read() or 0)
+            except (OSError, ValueError):
+                owner = 0
+            # Пустой файл - владелец ещё не записал pid
+            if not owner or _pid_alive(owner):
+                return False
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(str(os.getpid()))
+        return True
+    return False
+
+
+def release_lock(lock_path: str) -> None:
+    """Снять файловую блокировку."""
+    try:
+        os.remove(lock_path)
+    except FileNotFoundError:
+        pass
+
+
+class StatsStorage(ABC):
+    """
+    Базовый интерфейс хранилища записей.
+
+    Хранилища с indexed = True сами выполняют запросы статистики
+    (player_games, high_scores, summary); для остальных StatsManager
+    вычисляет их по iter_records().
+    """
+
+    indexed = False
+    path = ""
+
+    @abstractmethod
+    def append(self, record: Dict[str, Any]) -> None:
+        """Сохранить запись об игре."""
+
+    def append_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Сохранить несколько записей.
+
+        Returns:
+            Количество сохранённых записей.
+        """
+        count = 0
+        for record in records:
+            self.append(record)
+            count += 1
+        return count
+
+    @abstractmethod
+    def iter_records(self, reverse: bool = False, since: Optional[str] = None,
+                     until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Читать записи по одной.
+
+        Args:
+            reverse: Начиная с последней сохранённой записи.
+            since: Подсказка: нужны игры не раньше этого момента (ISO строка).
+            until: Подсказка: нужны игры раньше этого момента. Хранилище
+                может вернуть и записи вне диапазона.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Удалить все записи."""
+
+    def signature(self):
+        """
+        Подпись текущего состояния данных для проверки индексов и кэшей.
+
+        Returns:
+            Значение, меняющееся при любом изменении записей, или None.
+        """
+        return None
+
+    def changes_since(self, signature) -> Optional[Tuple[Any, List[Dict[str, Any]]]]:
+        """
+        Записи, дописанные после состояния с подписью signature.
+
+        Args:
+            signature: Подпись, для которой построены индексы.
+
+        Returns:
+            (подпись после этих записей, записи) или None, если данные
+            изменились не только дозаписью и индексы нужно перестроить.
+        """
+        return None
+
+    def compact(self, force: bool = False) -> int:
+        """
+        Сжать хранилище (слить отдельные файлы записей).
+
+        Args:
+            force: Сжать и данные текущего процесса независимо от размера.
+
+        Returns:
+            Количество слитых файлов.
+        """
+        return 0
+
+    def partitions(self) -> Dict[str, Dict[str, Any]]:
+        """Разделы по месяцам (для хранилищ с разделами)."""
+        return {}
+
+    def drop_partitions(self, before: str) -> int:
+        """
+        Удалить записи месяцев раньше before (для хранилищ с разделами).
+
+        Args:
+            before: Первый сохраняемый месяц (ГГГГ-ММ).
+
+        Returns:
+            Количество удалённых разделов.
+        """
+        return 0
+
+    def close(self) -> None:
+        """Освободить ресурсы хранилища."""
+
+
+class JsonlStatsStorage(StatsStorage):
+    """Журнал игр в формате JSON Lines."""
+
+    def __init__(self, path: str, legacy_path: Optional[str] = None):
+        """
+        Инициализация хранилища.
+
+        Args:
+            path: Путь к файлу журнала (.jsonl).
+            legacy_path: Путь к файлу старого формата (JSON массив),
+                который один раз переносится в журнал.
+        """
+        self.path = path
+        self.legacy_path = legacy_path
+        if legacy_path:
+            self.migrate_legacy()
+
+    def migrate_legacy(self) -> int:
+        """
+        Перенести записи из JSON массива в журнал.
+
+        Журнал пишется во временный файл и атомарно переименовывается,
+        старый файл сохраняется с суффиксом .bak. Если журнал уже есть,
+        миграция не выполняется.
+
+        Returns:
+            Количество перенесённых записей.
+        """
+        if not os.path.exists(self.legacy_path) or os.path.exists(self.path):
+            return 0
+
+        with open(self.legacy_path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        os.replace(self.legacy_path, self.legacy_path + ".bak")
+
+        print(f"✓ Статистика перенесена в {self.path}: {len(records)} записей")
+        return len(records)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Дописать запись в конец журнала.
+
+        Args:
+            record: Запись об игре.
+        """
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with _CACHE_LOCK:
+            cached = _RECORD_CACHE.pop(self.path, None)
+        before = file_signature(self.path)
+        
+        with open(self.path, 'a+b') as f:
+            # Оборванная при сбое последняя строка не склеивается с новой
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = "\n" + line
+            data = line.encode('utf-8')
+            f.write(data)
+            # Запись считается сохранённой только после сброса на диск
+            f.flush()
+            os.fsync(f.fileno())
+        
+        # Кэш дополняется, только если файл не менялся со стороны
+        # и выросла ровно на эту запись
+        if cached is None or cached[0] != before:
+            return
+        after = file_signature(self.path)
+        if after is not None and after[2] == before[2] + len(data):
+            cached[1].append(record)
+            with _CACHE_LOCK:
+                _RECORD_CACHE[self.path] = (after, cached[1])
+
+    def iter_records(self, reverse: bool = False, since: Optional[str] = None,
+                     until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Читать записи журнала по одной.
+
+        Если файл не менялся с прошлого чтения, записи берутся из кэша
+        процесса. Повреждённые строки (например, оборванная при сбое
+        запись) пропускаются.
+
+        Args:
+            reverse: Читать с конца файла (сначала новые игры).
+            since: Не используется: журнал читается целиком.
+            until: Не используется.
+
+        Yields:
+            Записи об играх.
+        """
+        signature = file_signature(self.path)
+        if signature is None:
+            return
+
+        with _CACHE_LOCK:
+            cached = _RECORD_CACHE.get(self.path)
+        if cached is not None and cached[0] == signature:
+            records = cached[1]
+            if reverse:
+                for i in range(len(records) - 1, -1, -1):
+                    yield records[i]
+            else:
+                yield from itertools.islice(records, len(records))
+            return
+
+        # Файл мог удалить другой процесс (сжатие сегментов)
+        try:
+            if reverse:
+                f = open(self.path, 'rb')
+            else:
+                f = open(self.path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+
+        if reverse:
+            with f:
+                for line in _reverse_lines(f):
+                    record = _parse_line(line)
+                    if record is not None:
+                        yield record
+            return
+
+        # Большие журналы не кэшируются: память не растёт с историей
+        records = [] if signature[2] <= STATS_CACHE_MAX_BYTES else None
+        with f:
+            for line in f:
+                record = _parse_line(line)
+                if record is None:
+                    continue
+                if records is not None:
+                    records.append(record)
+                yield record
+
+        # Файл, изменившийся во время чтения, не кэшируется
+        if records is not None and file_signature(self.path) == signature:
+            with _CACHE_LOCK:
+                _RECORD_CACHE[self.path] = (signature, records)
+
+    def append_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Дописать несколько записей одной записью в файл и одним fsync.
+
+        Returns:
+            Количество сохранённых записей.
+        """
+        with _CACHE_LOCK:
+            _RECORD_CACHE.pop(self.path, None)
+
+        count = 0
+        with open(self.path, 'a+b') as f:
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            chunk = []
+            for record in records:
+                chunk.append(json.dumps(record, ensure_ascii=False))
+                count += 1
+                if len(chunk) >= 10000:
+                    f.write(("\n".join(chunk) + "\n").encode('utf-8'))
+                    chunk.clear()
+            if chunk:
+                f.write(("\n".join(chunk) + "\n").encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        return count
+
+    def read_tail(self, offset: int, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Прочитать полные строки журнала между смещениями offset и limit.
+
+        Args:
+            offset: Начало чтения (конец ранее прочитанных строк).
+            limit: Размер файла, до которого читать.
+
+        Returns:
+            (записи, смещение после последней полной строки). Строка,
+            которую другой процесс ещё дописывает, остаётся на следующий раз.
+        """
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(limit - offset)
+        end = data.rfind(b"\n") + 1
+        records = [record for record in map(_parse_line, data[:end].split(b"\n"))
+                   if record is not None]
+        return records, offset + end
+
+    def signature(self):
+        return file_signature(self.path)
+
+    def clear(self) -> None:
+        """Удалить журнал."""
+        with _CACHE_LOCK:
+            _RECORD_CACHE.pop(self.path, None)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class SegmentedStatsStorage(StatsStorage):
+    """
+    Разделы по месяцам и журналы отдельных процессов (сегменты).
+
+    Процесс дописывает игры только в свой сегмент
+    segments/<pid>-<метка>.jsonl, поэтому одновременная запись из
+    нескольких процессов не требует блокировок и не теряет записи.
+
+    Сжатие (compact) под файловой блокировкой раскладывает записи
+    сегментов завершённых процессов, своего сегмента и общего журнала
+    прежнего формата (STATS_LOG_FILE) по разделам
+    partitions/<ГГГГ-ММ>.<поколение>.jsonl, отсортированным по времени.
+    Переписываются только разделы месяцев, в которые попали новые игры.
+    Манифест partitions/manifest.json (файл, количество игр, первое
+    и последнее время и лучший счёт каждого раздела) заменяется атомарно
+    и служит точкой фиксации: в нём же перечислены слитые журналы,
+    которые чтение пропускает. Слитые журналы и файлы, которых нет
+    в манифесте, удаляются при следующем сжатии, поэтому чтение, начатое
+    по предыдущему манифесту, не теряет файлы, а прерванное сжатие
+    не приводит к потере или повторному чтению записей.
+
+    Чтение сливает разделы и журналы по времени игры (heapq.merge);
+    запрос с диапазоном времени открывает только пересекающиеся разделы.
+    Слияние и остановка чтения на границе диапазона требуют, чтобы
+    каждый журнал был отсортирован. Импорт сортируется пачками до
+    записи. Если запись всё же раньше последней в сегменте (старая
+    пачка импорта, перевод часов), рядом с сегментом создаётся метка
+    <сегмент>.unsorted: такой сегмент, как и общий журнал прежнего
+    формата, сортируется при чтении в памяти, а сжатие сливает его
+    в разделы сразу, не дожидаясь порогов.
+    """
+
+    MANIFEST_FILE = "manifest.json"
+    LOCK_FILE = "compact.lock"
+    UNSORTED_SUFFIX = ".unsorted"
+
+    def __init__(self, stats_dir: str, legacy_path: Optional[str] = None):
+        """
+        Инициализация хранилища.
+
+        Args:
+            stats_dir: Директория статистики.
+            legacy_path: Путь к файлу старого формата (JSON массив),
+                который один раз переносится в общий журнал.
+        """
+        self.stats_dir = stats_dir
+        self.log = JsonlStatsStorage(os.path.join(stats_dir, STATS_LOG_FILE),
+                                     legacy_path=legacy_path)
+        self.segment_dir = os.path.join(stats_dir, STATS_SEGMENT_DIR)
+        self.partition_dir = os.path.join(stats_dir, STATS_PARTITION_DIR)
+        self.manifest_path = os.path.join(self.partition_dir, self.MANIFEST_FILE)
+        self._lock = threading.RLock()
+        # Прочитанный манифест и подпись его файла
+        self._manifest_cache: Tuple[Any, Dict[str, Any]] = (None, self._empty_manifest())
+        self._new_segment()
+
+    @staticmethod
+    def _empty_manifest() -> Dict[str, Any]:
+        """Манифест хранилища без разделов."""
+        return {"generation": 0, "partitions": {}, "folded": []}
+
+    def _new_segment(self) -> None:
+        """Выбрать новое имя своего сегмента (файл создаётся при записи)."""
+        self.segment_name = f"{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl"
+        self.segment_source = f"{STATS_SEGMENT_DIR}/{self.segment_name}"
+        self.segment = JsonlStatsStorage(os.path.join(self.segment_dir, self.segment_name))
+        self.path = self.segment.path
+        # Самое позднее время записей своего сегмента и его порядок
+        self._segment_last: Optional[str] = None
+        self._segment_unsorted = False
+
+    def _track_order(self, first: str, last: str) -> None:
+        """
+        Учесть записи со временем от first до last перед записью в сегмент.
+
+        Если они раньше уже записанных, сегмент помечается как
+        несортированный (метка создаётся до записи, чтобы читатели
+        других процессов не слили его как отсортированный).
+        """
+        if (self._segment_last is not None and first < self._segment_last
+                and not self._segment_unsorted):
+            open(self.path + self.UNSORTED_SUFFIX, 'a').close()
+            self._segment_unsorted = True
+        if self._segment_last is None or last > self._segment_last:
+            self._segment_last = last
+
+    def _unsorted(self, name: str) -> bool:
+        """Нужно ли сортировать журнал при чтении."""
+        if name == STATS_LOG_FILE:
+            return True
+        if name == self.segment_source:
+            return self._segment_unsorted
+        return os.path.exists(self._source_path(name) + self.UNSORTED_SUFFIX)
+
+    def _sorted_records(self, name: str, reverse: bool = False) -> Iterator[Dict[str, Any]]:
+        """Записи журнала по времени; несортированный сортируется в памяти."""
+        if self._unsorted(name):
+            return iter(sorted(self._source(name).iter_records(), key=_timestamp,
+                               reverse=reverse))
+        return self._source(name).iter_records(reverse)
+
+    def _manifest(self) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Текущий манифест.
+
+        Returns:
+            (подпись файла манифеста, манифест).
+        """
+        signature = file_signature(self.manifest_path)
+        if signature != self._manifest_cache[0]:
+            manifest = self._empty_manifest()
+            if signature is not None:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            self._manifest_cache = (signature, manifest)
+        return self._manifest_cache
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        """Заменить манифест атомарно (временный файл, fsync и переименование)."""
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.manifest_path)
+
+    def partitions(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Разделы из манифеста.
+
+        Returns:
+            Словарь {ГГГГ-ММ: {"file", "count", "min_ts", "max_ts", "max_score"}}.
+        """
+        return self._manifest()[1]["partitions"]
+
+    def _source_path(self, name: str) -> str:
+        """Полный путь журнала по имени относительно директории статистики."""
+        return os.path.join(self.stats_dir, *name.split("/"))
+
+    def _source(self, name: str) -> JsonlStatsStorage:
+        """Хранилище журнала по имени."""
+        if name == self.segment_source:
+            return self.segment
+        if name == STATS_LOG_FILE:
+            return self.log
+        return JsonlStatsStorage(self._source_path(name))
+
+    def _partition(self, info: Dict[str, Any]) -> JsonlStatsStorage:
+        """Хранилище раздела по его описанию из манифеста."""
+        return JsonlStatsStorage(os.path.join(self.partition_dir, info["file"]))
+
+    def _sources(self, manifest: Dict[str, Any]) -> List[str]:
+        """
+        Журналы, записи которых ещё не в разделах: общий журнал прежнего
+        формата и сегменты.
+
+        Слитые журналы из манифеста пропускаются, если это те же файлы
+        (совпадает inode).
+        """
+        names = []
+        if os.path.exists(self.log.path):
+            names.append(STATS_LOG_FILE)
+        try:
+            names.extend(sorted(f"{STATS_SEGMENT_DIR}/{name}"
+                                for name in os.listdir(self.segment_dir)
+                                if name.endswith(".jsonl")))
+        except FileNotFoundError:
+            pass
+
+        folded = {name: inode for name, inode in manifest["folded"]}
+        if not folded:
+            return names
+        result = []
+        for name in names:
+            if name in folded:
+                signature = file_signature(self._source_path(name))
+                if signature is None or signature[0] == folded[name]:
+                    continue
+            result.append(name)
+        return result
+
+    @staticmethod
+    def _segment_pid(name: str) -> int:
+        """Процесс, которому принадлежит сегмент (0, если имя чужое)."""
+        try:
+            return int(name.rsplit("/", 1)[-1].split("-", 1)[0])
+        except ValueError:
+            return 0
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Дописать запись в сегмент текущего процесса.
+
+        Args:
+            record: Запись об игре.
+        """
+        with self._lock:
+            os.makedirs(self.segment_dir, exist_ok=True)
+            self._track_order(record["timestamp"], record["timestamp"])
+            self.segment.append(record)
+
+    def append_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Дописать записи (например, импорт) в сегменты текущего процесса.
+
+        Записи сортируются по времени пачками по STATS_IMPORT_CHUNK
+        (в памяти - одна пачка). Если пачка начинается раньше последней
+        записи сегмента, сегмент помечается как несортированный.
+
+        Returns:
+            Количество сохранённых записей.
+        """
+        count = 0
+        records = iter(records)
+        with self._lock:
+            os.makedirs(self.segment_dir, exist_ok=True)
+            while True:
+                chunk = sorted(itertools.islice(records, STATS_IMPORT_CHUNK), key=_timestamp)
+                if not chunk:
+                    return count
+                self._track_order(chunk[0]["timestamp"], chunk[-1]["timestamp"])
+                count += self.segment.append_many(chunk)
+
+    def iter_records(self, reverse: bool = False, since: Optional[str] = None,
+                     until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Читать записи разделов и журналов, слитые по времени игры.
+
+        Args:
+            reverse: Сначала новые игры.
+            since: Разделы, целиком более ранние, не читаются.
+            until: Разделы, целиком не ранее этого момента, не читаются.
+
+        Yields:
+            Записи об играх (границы since/until проверяет вызывающий).
+        """
+        manifest = self._manifest()[1]
+        partitions = [
+            self._partition(info)
+            for _, info in sorted(manifest["partitions"].items(), reverse=reverse)
+            if (since is None or info["max_ts"] >= since)
+            and (until is None or info["min_ts"] < until)
+        ]
+
+        streams = [self._sorted_records(name, reverse) for name in self._sources(manifest)]
+        if partitions:
+            # Разделы не пересекаются по времени: читаются подряд
+            streams.insert(0, itertools.chain.from_iterable(
+                partition.iter_records(reverse) for partition in partitions))
+        if len(streams) == 1:
+            yield from streams[0]
+        elif streams:
+            yield from heapq.merge(*streams, key=_timestamp, reverse=reverse)
+
+    def signature(self):
+        manifest_signature, manifest = self._manifest()
+        return (manifest_signature,
+                tuple((name, file_signature(self._source_path(name)))
+                      for name in self._sources(manifest)))
+
+    def changes_since(self, signature) -> Optional[Tuple[Any, List[Dict[str, Any]]]]:
+        """
+        Записи, дописанные в журналы после состояния signature.
+
+        Читаются только новые байты каждого журнала (журналы только
+        растут), поэтому индексы догоняют записи других процессов без
+        перестроения. Если манифест заменён (сжатие) или журнал пропал
+        либо переписан, возвращается None.
+        """
+        if signature is None:
+            return None
+        manifest_signature, sources = signature
+        current_manifest, manifest = self._manifest()
+        if current_manifest != manifest_signature:
+            return None
+
+        previous = dict(sources)
+        names = self._sources(manifest)
+        if not previous.keys() <= set(names):
+            return None
+
+        entries = []
+        records = []
+        for name in names:
+            current = file_signature(self._source_path(name))
+            if current is None:
+                return None
+            offset = 0
+            if previous.get(name) is not None:
+                inode, _, offset = previous[name]
+                if inode != current[0] or offset > current[2]:
+                    return None
+            if offset < current[2]:
+                added, offset = self._source(name).read_tail(offset, current[2])
+                records.extend(added)
+            # Недописанная строка остаётся за смещением и будет прочитана позже
+            entries.append((name, current if offset == current[2] else
+                            (current[0], current[1], offset)))
+
+        records.sort(key=_timestamp)
+        return (manifest_signature, tuple(entries)), records
+
+    def exists(self) -> bool:
+        """Есть ли сохранённые записи (разделы или журналы)."""
+        manifest = self._manifest()[1]
+        return bool(manifest["partitions"]) or bool(self._sources(manifest))
+
+    def _acquire_compaction(self) -> bool:
+        """Захватить файловую блокировку сжатия."""
+        os.makedirs(self.segment_dir, exist_ok=True)
+        return acquire_lock(os.path.join(self.segment_dir, self.LOCK_FILE))
+
+    def _release_compaction(self) -> None:
+        """Снять блокировку сжатия."""
+        release_lock(os.path.join(self.segment_dir, self.LOCK_FILE))
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        """Удалить файл и его кэш записей."""
+        with _CACHE_LOCK:
+            _RECORD_CACHE.pop(path, None)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _collect_garbage(self, manifest: Dict[str, Any]) -> None:
+        """
+        Удалить слитые журналы и файлы разделов, которых нет в манифесте.
+
+        Общий журнал прежнего формата сохраняется с суффиксом .bak.
+        """
+        for name, inode in manifest["folded"]:
+            path = self._source_path(name)
+            signature = file_signature(path)
+            if signature is None or signature[0] != inode:
+                continue
+            if name == STATS_LOG_FILE:
+                with _CACHE_LOCK:
+                    _RECORD_CACHE.pop(path, None)
+                os.replace(path, path + ".bak")
+            else:
+                self._remove_file(path)
+                self._remove_file(path + self.UNSORTED_SUFFIX)
+
+        referenced = {info["file"] for info in manifest["partitions"].values()}
+        referenced.add(self.MANIFEST_FILE)
+        for name in os.listdir(self.partition_dir):
+            if name not in referenced:
+                self._remove_file(os.path.join(self.partition_dir, name))
+
+    def _write_partition(self, month: str, generation: int,
+                         records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Записать раздел месяца.
+
+        Returns:
+            Описание раздела для манифеста.
+        """
+        name = f"{month}.{generation}.jsonl"
+        path = os.path.join(self.partition_dir, name)
+        temp_path = f"{path}.tmp"
+        count = 0
+        min_ts = max_ts = max_score = None
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                timestamp, score = record["timestamp"], record["score"]
+                count += 1
+                min_ts = timestamp if min_ts is None else min(min_ts, timestamp)
+                max_ts = timestamp if max_ts is None else max(max_ts, timestamp)
+                max_score = score if max_score is None else max(max_score, score)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        return {"file": name, "count": count, "min_ts": min_ts, "max_ts": max_ts,
+                "max_score": max_score}
+
+    def compact(self, force: bool = False) -> int:
+        """
+        Разложить по разделам журналы завершённых процессов, свой сегмент
+        и общий журнал прежнего формата.
+
+        Сжатие переписывает разделы затронутых месяцев, поэтому без force
+        оно откладывается, пока журналов, которые можно слить, меньше
+        STATS_SEGMENT_MAX_BYTES по размеру и журналов вне разделов
+        не больше STATS_SEGMENT_MAX_FILES (общий журнал прежнего формата
+        и несортированные сегменты сливаются сразу). Сегменты работающих
+        процессов не трогаются.
+        Если сжатие уже выполняет другой процесс, ничего не делается.
+
+        Args:
+            force: Слить журналы независимо от порогов.
+
+        Returns:
+            Количество слитых журналов.
+        """
+        with self._lock:
+            if not self._acquire_compaction():
+                return 0
+            try:
+                os.makedirs(self.partition_dir, exist_ok=True)
+                manifest = self._manifest()[1]
+                self._collect_garbage(manifest)
+
+                sources = self._sources(manifest)
+                names = [name for name in sources
+                         if name in (self.segment_source, STATS_LOG_FILE)
+                         or not _pid_alive(self._segment_pid(name))]
+                if not names:
+                    return 0
+                if not (force or any(self._unsorted(name) for name in names)
+                        or len(sources) > STATS_SEGMENT_MAX_FILES
+                        or sum(os.path.getsize(self._source_path(name))
+                               for name in names) > STATS_SEGMENT_MAX_BYTES):
+                    return 0
+
+                generation = manifest["generation"] + 1
+                partitions = dict(manifest["partitions"])
+                folded = [[name, file_signature(self._source_path(name))[0]] for name in names]
+                records = heapq.merge(*(self._sorted_records(name) for name in names),
+                                      key=_timestamp)
+                # Журналы читаются по времени, поэтому месяц встречается один раз;
+                # повторный (журнал изменился при чтении) сливается с только что записанным.
+                # В памяти - только новые записи одного месяца
+                for month, group in itertools.groupby(records, key=lambda r: r["timestamp"][:7]):
+                    streams = [sorted(group, key=_timestamp)]
+                    if month in partitions:
+                        streams.insert(0, self._partition(partitions[month]).iter_records())
+                    partitions[month] = self._write_partition(
+                        month, generation, heapq.merge(*streams, key=_timestamp))
+
+                self._write_manifest({"generation": generation, "partitions": partitions,
+                                      "folded": folded})
+            finally:
+                self._release_compaction()
+
+            if self.segment_source in names:
+                self._new_segment()
+            return len(names)
+
+    def drop_partitions(self, before: str) -> int:
+        """
+        Удалить разделы месяцев раньше before.
+
+        Args:
+            before: Первый сохраняемый месяц (ГГГГ-ММ).
+
+        Returns:
+            Количество удалённых разделов (0, если сжатие выполняет
+            другой процесс).
+        """
+        with self._lock:
+            if not self._acquire_compaction():
+                return 0
+            try:
+                manifest = self._manifest()[1]
+                kept = {month: info for month, info in manifest["partitions"].items()
+                        if month >= before}
+                dropped = len(manifest["partitions"]) - len(kept)
+                if dropped:
+                    # Файлы удаляются при следующем сжатии
+                    self._write_manifest(dict(manifest, generation=manifest["generation"] + 1,
+                                              partitions=kept))
+                return dropped
+            finally:
+                self._release_compaction()
+
+    def clear(self) -> None:
+        """Удалить разделы, общий журнал и все сегменты."""
+        with self._lock:
+            self.log.clear()
+            for directory in (self.segment_dir, self.partition_dir):
+                if os.path.isdir(directory):
+                    for name in os.listdir(directory):
+                        if name != self.LOCK_FILE:
+                            self._remove_file(os.path.join(directory, name))
+
+
+class SqliteStatsStorage(StatsStorage):
+    """Игры в базе SQLite с индексами для запросов статистики."""
+
+    indexed = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS games (
+            id INTEGER PRIMARY KEY,
+            timestamp TEXT NOT NULL,
+            player_name TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            level_reached INTEGER NOT NULL,
+            difficulty TEXT NOT NULL,
+            game_duration REAL NOT NULL,
+            won INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_games_player ON games (player_name);
+        CREATE INDEX IF NOT EXISTS idx_games_score ON games (score);
+        CREATE INDEX IF NOT EXISTS idx_games_difficulty ON games (difficulty, score);
+    """
+
+    def __init__(self, path: str):
+        """
+        Инициализация хранилища.
+
+        Args:
+            path: Путь к файлу базы данных.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    @staticmethod
+    def _row(values) -> Dict[str, Any]:
+        """Преобразовать строку таблицы в запись об игре."""
+        record = dict(zip(RECORD_FIELDS, values))
+        record["won"] = bool(record["won"])
+        return record
+
+    def _select(self, where: str = "", params=(), order: str = "id",
+                limit: Optional[int] = None, offset: int = 0) -> Iterator[Dict[str, Any]]:
+        """Выбрать записи по условию (limit -1 - без ограничения)."""
+        sql = f"SELECT {', '.join(RECORD_FIELDS)} FROM games"
+        if where:
+            sql += f" WHERE {where}"
+        sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = (*params, limit)
+            if offset:
+                sql += " OFFSET ?"
+                params = (*params, offset)
+        for values in self._conn.execute(sql, params):
+            yield self._row(values)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        self.append_many([record])
+
+    def append_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        rows = (
+            tuple(record[field] for field in RECORD_FIELDS[:-1]) + (int(record["won"]),)
+            for record in records
+        )
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                f"INSERT INTO games ({', '.join(RECORD_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return cursor.rowcount
+
+    def iter_records(self, reverse: bool = False, since: Optional[str] = None,
+                     until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        conditions, params = [], []
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("timestamp < ?")
+            params.append(until)
+        return self._select(" AND ".join(conditions), tuple(params),
+                            order="id DESC" if reverse else "id")
+
+    def count(self) -> int:
+        """Количество записей."""
+        return self._conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def player_games(self, player_name: str, limit: Optional[int] = None,
+                     offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Игры игрока в порядке сохранения (по индексу player_name).
+
+        Args:
+            player_name: Имя игрока.
+            limit: Только limit последних игр (None - все).
+            offset: Пропустить offset последних игр.
+        """
+        if limit is None and not offset:
+            return list(self._select("player_name = ?", (player_name,)))
+        games = list(self._select("player_name = ?", (player_name,), order="id DESC",
+                                  limit=-1 if limit is None else limit, offset=offset))
+        games.reverse()
+        return games
+
+    def high_scores(self, limit: int, difficulty: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Лучшие игры по счёту (по индексу score или (difficulty, score))."""
+        if difficulty is not None:
+            return list(self._select("difficulty = ?", (difficulty,),
+                                     order="score DESC, timestamp, id", limit=limit))
+        return list(self._select(order="score DESC, timestamp, id", limit=limit))
+
+    def summary(self) -> Optional[Dict[str, Any]]:
+        """Общая статистика одним агрегирующим запросом."""
+        row = self._conn.execute(
+            "SELECT COUNT(*), SUM(won), AVG(score), MAX(score), MIN(score), "
+            "AVG(game_duration), COUNT(DISTINCT player_name) FROM games"
+        ).fetchone()
+        total_games, wins, average_score, max_score, min_score, average_duration, players = row
+        if not total_games:
+            return None
+
+        return {
+            "total_games": total_games,
+            "wins": wins,
+            "losses": total_games - wins,
+            "win_rate": round((wins / total_games) * 100, 2),
+            "average_score": round(average_score, 2),
+            "max_score": max_score,
+            "min_score": min_score,
+            "average_duration": round(average_duration, 2),
+            "unique_players": players
+        }
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM games")
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def read_stats_file(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Читать записи из файла статистики старого (JSON массив) или нового
+    (JSON Lines) формата.
+
+    Args:
+        path: Путь к файлу.
+
+    Yields:
+        Записи об играх.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            yield from json.load(f)
+            return
+
+    yield from JsonlStatsStorage(path).iter_records()
+
+
+def create_stats_storage(stats_dir: str, backend: Optional[str] = None) -> StatsStorage:
+    """
+    Создать хранилище статистики.
+
+    Новая база SQLite заполняется из журнала JSON Lines или старого
+    JSON файла в той же директории, если они есть.
+
+    Args:
+        stats_dir: Директория статистики.
+        backend: jsonl или sqlite (по умолчанию - STATS_BACKEND из config).
+
+    Returns:
+        Экземпляр StatsStorage.
+    """
+    backend = backend or STATS_BACKEND
+    log_path = os.path.join(stats_dir, STATS_LOG_FILE)
+    legacy_path = os.path.join(stats_dir, STATS_FILE)
+
+    if backend == "jsonl":
+        # Старый JSON массив при первом запуске переносится в журнал
+        return SegmentedStatsStorage(stats_dir, legacy_path=legacy_path)
+
+    if backend == "sqlite":
+        db_path = os.path.join(stats_dir, STATS_DB_FILE)
+        is_new = not os.path.exists(db_path)
+        storage = SqliteStatsStorage(db_path)
+        if is_new:
+            log = SegmentedStatsStorage(stats_dir)
+            if log.exists():
+                count = storage.append_many(log.iter_records())
+                print(f"✓ Статистика импортирована из {log_path}: {count} записей")
+            elif os.path.exists(legacy_path):
+                count = storage.append_many(read_stats_file(legacy_path))
+                print(f"✓ Статистика импортирована из {legacy_path}: {count} записей")
+        return storage
+
+    raise ValueError(f"Неизвестное хранилище статистики: {backend}")
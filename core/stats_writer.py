@@ -0,0 +1,169 @@
+"""
+Фоновая запись статистики.
+
+Запись об игре формируется в игровом потоке (время окончания игры),
+а сохранение в хранилище и обновление индексов выполняет отдельный
+поток в порядке очереди. Очередь ограничена; если она переполнена
+(диск долго недоступен), игровой поток ждёт место не дольше
+STATS_WRITER_PUT_TIMEOUT, затем запись откладывается в список ожидания
+(не больше STATS_WRITER_OVERFLOW_SIZE, сверх него отбрасывается и
+учитывается в dropped). Список ожидания поток сохраняет, разобрав
+очередь, и в любом случае - при закрытии. Когда очередь пуста, поток
+сжимает хранилище, если журналов вне разделов набралось больше порога.
+"""
+
+import collections
+import queue
+import threading
+from typing import Any, Dict, Optional
+
+try:
+    from config import (STATS_WRITER_QUEUE_SIZE, STATS_WRITER_PUT_TIMEOUT,
+                        STATS_WRITER_OVERFLOW_SIZE)
+except ImportError:
+    STATS_WRITER_QUEUE_SIZE = 64
+    STATS_WRITER_PUT_TIMEOUT = 0.005
+    STATS_WRITER_OVERFLOW_SIZE = 1024
+
+# Сигнал завершения потока записи
+_STOP = object()
+# Сигнал «в списке ожидания есть записи» для простаивающего потока
+_WAKE = object()
+
+
+class StatsWriter:
+    """Поток записи результатов игр с ограниченной очередью."""
+
+    def __init__(self, stats_manager, maxsize: int = STATS_WRITER_QUEUE_SIZE):
+        """
+        Инициализация записи.
+
+        Поток запускается при первой записи: игры без сохранения
+        (например, без окна) его не создают.
+
+        Args:
+            stats_manager: StatsManager, в который сохраняются записи.
+            maxsize: Размер очереди записей.
+        """
+        self.stats_manager = stats_manager
+        self.failed = 0
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize)
+        # Записи, не поместившиеся в очередь (сохраняются после неё)
+        self._overflow: "collections.deque" = collections.deque()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, record: Dict[str, Any]) -> None:
+        """
+        Поставить запись в очередь на сохранение.
+
+        Ждёт место в очереди не дольше STATS_WRITER_PUT_TIMEOUT: запись
+        в игровом потоке задержала бы кадр. Не поместившаяся запись
+        откладывается в список ожидания; пока он не пуст, новые записи
+        идут туда же, чтобы сохранялся порядок игр.
+
+        Args:
+            record: Запись об игре (StatsManager.make_record).
+        """
+        self._ensure_thread()
+        with self._lock:
+            waiting = bool(self._overflow)
+        if not waiting:
+            try:
+                self._queue.put(record, timeout=STATS_WRITER_PUT_TIMEOUT)
+                return
+            except queue.Full:
+                pass
+
+        with self._lock:
+            if len(self._overflow) >= STATS_WRITER_OVERFLOW_SIZE:
+                self.dropped += 1
+                print("Очередь статистики переполнена, результат игры не сохранён")
+                return
+            self._overflow.append(record)
+        # Поток мог уже разобрать очередь и ждать новых записей
+        try:
+            self._queue.put_nowait(_WAKE)
+        except queue.Full:
+            pass
+
+    def _ensure_thread(self) -> None:
+        """Запустить поток записи, если он ещё не запущен."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="stats-writer",
+                                                daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Цикл потока: сохранять записи из очереди до сигнала завершения."""
+        while True:
+            record = self._queue.get()
+            try:
+                if record is _STOP:
+                    self._finish()
+                    return
+                if record is not _WAKE:
+                    self._write(record)
+                if self._queue.empty():
+                    self._drain_overflow()
+                    self.stats_manager.compact_stats()
+            except Exception as e:
+                # Ошибка не останавливает поток: иначе close() и flush() ждали бы вечно
+                print(f"Ошибка фоновой записи статистики: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _finish(self) -> None:
+        """Сохранить отложенные записи и индексы, сжать хранилище перед выходом."""
+        try:
+            self._drain_overflow()
+            # Индексы, отложенные до пачки, записываются при выходе.
+            # Сегмент процесса сливается в разделы, только если
+            # журналов набралось больше порога (иначе - позже)
+            self.stats_manager.flush_indexes()
+            self.stats_manager.compact_stats()
+        except Exception as e:
+            print(f"Ошибка фоновой записи статистики: {e}")
+
+    def _drain_overflow(self) -> None:
+        """Сохранить записи из списка ожидания по порядку."""
+        while True:
+            with self._lock:
+                if not self._overflow:
+                    return
+                record = self._overflow.popleft()
+            self._write(record)
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        """Сохранить запись через StatsManager."""
+        try:
+            saved = self.stats_manager.append_record(record)
+        except Exception as e:
+            print(f"Ошибка сохранения результата игры: {e}")
+            saved = False
+        if not saved:
+            self.failed += 1
+
+    def pending(self) -> int:
+        """Количество записей, ожидающих сохранения."""
+        with self._lock:
+            waiting = len(self._overflow)
+        return self._queue.unfinished_tasks + waiting
+
+    def flush(self) -> None:
+        """Дождаться сохранения всех записей из очереди и списка ожидания."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Сохранить оставшиеся записи и остановить поток."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+        # Записи, отложенные после остановки потока, сохраняются здесь
+        self._drain_overflow()
@@ -6,7 +6,7 @@
 """
 
 from main import Game, create_argument_parser
-from stats_manager import StatsManager
+from core.stats_manager import StatsManager
 
 
 def example_1_basic_game():
@@ -121,24 +121,18 @@ def example_7_compare_difficulties():
     print("=" * 60)
     
     stats = StatsManager()
-    all_games = stats.load_all_stats()
     
-    difficulties = {"easy": [], "medium": [], "hard": []}
+    # Группировка считается векторно по столбцам NumPy
+    groups = stats.get_group_stats("difficulty")
     
-    for game in all_games:
-        if game['difficulty'] in difficulties:
-            difficulties[game['difficulty']].append(game['score'])
-    
-    for diff, scores in difficulties.items():
-        if scores:
-            avg_score = sum(scores) / len(scores)
-            max_score = max(scores)
-            min_score = min(scores)
+    for diff in ("easy", "medium", "hard"):
+        summary = groups.get(diff)
+        if summary:
             print(f"\n{diff.upper()}:")
-            print(f"  Игр: {len(scores)}")
-            print(f"  Средний счет: {avg_score:.0f}")
-            print(f"  Максимум: {max_score}")
-            print(f"  Минимум: {min_score}")
+            print(f"  Игр: {summary['total_games']}")
+            print(f"  Средний счет: {summary['average_score']:.0f}")
+            print(f"  Максимум: {summary['max_score']}")
+            print(f"  Минимум: {summary['min_score']}")
 
 
 def example_8_quick_stats():
@@ -256,21 +250,24 @@ def example_10_tournament_mode():
     print(f"{'='*60}")
     
     stats = StatsManager()
+    
+    # Последняя игра и сумма очков каждого участника за один проход
+    last_games = {}
+    total_scores = {}
+    for game in stats.iter_stats(filter=lambda game: game['player_name'] in players):
+        last_games[game['player_name']] = game
+        total_scores[game['player_name']] = total_scores.get(game['player_name'], 0) + game['score']
+    
     for player in players:
-        player_games = stats.get_player_stats(player)
-        if player_games:
-            last_game = player_games[-1]  # Последняя игра
+        last_game = last_games.get(player)
+        if last_game:
             print(f"{player:20} - Счет: {last_game['score']:5} | "
                   f"Уровень: {last_game['level_reached']} | "
                   f"{'Победа' if last_game['won'] else 'Проигрыш'}")
     
     # Определить победителя
-    all_players_stats = []
-    for player in players:
-        player_games = stats.get_player_stats(player)
-        if player_games:
-            total_score = sum(g['score'] for g in player_games)
-            all_players_stats.append((player, total_score))
+    all_players_stats = [(player, total_scores[player])
+                         for player in players if player in total_scores]
     
     if all_players_stats:
         all_players_stats.sort(key=lambda x: x[1], reverse=True)
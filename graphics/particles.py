@@ -0,0 +1,250 @@
+"""
+Система частиц для эффектов разрушения кирпичей.
+
+Все частицы хранятся в заранее выделенных массивах NumPy фиксированной
+ёмкости (позиция, скорость, время жизни, индекс цвета). Обновление
+выполняется векторно над всем пулом, отрисовка - смешиванием цветов
+прямо в пикселях поверхности (pygame.surfarray). Новые частицы
+перезаписывают самые старые слоты кольцевого буфера, поэтому объекты
+Python на каждую частицу не создаются ни при обновлении, ни при
+отрисовке (кроме немногих частиц на краю экрана, которые рисуются
+спрайтами с обрезкой).
+"""
+
+import pygame
+from config import *
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+
+# Палитра частиц: цвета рядов кирпичей и белые искры
+PARTICLE_PALETTE = [
+    COLOR_RED, COLOR_BLUE, COLOR_GREEN, COLOR_YELLOW,
+    COLOR_CYAN, COLOR_MAGENTA, COLOR_WHITE,
+]
+SPARK_COLOR_INDEX = PARTICLE_PALETTE.index(COLOR_WHITE)
+
+
+class ParticleSystem:
+    """
+    Пул частиц на массивах NumPy.
+    Ёмкость фиксирована: при переполнении перезаписываются старые частицы.
+    """
+
+    def __init__(self, capacity=PARTICLE_CAPACITY, palette=PARTICLE_PALETTE, seed=0):
+        """
+        Инициализация пула
+
+        Args:
+            capacity: максимальное количество частиц
+            palette: список цветов (R, G, B), частица хранит индекс цвета
+            seed: зерно генератора (эффекты детерминированы для повторов)
+        """
+        self.capacity = capacity
+        self.palette = palette
+        self._color_index = {tuple(color): i for i, color in enumerate(palette)}
+
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.color = np.zeros(capacity, dtype=np.uint8)
+        self._cursor = 0
+        self._rng = np.random.default_rng(seed)
+
+        # Для отрисовки в пиксели: непрозрачность ступеней затухания
+        # (из 256) и смещения пикселей квадрата частицы
+        self._alpha = np.array([256 * (step + 1) // PARTICLE_FADE_STEPS
+                                for step in range(PARTICLE_FADE_STEPS)],
+                               dtype=np.uint32)
+        square = np.indices((PARTICLE_SIZE, PARTICLE_SIZE), dtype=np.int32).reshape(2, -1)
+        self._square_x, self._square_y = square[0], square[1]
+        # Таблицы смешивания по формату поверхности (см. _blend_tables)
+        self._blend_format = None
+        self._blend = None
+
+        # Спрайты для частиц на краю экрана и поверхностей не в 32 бита:
+        # по PARTICLE_FADE_STEPS ступеней прозрачности на цвет
+        self._sprites = []
+        for color in palette:
+            for step in range(PARTICLE_FADE_STEPS):
+                alpha = 255 * (step + 1) // PARTICLE_FADE_STEPS
+                sprite = pygame.Surface((PARTICLE_SIZE, PARTICLE_SIZE), pygame.SRCALPHA)
+                sprite.fill((*color, alpha))
+                self._sprites.append(sprite)
+
+    def emit(self, x, y, color_index, count, speed=(1.0, 4.0)):
+        """
+        Выпустить частицы из точки
+
+        Args:
+            x: позиция X
+            y: позиция Y
+            color_index: индекс цвета в палитре
+            count: количество частиц
+            speed: диапазон начальной скорости (мин, макс)
+        """
+        count = min(int(count), self.capacity)
+        if count <= 0:
+            return
+
+        slots = np.arange(self._cursor, self._cursor + count) % self.capacity
+        self._cursor = (self._cursor + count) % self.capacity
+
+        angle = self._rng.uniform(0.0, 2 * np.pi, count)
+        magnitude = self._rng.uniform(speed[0], speed[1], count)
+
+        self.pos[slots, 0] = x
+        self.pos[slots, 1] = y
+        self.vel[slots, 0] = np.cos(angle) * magnitude
+        self.vel[slots, 1] = np.sin(angle) * magnitude
+        self.life[slots] = self._rng.uniform(0.6, 1.0, count) * PARTICLE_LIFE
+        self.color[slots] = color_index
+
+    def emit_brick_break(self, brick, scale=1.0):
+        """
+        Выпустить осколки и искры разрушенного кирпича
+
+        Args:
+            brick: объект Brick
+            scale: множитель количества частиц (из уровня качества)
+        """
+        if scale <= 0:
+            return
+
+        cx = brick.x + brick.width / 2
+        cy = brick.y + brick.height / 2
+        color_index = self._color_index.get(tuple(brick.color), 0)
+
+        self.emit(cx, cy, color_index, PARTICLE_DEBRIS * scale)
+        self.emit(cx, cy, SPARK_COLOR_INDEX, PARTICLE_SPARKS * scale, speed=(4.0, 7.0))
+
+    def update(self):
+        """Обновить все частицы за один кадр"""
+        self.pos += self.vel
+        self.vel[:, 1] += PARTICLE_GRAVITY
+        self.life -= 1.0
+        # Частицы за нижней границей экрана больше не видны
+        self.life[self.pos[:, 1] > WINDOW_HEIGHT] = 0.0
+
+    def active_count(self):
+        """
+        Получить количество живых частиц
+
+        Returns:
+            int
+        """
+        return int(np.count_nonzero(self.life > 0))
+
+    def _fade(self, alive):
+        """Ступени затухания живых частиц"""
+        return np.minimum(
+            (self.life[alive] * PARTICLE_FADE_STEPS / PARTICLE_LIFE).astype(np.intp),
+            PARTICLE_FADE_STEPS - 1
+        )
+
+    def _blend_tables(self, screen):
+        """
+        Таблицы смешивания для 32-битной поверхности
+
+        Пиксель смешивается парами байтов (0x00FF00FF и 0xFF00FF00) в
+        целых числах: dst * (256 - a) + src * a. Для каждой пары
+        (цвет, ступень затухания) заранее посчитаны src * a обеих пар
+        и 256 - a. Таблицы пересчитываются только при смене формата.
+
+        Returns:
+            Кортеж (even, odd, inverse) массивов uint32
+        """
+        blend_format = (screen.get_masks(), screen.get_flags() & pygame.SRCALPHA)
+        if blend_format != self._blend_format:
+            packed = np.array([screen.map_rgb(color) for color in self.palette],
+                              dtype=np.uint32)
+            alpha = self._alpha[None, :]
+            even = (packed[:, None] & 0x00FF00FF) * alpha
+            odd = ((packed[:, None] >> 8) & 0x00FF00FF) * alpha
+            inverse = np.broadcast_to(256 - alpha, even.shape)
+            self._blend = (even.ravel(), odd.ravel(), inverse.ravel().copy())
+            self._blend_format = blend_format
+        return self._blend
+
+    def draw(self, screen):
+        """
+        Отрисовать живые частицы, смешивая цвета прямо в пикселях
+
+        Квадраты частиц накладываются на исходное изображение; там, где
+        частицы перекрываются, остаётся цвет одной из них. Частицы,
+        частично выходящие за край, и поверхности не в 32 бита рисуются
+        спрайтами (blits обрезает их по краю).
+
+        Args:
+            screen: pygame.Surface
+        """
+        alive = np.flatnonzero(self.life > 0)
+        if alive.size == 0:
+            return
+        if screen.get_bytesize() != 4:
+            self._draw_sprites(screen, alive)
+            return
+
+        width, height = screen.get_size()
+        x = self.pos[alive, 0].astype(np.int32)
+        y = self.pos[alive, 1].astype(np.int32)
+        inside = ((x >= 0) & (x <= width - PARTICLE_SIZE)
+                  & (y >= 0) & (y <= height - PARTICLE_SIZE))
+        if not inside.all():
+            edge = ((x > -PARTICLE_SIZE) & (x < width)
+                    & (y > -PARTICLE_SIZE) & (y < height) & ~inside)
+            if edge.any():
+                self._draw_sprites(screen, alive[edge])
+            alive, x, y = alive[inside], x[inside], y[inside]
+            if alive.size == 0:
+                return
+
+        even, odd, inverse = self._blend_tables(screen)
+        entry = self.color[alive].astype(np.intp) * PARTICLE_FADE_STEPS + self._fade(alive)
+        # Массивы (частица, пиксель квадрата); таблицы - по столбцу частиц
+        xs = x[:, None] + self._square_x
+        ys = y[:, None] + self._square_y
+
+        pixels = pygame.surfarray.pixels2d(screen)
+        try:
+            # Смешивание на месте: без временных массивов на каждую операцию
+            inv = inverse[entry, None]
+            odd_bytes = pixels[xs, ys]
+            even_bytes = odd_bytes & 0x00FF00FF
+            even_bytes *= inv
+            even_bytes += even[entry, None]
+            even_bytes >>= 8
+            even_bytes &= 0x00FF00FF
+            odd_bytes >>= 8
+            odd_bytes &= 0x00FF00FF
+            odd_bytes *= inv
+            odd_bytes += odd[entry, None]
+            odd_bytes &= 0xFF00FF00
+            odd_bytes |= even_bytes
+            pixels[xs, ys] = odd_bytes
+        finally:
+            # Поверхность заблокирована, пока существует массив пикселей
+            del pixels
+
+    def _draw_sprites(self, screen, alive):
+        """
+        Отрисовать частицы спрайтами одним пакетным blits()
+
+        Args:
+            screen: pygame.Surface
+            alive: индексы живых частиц
+        """
+        sprite_ids = (self.color[alive].astype(np.intp) * PARTICLE_FADE_STEPS
+                      + self._fade(alive)).tolist()
+        positions = self.pos[alive].astype(np.intp).tolist()
+
+        sprites = self._sprites
+        screen.blits([(sprites[i], p) for i, p in zip(sprite_ids, positions)], doreturn=False)
+
+    def clear(self):
+        """Удалить все частицы"""
+        self.life[:] = 0.0
@@ -0,0 +1,97 @@
+import pygame
+from config import *
+
+
+class ScaledPresenter:
+    """
+    Вывод логического кадра в окно произвольного размера.
+    Игра рисует в поверхность фиксированного логического размера
+    (WINDOW_WIDTH x WINDOW_HEIGHT), а презентер масштабирует её
+    с сохранением пропорций и заполняет поля по краям.
+    """
+
+    MODES = ("integer", "nearest", "smooth")
+
+    def __init__(self, window, logical_size=(WINDOW_WIDTH, WINDOW_HEIGHT), mode=SCALE_MODE):
+        """
+        Инициализация презентера
+
+        Args:
+            window: pygame.Surface окна
+            logical_size: логический размер кадра (ширина, высота)
+            mode: режим масштабирования (integer, nearest, smooth)
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Неизвестный режим масштабирования: {mode}")
+
+        self.logical_size = logical_size
+        self.mode = mode
+        self.window = None
+        self.target_rect = None
+        self._scaled = False
+        self._buffer = None
+        self._bars = []
+        self.resize(window)
+
+    def resize(self, window):
+        """
+        Пересчитать область вывода под новый размер окна
+
+        Args:
+            window: pygame.Surface окна после изменения размера
+        """
+        self.window = window
+        window_w, window_h = window.get_size()
+        logical_w, logical_h = self.logical_size
+
+        scale = min(window_w / logical_w, window_h / logical_h)
+        if self.mode == "integer" and scale >= 1:
+            scale = int(scale)
+
+        target_w = max(1, int(logical_w * scale))
+        target_h = max(1, int(logical_h * scale))
+        self.target_rect = pygame.Rect(
+            (window_w - target_w) // 2,
+            (window_h - target_h) // 2,
+            target_w,
+            target_h
+        )
+
+        # Буфер масштабированного кадра создаётся заново только при смене размера
+        self._scaled = self.target_rect.size != tuple(self.logical_size)
+        self._buffer = None
+
+        # Поля вокруг кадра (letterbox)
+        rect = self.target_rect
+        self._bars = [
+            bar for bar in (
+                pygame.Rect(0, 0, window_w, rect.top),
+                pygame.Rect(0, rect.bottom, window_w, window_h - rect.bottom),
+                pygame.Rect(0, rect.top, rect.left, rect.height),
+                pygame.Rect(rect.right, rect.top, window_w - rect.right, rect.height),
+            )
+            if bar.width > 0 and bar.height > 0
+        ]
+
+    def present(self, frame):
+        """
+        Вывести логический кадр в окно
+
+        Args:
+            frame: pygame.Surface логического размера
+        """
+        for bar in self._bars:
+            self.window.fill(COLOR_BLACK, bar)
+
+        if not self._scaled:
+            self.window.blit(frame, self.target_rect)
+            return
+
+        if self._buffer is None:
+            self._buffer = pygame.Surface(self.target_rect.size, 0, frame)
+
+        if self.mode == "smooth":
+            pygame.transform.smoothscale(frame, self.target_rect.size, self._buffer)
+        else:
+            pygame.transform.scale(frame, self.target_rect.size, self._buffer)
+        self.window.blit(self._buffer, self.target_rect)
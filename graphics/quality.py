@@ -0,0 +1,134 @@
+"""
+Адаптивное качество графики.
+
+Регулятор следит за временем кадров из главного цикла и ступенчато
+понижает или повышает детализацию отрисовки, чтобы удерживать FPS.
+На игровую логику качество не влияет.
+"""
+
+from collections import deque
+from typing import Dict, Any, List
+
+from config import (
+    FPS,
+    QUALITY_WINDOW,
+    QUALITY_DOWNGRADE_RATIO,
+    QUALITY_UPGRADE_RATIO,
+    QUALITY_UPGRADE_WINDOWS,
+)
+
+
+# Уровни детализации: от самого качественного к самому дешёвому.
+# Скругление кирпичей не снимается: в pygame 2 залитый прямоугольник
+# со скруглением рисуется быстрее, чем без него (benchmarks.py quality_levels)
+QUALITY_LEVELS: List[Dict[str, Any]] = [
+    {
+        "name": "high",
+        "border_radius": 3,
+        "brick_border": True,
+        "ball_outline": True,
+        "particle_scale": 1.0,
+    },
+    {
+        "name": "medium",
+        "border_radius": 3,
+        "brick_border": False,
+        "ball_outline": True,
+        "particle_scale": 0.5,
+    },
+    {
+        "name": "low",
+        "border_radius": 3,
+        "brick_border": False,
+        "ball_outline": False,
+        "particle_scale": 0.25,
+    },
+    {
+        "name": "minimal",
+        "border_radius": 3,
+        "brick_border": False,
+        "ball_outline": False,
+        "particle_scale": 0.0,
+    },
+]
+
+
+class QualityGovernor:
+    """
+    Регулятор качества графики по бюджету времени кадра.
+
+    Время кадров усредняется по непересекающимся окнам. Если окно
+    превышает порог понижения, качество снижается сразу на одну ступень;
+    повышение происходит только после нескольких подряд «лёгких» окон.
+    Разные пороги и асимметричные задержки (гистерезис) не дают
+    качеству колебаться между двумя уровнями.
+    """
+
+    def __init__(
+        self,
+        budget_ms: float = 1000.0 / FPS,
+        window: int = QUALITY_WINDOW,
+        levels: List[Dict[str, Any]] = QUALITY_LEVELS,
+        start_level: int = 0
+    ):
+        """
+        Инициализация регулятора.
+
+        Args:
+            budget_ms: Бюджет времени на кадр в миллисекундах.
+            window: Количество кадров в окне усреднения.
+            levels: Список уровней детализации (от лучшего к худшему).
+            start_level: Начальный индекс уровня.
+        """
+        self.budget_ms = budget_ms
+        self.window = window
+        self.levels = levels
+        self.level = max(0, min(len(levels) - 1, start_level))
+
+        self._frame_times = deque(maxlen=window)
+        self._frames_in_window = 0
+        self._light_windows = 0
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """Текущие параметры детализации."""
+        return self.levels[self.level]
+
+    def record_frame(self, frame_ms: float) -> bool:
+        """
+        Учесть время очередного кадра.
+
+        Args:
+            frame_ms: Время работы кадра в миллисекундах (без ожидания FPS).
+
+        Returns:
+            True если уровень качества изменился.
+        """
+        self._frame_times.append(frame_ms)
+        self._frames_in_window += 1
+        if self._frames_in_window < self.window:
+            return False
+
+        self._frames_in_window = 0
+        average = sum(self._frame_times) / len(self._frame_times)
+
+        if average > self.budget_ms * QUALITY_DOWNGRADE_RATIO:
+            self._light_windows = 0
+            if self.level < len(self.levels) - 1:
+                self._set_level(self.level + 1)
+                return True
+        elif average < self.budget_ms * QUALITY_UPGRADE_RATIO:
+            self._light_windows += 1
+            if self._light_windows >= QUALITY_UPGRADE_WINDOWS and self.level > 0:
+                self._set_level(self.level - 1)
+                return True
+        else:
+            self._light_windows = 0
+
+        return False
+
+    def _set_level(self, level: int) -> None:
+        """Переключить уровень и начать наблюдение заново."""
+        self.level = level
+        self._frame_times.clear()
+        self._light_windows = 0
@@ -1,5 +1,6 @@
 import pygame
 from config import *
+from graphics.quality import QUALITY_LEVELS
 
 
 class Renderer:
@@ -19,6 +20,16 @@ class Renderer:
         self.font_large = pygame.font.Font(None, FONT_SIZE_LARGE)
         self.font_medium = pygame.font.Font(None, FONT_SIZE_MEDIUM)
         self.font_small = pygame.font.Font(None, FONT_SIZE_SMALL)
+        self.quality = QUALITY_LEVELS[0]
+
+    def set_quality(self, settings):
+        """
+        Установить уровень детализации отрисовки
+        
+        Args:
+            settings: словарь параметров из QUALITY_LEVELS
+        """
+        self.quality = settings
 
     def draw_paddle(self, paddle):
         """
@@ -41,7 +52,8 @@ class Renderer:
         """
         pygame.draw.circle(self.screen, COLOR_YELLOW, (int(ball.x), int(ball.y)), ball.radius)
         # Добавить белый контур для эффекта
-        pygame.draw.circle(self.screen, COLOR_WHITE, (int(ball.x), int(ball.y)), ball.radius, 1)
+        if self.quality["ball_outline"]:
+            pygame.draw.circle(self.screen, COLOR_WHITE, (int(ball.x), int(ball.y)), ball.radius, 1)
 
     def draw_bricks(self, bricks):
         """
@@ -50,23 +62,27 @@ class Renderer:
         Args:
             bricks: список объектов Brick
         """
+        radius = self.quality["border_radius"]
+        draw_border = self.quality["brick_border"]
+        
         for brick in bricks:
             if not brick.is_destroyed:
                 rect = brick.get_rect()
                 # Основной кирпич
-                pygame.draw.rect(self.screen, brick.color, rect, border_radius=3)
+                pygame.draw.rect(self.screen, brick.color, rect, border_radius=radius)
                 # Контур для глубины
-                pygame.draw.rect(self.screen, COLOR_WHITE, rect, 1, border_radius=3)
-                # Верхняя грань для 3D эффекта
-                pygame.draw.line(
-                    self.screen,
-                    (min(brick.color[0] + 50, 255), 
-                     min(brick.color[1] + 50, 255), 
-                     min(brick.color[2] + 50, 255)),
-                    (rect.left, rect.top),
-                    (rect.right, rect.top),
-                    2
-                )
+                if draw_border:
+                    pygame.draw.rect(self.screen, COLOR_WHITE, rect, 1, border_radius=radius)
+
+    def draw_particles(self, particles):
+        """
+        Отрисовать частицы, если их допускает уровень качества
+        
+        Args:
+            particles: объект ParticleSystem
+        """
+        if self.quality["particle_scale"] > 0:
+            particles.draw(self.screen)
 
     def draw_menu(self):
         """Отрисовать экран меню"""
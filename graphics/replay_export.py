@@ -0,0 +1,150 @@
+"""
+Экспорт записи игры в последовательность кадров.
+
+Кадры рисуются во внеэкранную поверхность теми же вызовами отрисовки,
+что и в игре. Диапазон кадров делится на непрерывные отрезки между
+процессами; каждый процесс прокручивает симуляцию без отрисовки до
+начала своего отрезка и рисует только свои кадры.
+"""
+
+import os
+import shutil
+import multiprocessing
+from typing import List, Optional, Tuple
+
+from core.replay import Replay
+
+# Форматы экспорта
+EXPORT_FORMATS = ("png", "rgb")
+
+
+def split_range(start: int, end: int, parts: int) -> List[Tuple[int, int]]:
+    """
+    Разбить диапазон кадров на непрерывные отрезки примерно равной длины.
+
+    Args:
+        start: Первый кадр (включительно).
+        end: Последний кадр (не включительно).
+        parts: Количество отрезков.
+
+    Returns:
+        Список пар (начало, конец) без пустых отрезков.
+    """
+    total = max(0, end - start)
+    parts = max(1, min(parts, total)) if total else 1
+    base, extra = divmod(total, parts)
+
+    segments = []
+    position = start
+    for i in range(parts):
+        length = base + (1 if i < extra else 0)
+        if length:
+            segments.append((position, position + length))
+        position += length
+    return segments
+
+
+def _init_worker() -> None:
+    """Настроить процесс-исполнитель на работу без окна и звуковой карты."""
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+
+def _segment_path(output: str, start: int) -> str:
+    """Путь к временному файлу отрезка для формата rgb."""
+    return f"{output}.part{start:08d}"
+
+
+def _render_segment(replay_path: str, start: int, end: int,
+                    output: str, fmt: str) -> int:
+    """
+    Отрисовать отрезок кадров записи.
+
+    Args:
+        replay_path: Путь к файлу записи.
+        start: Первый кадр отрезка.
+        end: Кадр, следующий за последним.
+        output: Директория (png) или итоговый файл (rgb).
+        fmt: Формат экспорта.
+
+    Returns:
+        Количество отрисованных кадров.
+    """
+    import pygame
+    from main import Game
+
+    replay = Replay.load(replay_path)
+    game = Game(replay.player_name, replay.difficulty, replay.max_levels, headless=True)
+
+    rendered = 0
+    stream = open(_segment_path(output, start), 'wb') if fmt == "rgb" else None
+    try:
+        for index in range(end):
+            keys_down, held = replay.frames[index]
+            game.apply_input(keys_down, held)
+            game.update()
+            if not game.running:
+                break
+            if index < start:
+                continue
+
+            game.render()
+            if stream is not None:
+                stream.write(pygame.image.tobytes(game.screen, "RGB"))
+            else:
+                frame_path = os.path.join(output, f"frame_{index:06d}.png")
+                pygame.image.save(game.screen, frame_path)
+            rendered += 1
+    finally:
+        if stream is not None:
+            stream.close()
+        pygame.quit()
+
+    return rendered
+
+
+def export_replay(replay_path: str, output: str, fmt: str = "png",
+                  workers: Optional[int] = None, start: int = 0,
+                  end: Optional[int] = None) -> int:
+    """
+    Экспортировать запись в кадры.
+
+    Args:
+        replay_path: Путь к файлу записи.
+        output: Директория для PNG кадров или файл для сырого RGB потока.
+        fmt: "png" - по файлу на кадр, "rgb" - один поток кадров RGB24.
+        workers: Количество процессов (по умолчанию - число ядер).
+        start: Первый экспортируемый кадр.
+        end: Кадр, следующий за последним (по умолчанию - конец записи).
+
+    Returns:
+        Количество экспортированных кадров.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат экспорта: {fmt}")
+
+    total = len(Replay.load(replay_path))
+    end = total if end is None else min(end, total)
+    segments = split_range(max(0, start), end, workers or os.cpu_count() or 1)
+    if not segments:
+        return 0
+
+    if fmt == "png":
+        os.makedirs(output, exist_ok=True)
+
+    tasks = [(replay_path, seg_start, seg_end, output, fmt)
+             for seg_start, seg_end in segments]
+
+    with multiprocessing.Pool(len(tasks), initializer=_init_worker) as pool:
+        counts = pool.starmap(_render_segment, tasks)
+
+    if fmt == "rgb":
+        # Склеить отрезки по порядку в один поток
+        with open(output, 'wb') as out:
+            for seg_start, _ in segments:
+                part = _segment_path(output, seg_start)
+                with open(part, 'rb') as f:
+                    shutil.copyfileobj(f, out)
+                os.remove(part)
+
+    return sum(counts)
@@ -7,11 +7,23 @@
 
 import pygame
 import argparse
+import os
+import sys
 import time
-from typing import Optional
+from datetime import datetime
+from typing import Optional, List, Tuple
 from config import *
-from core.stats_manager import StatsManager
-from audio.sound_manager import SoundManager  # ← ДОБАВЛЕНО
+from core.stats_manager import StatsManager, QUERY_SORT_KEYS
+from core.stats_output import write_records, OUTPUT_FORMATS
+from core.stats_writer import StatsWriter
+from audio.backends import AudioBackend, AUDIO_BACKENDS, create_audio_backend
+from graphics.renderer import Renderer
+from graphics.quality import QualityGovernor
+from graphics.presenter import ScaledPresenter
+from graphics.particles import ParticleSystem, NUMPY_AVAILABLE
+from core.replay import Replay, INPUT_LEFT, INPUT_RIGHT
+from core.events import (EventQueue, EventConsumer, WALL_HIT, PADDLE_HIT,
+                         BRICK_DESTROYED, BALL_LOST, LEVEL_COMPLETE, BALL_LAUNCH)
 
 
 class Paddle:
@@ -122,7 +134,8 @@ class BrickGroup:
 class Ball:
     """Класс шара."""
     
-    def __init__(self, x: float, y: float, speed_multiplier: float = 1.0, sound_manager=None):
+    def __init__(self, x: float, y: float, speed_multiplier: float = 1.0,
+                 events: Optional[EventQueue] = None):
         """
         Инициализация шара.
         
@@ -130,7 +143,7 @@ class Ball:
             x: Начальная позиция X.
             y: Начальная позиция Y.
             speed_multiplier: Множитель скорости шара.
-            sound_manager: Менеджер звуков.
+            events: Очередь, в которую шар складывает свои события.
         """
         self.x = x
         self.y = y
@@ -140,7 +153,7 @@ class Ball:
         self.speed = BALL_SPEED * speed_multiplier
         self.max_speed = BALL_MAX_SPEED * speed_multiplier
         self.is_active = False
-        self.sound_manager = sound_manager  # ← ДОБАВЛЕНО
+        self.events = events
 
     def launch(self) -> None:
         """Запустить шар."""
@@ -151,9 +164,8 @@ class Ball:
         self.vy = self.speed * math.sin(rad)
         self.is_active = True
         
-        # Звук запуска
-        if self.sound_manager:
-            self.sound_manager.play_ball_launch()  # ← ДОБАВЛЕНО
+        if self.events is not None:
+            self.events.push(BALL_LAUNCH, self.x, self.y)
 
     def update(self) -> None:
         """Обновить позицию шара."""
@@ -164,14 +176,14 @@ class Ball:
         if self.x - self.radius < 0 or self.x + self.radius > WINDOW_WIDTH:
             self.vx = -self.vx
             self.x = max(self.radius, min(WINDOW_WIDTH - self.radius, self.x))
-            if self.sound_manager:
-                self.sound_manager.play_wall_hit()  # ← ДОБАВЛЕНО
+            if self.events is not None:
+                self.events.push(WALL_HIT, self.x, self.y)
 
         if self.y - self.radius < 0:
             self.vy = -self.vy
             self.y = max(self.radius, self.y)
-            if self.sound_manager:
-                self.sound_manager.play_wall_hit()  # ← ДОБАВЛЕНО
+            if self.events is not None:
+                self.events.push(WALL_HIT, self.x, self.y)
 
     def is_out_of_bounds(self) -> bool:
         """Проверить, вышел ли шар за нижнюю границу."""
@@ -314,7 +326,12 @@ class Game:
     """
     
     def __init__(self, player_name: str = "Player", difficulty: str = "medium", 
-                 max_levels: int = MAX_LEVEL):
+                 max_levels: int = MAX_LEVEL, headless: bool = False,
+                 window_size: Optional[Tuple[int, int]] = None,
+                 fullscreen: bool = False, scale_mode: str = SCALE_MODE,
+                 audio: Optional[AudioBackend] = None,
+                 stats_writer: Optional[StatsWriter] = None,
+                 quality_governor: Optional[QualityGovernor] = None):
         """
         Инициализация игры.
         
@@ -322,11 +339,41 @@ class Game:
             player_name: Имя игрока.
             difficulty: Уровень сложности (easy, medium, hard).
             max_levels: Максимальный номер уровня.
+            headless: Рисовать во внеэкранную поверхность без окна.
+                В этом режиме результаты игр не сохраняются.
+            window_size: Размер окна (по умолчанию - логический размер).
+            fullscreen: Полноэкранный режим с разрешением рабочего стола.
+            scale_mode: Режим масштабирования (integer, nearest, smooth).
+            audio: Звуковой бэкенд (по умолчанию - AUDIO_BACKEND из config,
+                без окна - null).
+            stats_writer: Фоновая запись статистики (по умолчанию - новая
+                для StatsManager с настройками из config; без окна - нет).
+            quality_governor: Регулятор качества графики (по умолчанию -
+                новый, если включён QUALITY_AUTO).
         """
-        pygame.init()
+        # Микшер не инициализируется здесь: его открывает звуковой бэкенд
+        # в фоне, чтобы первый кадр меню не ждал звуковое устройство
+        if not headless:
+            pygame.display.init()
+        pygame.font.init()
         
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-        pygame.display.set_caption("Breakout Game")
+        self.headless = headless
+        self.fullscreen = fullscreen
+        self.scale_mode = scale_mode
+        self.presenter = None
+        
+        # Игра всегда рисует в логическую поверхность WINDOW_WIDTH x WINDOW_HEIGHT
+        if headless:
+            self.screen = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        else:
+            if fullscreen:
+                window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+            else:
+                window = pygame.display.set_mode(window_size or (WINDOW_WIDTH, WINDOW_HEIGHT),
+                                                 pygame.RESIZABLE)
+            pygame.display.set_caption("Breakout Game")
+            self.screen = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+            self.presenter = ScaledPresenter(window, mode=scale_mode)
         
         self.clock = pygame.time.Clock()
         self.running = True
@@ -340,12 +387,22 @@ class Game:
         self.paddle = Paddle(self.level.speed_multiplier)
         
         # Менеджеры
-        self.stats_manager = StatsManager()
-        self.sound_manager = SoundManager()  # ← ДОБАВЛЕНО
+        # Результаты сохраняются в фоновом потоке, не задерживая кадр.
+        # Без окна они не сохраняются, и директория статистики не открывается
+        if stats_writer is None and not headless:
+            stats_writer = StatsWriter(StatsManager())
+        self.stats_writer = stats_writer
+        self.stats_manager = None if stats_writer is None else stats_writer.stats_manager
+        if audio is None:
+            audio = create_audio_backend("null" if headless else None)
+        self.sound_manager = audio
+        
+        # События шага физики и их потребители
+        self.events = EventQueue()
+        self.event_consumers = []
         
-        # Шар с звуком
         self.ball = Ball(WINDOW_WIDTH // 2, PADDLE_Y - 10, 
-                        self.level.speed_multiplier, self.sound_manager)  # ← ДОБАВЛЕНО
+                        self.level.speed_multiplier, self.events)
         
         # Состояние игры
         self.state = GameState.MENU
@@ -356,7 +413,18 @@ class Game:
         self.font_medium = pygame.font.Font(None, FONT_SIZE_MEDIUM)
         self.font_small = pygame.font.Font(None, FONT_SIZE_SMALL)
         
+        # Отрисовка и адаптивное качество
+        # Регулятор переживает перезапуск: качество подобрано под машину
+        if quality_governor is None and QUALITY_AUTO:
+            quality_governor = QualityGovernor()
+        self.quality_governor = quality_governor
+        self.renderer = Renderer(self.screen)
+        if quality_governor is not None:
+            self.renderer.set_quality(quality_governor.settings)
+        self.particles = ParticleSystem() if NUMPY_AVAILABLE else None
+        
         self._init_level()
+        self.sound_manager.play_music("menu")
 
     def _init_level(self) -> None:
         """Инициализировать текущий уровень."""
@@ -370,88 +438,191 @@ class Game:
 
     def handle_events(self) -> None:
         """Обработать события."""
+        keys_down, held = self.poll_input()
+        self.apply_input(keys_down, held)
+
+    def poll_input(self) -> Tuple[List[int], int]:
+        """
+        Считать ввод текущего кадра.
+        
+        Returns:
+            Кортеж (коды нажатых в кадре клавиш, маска удерживаемых стрелок).
+        """
+        keys_down = []
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
-                
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    if self.state == GameState.MENU:
+                keys_down.append(event.key)
+            elif event.type == pygame.VIDEORESIZE and self.presenter is not None:
+                window = pygame.display.get_surface()
+                if window.get_size() != event.size:
+                    window = pygame.display.set_mode(event.size, pygame.RESIZABLE)
+                self.presenter.resize(window)
+        
+        pressed = pygame.key.get_pressed()
+        held = 0
+        if pressed[pygame.K_LEFT]:
+            held |= INPUT_LEFT
+        if pressed[pygame.K_RIGHT]:
+            held |= INPUT_RIGHT
+        
+        return keys_down, held
+
+    def apply_input(self, keys_down: List[int], held: int) -> None:
+        """
+        Применить ввод кадра к состоянию игры.
+        
+        Args:
+            keys_down: Коды клавиш, нажатых в этом кадре.
+            held: Маска удерживаемых стрелок (INPUT_LEFT/INPUT_RIGHT).
+        """
+        for key in keys_down:
+            if key == pygame.K_SPACE:
+                if self.state == GameState.MENU:
+                    self.state = GameState.PLAYING
+                    self.start_time = time.time()
+                    self.sound_manager.play_level_start()  # ← ДОБАВЛЕНО
+                    self.sound_manager.play_music(f"level_{self.level.level_number}")
+                    
+                elif self.state == GameState.PLAYING and not self.ball.is_active:
+                    self.ball.launch()
+                    
+                elif self.state == GameState.LEVEL_COMPLETE:
+                    if self.level.level_number >= self.max_levels:
+                        self.state = GameState.WIN
+                        self.sound_manager.play_victory()  # ← ДОБАВЛЕНО
+                        self.sound_manager.play_music("victory")
+                    else:
+                        self.level = self.level.next_level()
+                        self.paddle = Paddle(self.level.speed_multiplier)
+                        self.ball = Ball(WINDOW_WIDTH // 2, PADDLE_Y - 10, 
+                                       self.level.speed_multiplier, self.events)
+                        self._init_level()
                         self.state = GameState.PLAYING
-                        self.start_time = time.time()
-                        self.sound_manager.play_level_start()  # ← ДОБАВЛЕНО
+                        self.sound_manager.play_music(f"level_{self.level.level_number}")
                         
-                    elif self.state == GameState.PLAYING and not self.ball.is_active:
-                        self.ball.launch()
-                        
-                    elif self.state == GameState.LEVEL_COMPLETE:
-                        if self.level.level_number >= self.max_levels:
-                            self.state = GameState.WIN
-                            self.sound_manager.play_victory()  # ← ДОБАВЛЕНО
-                        else:
-                            self.level = self.level.next_level()
-                            self.paddle = Paddle(self.level.speed_multiplier)
-                            self.ball = Ball(WINDOW_WIDTH // 2, PADDLE_Y - 10, 
-                                           self.level.speed_multiplier, self.sound_manager)
-                            self._init_level()
-                            self.state = GameState.PLAYING
-                            
-                    elif self.state in (GameState.GAME_OVER, GameState.WIN):
-                        self._save_result()
-                        self.__init__(self.player_name, self.difficulty, self.max_levels)
-                        
-                elif event.key == pygame.K_ESCAPE:
-                    if self.state == GameState.PLAYING:
-                        self.state = GameState.PAUSED
-                    elif self.state == GameState.PAUSED:
-                        self.state = GameState.PLAYING
-                    else:
-                        self._save_result()
-                        self.running = False
+                elif self.state in (GameState.GAME_OVER, GameState.WIN):
+                    self._save_result()
+                    self._restart()
+                    
+            elif key == pygame.K_ESCAPE:
+                if self.state == GameState.PLAYING:
+                    self.state = GameState.PAUSED
+                elif self.state == GameState.PAUSED:
+                    self.state = GameState.PLAYING
+                else:
+                    self._save_result()
+                    self.running = False
 
         # Постоянные нажатия клавиш
         if self.state == GameState.PLAYING:
-            keys = pygame.key.get_pressed()
-            if keys[pygame.K_LEFT]:
+            if held & INPUT_LEFT:
                 self.paddle.move_left()
-            if keys[pygame.K_RIGHT]:
+            if held & INPUT_RIGHT:
                 self.paddle.move_right()
 
     def update(self) -> None:
         """Обновить логику игры."""
-        if self.state != GameState.PLAYING:
-            return
+        if self.particles is not None and self.state != GameState.PAUSED:
+            self.particles.update()
+        
+        if self.state == GameState.PLAYING:
+            self._step_physics()
+        
+        self._process_events()
 
+    def _step_physics(self) -> None:
+        """Шаг физики: движение и столкновения. Последствия - только события."""
+        events = self.events
         self.ball.update()
         
         # Столкновение с платформой
         if self.ball.check_paddle_collision(self.paddle.get_rect()):
-            self.sound_manager.play_paddle_hit()  # ← ДОБАВЛЕНО
+            events.push(PADDLE_HIT, self.ball.x, self.ball.y)
         
         # Столкновения с кирпичами
         for brick in self.level.bricks.get_active_bricks():
             collided, _ = self.ball.check_brick_collision(brick.get_rect())
             if collided:
                 brick.destroy()
-                self.level.on_brick_destroyed()
-                self.ball.increase_speed(1.01)
-                self.sound_manager.play_brick_hit()  # ← ДОБАВЛЕНО
+                events.push(BRICK_DESTROYED, self.ball.x, self.ball.y, brick)
         
         self.level.bricks.remove_destroyed()
         
         # Потеря шара
         if self.ball.is_out_of_bounds():
-            self.sound_manager.play_ball_lost()  # ← ДОБАВЛЕНО
-            if not self.level.on_ball_lost():
-                self.state = GameState.GAME_OVER
-                self.sound_manager.play_game_over()  # ← ДОБАВЛЕНО
-            else:
-                self.ball.reset(self.paddle.x, self.paddle.width)
+            events.push(BALL_LOST, self.ball.x, self.ball.y)
         
         # Завершение уровня
         if self.level.is_complete():
-            self.state = GameState.LEVEL_COMPLETE
-            self.sound_manager.play_level_complete()  # ← ДОБАВЛЕНО
+            events.push(LEVEL_COMPLETE)
+
+    def _process_events(self) -> None:
+        """Обработать события шага пакетом: счёт, жизни, звук, частицы."""
+        events = self.events
+        if not events.count:
+            return
+        
+        audio = self.sound_manager
+        kinds = events.kinds
+        bricks_destroyed = 0
+        
+        for i in range(events.count):
+            kind = kinds[i]
+            
+            if kind == BRICK_DESTROYED:
+                bricks_destroyed += 1
+                self.level.on_brick_destroyed()
+                if self.particles is not None:
+                    self.particles.emit_brick_break(events.refs[i],
+                                                    self.renderer.quality["particle_scale"])
+                audio.play_brick_hit(events.xs[i])
+            
+            elif kind == WALL_HIT:
+                audio.play_wall_hit(events.xs[i])
+            
+            elif kind == PADDLE_HIT:
+                audio.play_paddle_hit(events.xs[i])
+            
+            elif kind == BALL_LAUNCH:
+                audio.play_ball_launch()
+            
+            elif kind == BALL_LOST:
+                audio.play_ball_lost()
+                if not self.level.on_ball_lost():
+                    self.state = GameState.GAME_OVER
+                    audio.play_game_over()
+                    audio.play_music(None)
+                else:
+                    self.ball.reset(self.paddle.x, self.paddle.width)
+            
+            elif kind == LEVEL_COMPLETE:
+                self.state = GameState.LEVEL_COMPLETE
+                audio.play_level_complete()
+                # Следующий трек готовится, пока игрок смотрит экран уровня
+                if self.level.level_number >= self.max_levels:
+                    audio.preload_music("victory")
+                else:
+                    audio.preload_music(f"level_{self.level.level_number + 1}")
+        
+        # Ускорение за все кирпичи шага разом (1.01 за каждый)
+        if bricks_destroyed:
+            self.ball.increase_speed(1.01 ** bricks_destroyed)
+        
+        for consumer in self.event_consumers:
+            consumer(events)
+        
+        events.clear()
+
+    def add_event_consumer(self, consumer: EventConsumer) -> None:
+        """
+        Подписаться на пакеты игровых событий (статистика, телеметрия).
+        
+        Args:
+            consumer: Функция, получающая EventQueue после обработки шага.
+        """
+        self.event_consumers.append(consumer)
 
     def render(self) -> None:
         """Отрисовать экран."""
@@ -475,7 +646,9 @@ class Game:
         elif self.state == GameState.WIN:
             self._draw_victory()
         
-        pygame.display.flip()
+        if self.presenter is not None:
+            self.presenter.present(self.screen)
+            pygame.display.flip()
 
     def _draw_menu(self) -> None:
         """Отрисовать меню."""
@@ -495,22 +668,12 @@ class Game:
 
     def _draw_game(self) -> None:
         """Отрисовать игровой экран."""
-        # Платформа
-        paddle_rect = self.paddle.get_rect()
-        pygame.draw.rect(self.screen, COLOR_WHITE, paddle_rect, border_radius=5)
-        pygame.draw.rect(self.screen, COLOR_CYAN, paddle_rect, 2, border_radius=5)
-        
-        # Шар
-        pygame.draw.circle(self.screen, COLOR_YELLOW, (int(self.ball.x), int(self.ball.y)), 
-                          self.ball.radius)
-        pygame.draw.circle(self.screen, COLOR_WHITE, (int(self.ball.x), int(self.ball.y)), 
-                          self.ball.radius, 1)
-        
-        # Кирпичи
-        for brick in self.level.bricks.get_active_bricks():
-            brick_rect = brick.get_rect()
-            pygame.draw.rect(self.screen, brick.color, brick_rect, border_radius=3)
-            pygame.draw.rect(self.screen, COLOR_WHITE, brick_rect, 1, border_radius=3)
+        # Платформа, шар и кирпичи
+        self.renderer.draw_paddle(self.paddle)
+        self.renderer.draw_ball(self.ball)
+        self.renderer.draw_bricks(self.level.bricks.get_active_bricks())
+        if self.particles is not None:
+            self.renderer.draw_particles(self.particles)
         
         # UI
         level_text = self.font_small.render(f"Level: {self.level.level_number}", True, COLOR_GREEN)
@@ -576,19 +739,42 @@ class Game:
         self.screen.blit(menu_text, (WINDOW_WIDTH // 2 - menu_text.get_width() // 2,
                                     WINDOW_HEIGHT // 2 + 60))
 
+    def _restart(self) -> None:
+        """
+        Начать новую игру с теми же параметрами.
+
+        Окно, звуковой бэкенд, запись статистики, регулятор качества
+        и подписчики событий сохраняются.
+        """
+        window_size = None
+        if self.presenter is not None:
+            window_size = self.presenter.window.get_size()
+        
+        consumers = self.event_consumers
+        self.__init__(self.player_name, self.difficulty, self.max_levels,
+                      headless=self.headless, window_size=window_size,
+                      fullscreen=self.fullscreen, scale_mode=self.scale_mode,
+                      audio=self.sound_manager, stats_writer=self.stats_writer,
+                      quality_governor=self.quality_governor)
+        self.event_consumers = consumers
+
     def _save_result(self) -> None:
         """Сохранить результат игры."""
+        if self.headless:
+            return
+        
         game_duration = time.time() - self.start_time
         is_win = self.state == GameState.WIN
         
-        self.stats_manager.save_game_result(
+        # Запись создаётся сейчас, а на диск попадает из фонового потока
+        self.stats_writer.submit(self.stats_manager.make_record(
             player_name=self.player_name,
             score=self.level.score,
             level_reached=self.level.level_number,
             difficulty=self.difficulty,
             game_duration=game_duration,
             win=is_win
-        )
+        ))
         
         print(f"\n✓ Результат сохранен для игрока {self.player_name}")
         print(f"  Счет: {self.level.score}")
@@ -596,17 +782,70 @@ class Game:
         print(f"  Сложность: {self.difficulty}")
         print(f"  Результат: {'Победа' if is_win else 'Проигрыш'}")
 
-    def run(self) -> None:
-        """Главный игровой цикл."""
+    def run(self, record_path: Optional[str] = None) -> None:
+        """
+        Главный игровой цикл.
+        
+        Args:
+            record_path: Путь для сохранения записи сессии (None - не записывать).
+        """
+        replay = None
+        if record_path:
+            replay = Replay(self.player_name, self.difficulty, self.max_levels)
+        
         while self.running:
-            self.handle_events()
+            frame_start = time.perf_counter()
+            keys_down, held = self.poll_input()
+            if replay is not None:
+                replay.add_frame(keys_down, held)
+            self.apply_input(keys_down, held)
             self.update()
+            self.sound_manager.end_frame()
             self.render()
+            
+            # Время работы кадра без ожидания clock.tick
+            if self.quality_governor is not None:
+                frame_ms = (time.perf_counter() - frame_start) * 1000
+                if self.quality_governor.record_frame(frame_ms):
+                    self.renderer.set_quality(self.quality_governor.settings)
+            
             self.clock.tick(FPS)
         
+        if replay is not None:
+            replay.save(record_path)
+            print(f"✓ Запись сохранена: {record_path} ({len(replay)} кадров)")
+        
+        # Дождаться сохранения результатов из очереди
+        if self.stats_writer is not None:
+            self.stats_writer.close()
         pygame.quit()
 
 
+def parse_date(value: str) -> str:
+    """
+    Разобрать дату или момент времени из командной строки.
+    
+    Args:
+        value: Дата в формате ISO (например, 2024-05-01 или 2024-05-01T18:30).
+    
+    Returns:
+        Момент в виде ISO строки, сравнимой с записями статистики
+        (местное время без часового пояса).
+    
+    Raises:
+        argparse.ArgumentTypeError: Если строка не является датой ISO.
+    """
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"некорректная дата: {value!r} (ожидается ISO, например 2024-05-01)")
+    if moment.tzinfo is not None:
+        # Записи хранят местное время без часового пояса
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment.isoformat()
+
+
 def create_argument_parser() -> argparse.ArgumentParser:
     """
     Создать парсер аргументов командной строки.
@@ -622,6 +861,7 @@ def create_argument_parser() -> argparse.ArgumentParser:
   python main.py --name "Player1" --difficulty hard
   python main.py -n "MyName" -d easy --levels 3
   python main.py --show-stats
+  python main.py --query --player "Player1" --won --sort score --desc --limit 10 --format csv
         """
     )
     
@@ -674,6 +914,216 @@ def create_argument_parser() -> argparse.ArgumentParser:
         help='Очистить всю сохраненную статистику и выйти'
     )
     
+    parser.add_argument(
+        '--rebuild-stats',
+        action='store_true',
+        help='Перестроить индексы статистики по журналу и выйти'
+    )
+    
+    parser.add_argument(
+        '--verify-stats',
+        action='store_true',
+        help='Сверить индексы и агрегаты статистики с журналом и выйти'
+    )
+    
+    parser.add_argument(
+        '--percentile',
+        type=int,
+        default=None,
+        metavar='SCORE',
+        help='Показать процентильный ранг счёта, квантили и гистограмму и выйти'
+    )
+    
+    parser.add_argument(
+        '--merge-distribution',
+        action='append',
+        default=[],
+        metavar='FILE',
+        help='Прибавить к --percentile распределение другой машины (можно повторять)'
+    )
+    
+    parser.add_argument(
+        '--query',
+        action='store_true',
+        help='Вывести игры по фильтрам (--player, --since, --won, ...) потоком'
+    )
+    
+    parser.add_argument(
+        '--player',
+        type=str,
+        default=None,
+        metavar='NAME',
+        help='Запрос: только игры этого игрока'
+    )
+    
+    parser.add_argument(
+        '--query-difficulty',
+        type=str,
+        choices=['easy', 'medium', 'hard'],
+        default=None,
+        help='Запрос: только игры этой сложности'
+    )
+    
+    parser.add_argument(
+        '--since',
+        type=parse_date,
+        default=None,
+        metavar='DATE',
+        help='Запрос: только игры не раньше даты (ISO, например 2024-05-01)'
+    )
+    
+    parser.add_argument(
+        '--until',
+        type=parse_date,
+        default=None,
+        metavar='DATE',
+        help='Запрос: только игры раньше даты (ISO)'
+    )
+    
+    result_group = parser.add_mutually_exclusive_group()
+    result_group.add_argument(
+        '--won',
+        dest='won',
+        action='store_const',
+        const=True,
+        default=None,
+        help='Запрос: только победы'
+    )
+    result_group.add_argument(
+        '--lost',
+        dest='won',
+        action='store_const',
+        const=False,
+        help='Запрос: только поражения'
+    )
+    
+    parser.add_argument(
+        '--min-score',
+        type=int,
+        default=None,
+        metavar='SCORE',
+        help='Запрос: только игры со счётом не меньше SCORE'
+    )
+    
+    parser.add_argument(
+        '--sort',
+        type=str,
+        choices=list(QUERY_SORT_KEYS),
+        default='time',
+        help='Запрос: ключ сортировки (по умолчанию: time)'
+    )
+    
+    parser.add_argument(
+        '--desc',
+        action='store_true',
+        help='Запрос: сортировать по убыванию'
+    )
+    
+    parser.add_argument(
+        '--limit',
+        type=int,
+        default=None,
+        metavar='N',
+        help='Запрос и --show-player-stats: вывести не больше N игр'
+    )
+    
+    parser.add_argument(
+        '--offset',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Запрос и --show-player-stats: пропустить первые N игр'
+    )
+    
+    parser.add_argument(
+        '--format',
+        type=str,
+        choices=list(OUTPUT_FORMATS),
+        default='table',
+        help='Запрос: формат вывода (json выводится построчно, JSON Lines)'
+    )
+    
+    parser.add_argument(
+        '--compact-stats',
+        action='store_true',
+        help='Разложить журналы статистики по разделам-месяцам, применить срок хранения и выйти'
+    )
+    
+    parser.add_argument(
+        '--import-stats',
+        type=str,
+        metavar='FILE',
+        help='Импортировать статистику из JSON или JSONL файла и выйти'
+    )
+    
+    parser.add_argument(
+        '--window-size',
+        type=str,
+        default=None,
+        metavar='WxH',
+        help=f'Размер окна, например 1920x1080 (по умолчанию: {WINDOW_WIDTH}x{WINDOW_HEIGHT})'
+    )
+    
+    parser.add_argument(
+        '--fullscreen',
+        action='store_true',
+        help='Полноэкранный режим'
+    )
+    
+    parser.add_argument(
+        '--scale-mode',
+        type=str,
+        choices=list(ScaledPresenter.MODES),
+        default=SCALE_MODE,
+        help=f'Режим масштабирования кадра (по умолчанию: {SCALE_MODE})'
+    )
+    
+    parser.add_argument(
+        '--audio',
+        type=str,
+        choices=[name for name in AUDIO_BACKENDS if name != 'recording'],
+        default=AUDIO_BACKEND,
+        help=f'Звуковой бэкенд (по умолчанию: {AUDIO_BACKEND})'
+    )
+    
+    parser.add_argument(
+        '--record',
+        type=str,
+        metavar='FILE',
+        help='Записать ввод игры в файл для последующего повтора'
+    )
+    
+    parser.add_argument(
+        '--export-replay',
+        type=str,
+        metavar='FILE',
+        help='Экспортировать запись в кадры и выйти'
+    )
+    
+    parser.add_argument(
+        '--export-out',
+        type=str,
+        default='frames',
+        metavar='PATH',
+        help='Директория для PNG или файл для RGB потока (по умолчанию: frames)'
+    )
+    
+    parser.add_argument(
+        '--export-format',
+        type=str,
+        choices=['png', 'rgb'],
+        default='png',
+        help='Формат экспорта кадров (по умолчанию: png)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        metavar='N',
+        help='Количество процессов экспорта (по умолчанию: число ядер)'
+    )
+    
     return parser
 
 
@@ -686,6 +1136,34 @@ def display_statistics(args) -> None:
     """
     stats_manager = StatsManager()
     
+    if args.import_stats:
+        count = stats_manager.import_stats(args.import_stats)
+        print(f"✓ Импортировано записей: {count}")
+        return
+    
+    if args.verify_stats:
+        report = stats_manager.verify_indexes()
+        for name, problems in report.items():
+            if problems:
+                print(f"✗ {name}: {'; '.join(problems)}")
+            else:
+                print(f"✓ {name}: совпадает с журналом")
+        if any(report.values()):
+            print("Перестроить индексы: python main.py --rebuild-stats")
+        return
+    
+    if args.compact_stats:
+        folded = stats_manager.compact_stats(force=True)
+        print(f"✓ Журналов разложено по разделам: {folded}")
+        for month, info in sorted(stats_manager.storage.partitions().items()):
+            print(f"  {month}: {info['count']} игр, лучший счёт {info['max_score']}")
+        return
+    
+    if args.rebuild_stats:
+        rebuilt = stats_manager.rebuild_indexes()
+        print(f"✓ Индексы перестроены: {', '.join(rebuilt) or 'не требуются'}")
+        return
+    
     if args.clear_stats:
         if stats_manager.clear_stats():
             print("✓ Статистика успешно очищена")
@@ -693,8 +1171,32 @@ def display_statistics(args) -> None:
             print("✗ Ошибка при очистке статистики")
         return
     
+    if args.query:
+        records = stats_manager.query(
+            player=args.player,
+            difficulty=args.query_difficulty,
+            since=args.since,
+            until=args.until,
+            won=args.won,
+            min_score=args.min_score,
+            sort=args.sort,
+            descending=args.desc,
+            limit=args.limit,
+            offset=args.offset
+        )
+        try:
+            count = write_records(records, args.format)
+        except BrokenPipeError:
+            # Вывод закрыт раньше конца (например, | head): дальше писать некуда
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return
+        if args.format == "table":
+            print(f"Найдено игр: {count}")
+        return
+    
     if args.show_player_stats:
-        player_games = stats_manager.get_player_stats(args.show_player_stats)
+        player_games = stats_manager.get_player_stats(
+            args.show_player_stats, args.limit, args.offset)
         if player_games:
             print(f"\n{'='*60}")
             print(f"Статистика игрока: {args.show_player_stats}")
@@ -730,6 +1232,31 @@ def display_statistics(args) -> None:
             print("Нет сохраненной статистики")
         return
     
+    if args.percentile is not None:
+        try:
+            distribution = stats_manager.get_distribution(args.merge_distribution)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"✗ Ошибка чтения распределения: {e}")
+            return
+        quantiles = distribution.quantiles()
+        if quantiles is None:
+            print("Нет сохраненной статистики")
+            return
+        print(f"\n{'='*60}")
+        print(f"СЧЁТ {args.percentile}: ПРОЦЕНТИЛЬНЫЙ РАНГ")
+        print(f"{'='*60}")
+        for difficulty in [None] + sorted(set(distribution.sketches) - {distribution.OVERALL}):
+            rank = distribution.percentile_rank(args.percentile, difficulty)
+            print(f"{difficulty or 'все игры':10} лучше {rank:6.2f}% игр")
+        print("\nКвантили счёта: " + ", ".join(
+            f"p{level * 100:g} = {value:.0f}" for level, value in quantiles.items()))
+        print("Гистограмма счёта:")
+        for interval in distribution.histogram():
+            if interval["count"]:
+                upper = interval["to"] if interval["to"] is not None else "∞"
+                print(f"  {interval['from']:>6} - {upper:<6} {interval['count']}")
+        return
+    
     # Показать топ рекордов
     if args.show_top:
         top_scores = stats_manager.get_high_scores(args.show_top)
@@ -754,13 +1281,31 @@ def main():
         args.show_stats or 
         args.show_player_stats is not None or 
         args.clear_stats or
-        args.show_top is not None
+        args.show_top is not None or
+        args.import_stats is not None or
+        args.rebuild_stats or
+        args.verify_stats or
+        args.compact_stats or
+        args.percentile is not None or
+        args.query
     )
     
+    if (args.limit is not None and args.limit < 0) or args.offset < 0:
+        parser.error("--limit и --offset не могут быть отрицательными")
+    
     if stats_mode:
         display_statistics(args)
         return
     
+    if args.export_replay:
+        from graphics.replay_export import export_replay
+        start = time.perf_counter()
+        frames = export_replay(args.export_replay, args.export_out,
+                               args.export_format, args.workers)
+        print(f"✓ Экспортировано кадров: {frames} за {time.perf_counter() - start:.1f}с "
+              f"-> {args.export_out}")
+        return
+    
     # Запуск игры
     print(f"\n{'='*60}")
     print("🎮 BREAKOUT GAME")
@@ -770,8 +1315,19 @@ def main():
     print(f"Уровней: {args.levels}")
     print(f"{'='*60}\n")
     
-    game = Game(args.name, args.difficulty, args.levels)
-    game.run()
+    window_size = None
+    if args.window_size:
+        try:
+            width, height = (int(v) for v in args.window_size.lower().split('x'))
+            window_size = (width, height)
+        except ValueError:
+            parser.error(f"Некорректный размер окна: {args.window_size}")
+    
+    game = Game(args.name, args.difficulty, args.levels,
+                window_size=window_size, fullscreen=args.fullscreen,
+                scale_mode=args.scale_mode,
+                audio=create_audio_backend(args.audio))
+    game.run(record_path=args.record)
 
 
 if __name__ == "__main__":
@@ -11,12 +11,31 @@
 
 import unittest
 import os
+
+# Тесты не требуют окна и звуковой карты
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
 import json
+import shutil
 import tempfile
+import threading
 from unittest.mock import patch, MagicMock
-from config import STATS_DIR, STATS_FILE, DIFFICULTY_LIVES, DIFFICULTY_MULTIPLIERS
+from config import (STATS_DIR, STATS_FILE, DIFFICULTY_LIVES, DIFFICULTY_MULTIPLIERS,
+                    WINDOW_WIDTH, WINDOW_HEIGHT)
 from core.stats_manager import StatsManager
+from core.stats_writer import StatsWriter
 from main import Paddle, Brick, BrickGroup, Ball, Level, Game
+from graphics.quality import QualityGovernor
+from graphics.replay_export import split_range, export_replay
+from graphics.presenter import ScaledPresenter
+from graphics.particles import ParticleSystem
+from core.replay import Replay, INPUT_RIGHT
+from audio.sound_manager import SoundManager
+from audio import synth, variants
+from audio.backends import (NullAudioBackend, RecordingAudioBackend,
+                            create_audio_backend)
+from core.events import EventQueue, WALL_HIT, BRICK_DESTROYED
+from audio.music import MusicPlayer
 
 
 class TestStatsManager(unittest.TestCase):
@@ -25,11 +44,12 @@ class TestStatsManager(unittest.TestCase):
     def setUp(self):
         """Подготовка к тестам."""
         self.temp_dir = tempfile.mkdtemp()
-        self.stats_manager = StatsManager()
+        self.stats_manager = StatsManager(stats_dir=self.temp_dir)
 
     def tearDown(self):
         """Очистка после тестов."""
         self.stats_manager.clear_stats()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
 
     def test_save_game_result(self):
         """Тест сохранения результата игры."""
@@ -140,6 +160,926 @@ class TestStatsManager(unittest.TestCase):
         all_stats = self.stats_manager.load_all_stats()
         self.assertEqual(len(all_stats), 0)
 
+    def test_append_only_log(self):
+        """Тест дозаписи одной строки на игру."""
+        self.stats_manager.save_game_result("Player1", 100, 1, "easy", 10.0, False)
+        self.stats_manager.save_game_result("Player2", 200, 2, "hard", 20.0, True)
+        
+        with open(self.stats_manager._get_stats_path(), encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[1])["player_name"], "Player2")
+
+    def test_migrate_legacy_json(self):
+        """Тест переноса старого JSON массива в журнал."""
+        legacy = [{"timestamp": "2025-01-01T00:00:00", "player_name": "Old", "score": 10,
+                   "level_reached": 1, "difficulty": "easy", "game_duration": 5.0,
+                   "won": False}]
+        with open(os.path.join(self.temp_dir, STATS_FILE), 'w', encoding='utf-8') as f:
+            json.dump(legacy, f)
+        
+        manager = StatsManager(stats_dir=self.temp_dir)
+        self.assertEqual(manager.load_all_stats(), legacy)
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, STATS_FILE)))
+
+    def test_torn_line_skipped(self):
+        """Тест пропуска оборванной при сбое записи."""
+        self.stats_manager.save_game_result("Player1", 100, 1, "easy", 10.0, False)
+        with open(self.stats_manager._get_stats_path(), 'a', encoding='utf-8') as f:
+            f.write('{"player_name": "Brok')
+        self.stats_manager.save_game_result("Player2", 200, 1, "easy", 10.0, False)
+        
+        names = [stat["player_name"] for stat in self.stats_manager.load_all_stats()]
+        self.assertEqual(names, ["Player1", "Player2"])
+
+    def test_repeated_reads_use_cache(self):
+        """Тест чтения из кэша без повторного разбора файла."""
+        self.stats_manager.save_game_result("Player1", 100, 1, "easy", 10.0, False)
+        self.stats_manager.load_all_stats()
+        self.stats_manager.get_player_stats("Player1")
+        self.stats_manager.save_game_result("Player2", 200, 1, "easy", 10.0, True)
+        
+        with patch("core.stats_storage._parse_line",
+                   side_effect=AssertionError("повторный разбор")):
+            self.assertEqual(len(self.stats_manager.load_all_stats()), 2)
+            self.assertEqual(len(self.stats_manager.get_player_stats("Player2")), 1)
+            self.assertEqual(len(StatsManager(stats_dir=self.temp_dir).load_all_stats()), 2)
+
+    def test_external_change_invalidates_cache(self):
+        """Тест сброса кэша при изменении файла другим процессом."""
+        self.stats_manager.save_game_result("Player1", 100, 1, "easy", 10.0, False)
+        self.stats_manager.load_all_stats()
+        
+        record = dict(self.stats_manager.load_all_stats()[0], player_name="Other")
+        with open(self.stats_manager._get_stats_path(), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+        
+        names = [stat["player_name"] for stat in self.stats_manager.load_all_stats()]
+        self.assertEqual(names, ["Player1", "Other"])
+
+
+class TestIterStats(unittest.TestCase):
+    """Тесты для потокового перебора истории игр."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.stats_manager = StatsManager(stats_dir=self.temp_dir)
+        for day in range(1, 6):
+            record = {"timestamp": f"2025-03-0{day}T12:00:00", "player_name": f"P{day % 2}",
+                      "score": day * 100, "level_reached": 1, "difficulty": "easy",
+                      "game_duration": 10.0, "won": day == 5}
+            self.stats_manager.storage.append(record)
+
+    def tearDown(self):
+        """Очистка после тестов."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _scores(self, **kwargs):
+        return [stat["score"] for stat in self.stats_manager.iter_stats(**kwargs)]
+
+    def test_filter_and_since(self):
+        """Тест условия и нижней границы времени."""
+        from datetime import datetime
+        self.assertEqual(self._scores(filter=lambda stat: stat["player_name"] == "P1"),
+                         [100, 300, 500])
+        self.assertEqual(self._scores(since="2025-03-04"), [400, 500])
+        self.assertEqual(self._scores(since=datetime(2025, 3, 3), reverse=True), [500, 400, 300])
+
+    def test_reverse_from_disk(self):
+        """Тест чтения с конца файла через границы блоков."""
+        from core import stats_storage
+        with patch.object(stats_storage, "REVERSE_BLOCK_SIZE", 16):
+            self.assertEqual(self._scores(reverse=True), [500, 400, 300, 200, 100])
+
+    def test_large_log_not_cached(self):
+        """Тест потокового чтения большого журнала без кэша в памяти."""
+        from core import stats_storage
+        with patch.object(stats_storage, "STATS_CACHE_MAX_BYTES", 0):
+            self.assertEqual(len(self.stats_manager.load_all_stats()), 5)
+        self.assertNotIn(self.stats_manager._get_stats_path(), stats_storage._RECORD_CACHE)
+
+    def test_filtered_summary(self):
+        """Тест общей статистики по выборке."""
+        summary = self.stats_manager.get_statistics_summary(
+            filter=lambda stat: stat["player_name"] == "P0")
+        self.assertEqual((summary["total_games"], summary["max_score"]), (2, 400))
+
+
+class TestLeaderboard(unittest.TestCase):
+    """Тесты для индекса рекордов."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.stats_manager = StatsManager(stats_dir=self.temp_dir)
+        games = [("A", 300, "easy"), ("B", 500, "hard"), ("C", 300, "easy"),
+                 ("D", 100, "medium"), ("E", 700, "easy"), ("F", 500, "medium")]
+        for name, score, difficulty in games:
+            self.stats_manager.save_game_result(name, score, 1, difficulty, 10.0, False)
+
+    def tearDown(self):
+        """Очистка после тестов."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _expected(self, limit, difficulty=None):
+        """Рейтинг полной сортировкой всех записей."""
+        games = [stat for stat in self.stats_manager.load_all_stats()
+                 if difficulty is None or stat["difficulty"] == difficulty]
+        return sorted(games, key=lambda x: x["score"], reverse=True)[:limit]
+
+    def test_matches_full_sort(self):
+        """Тест совпадения рейтинга с сортировкой, включая равный счёт."""
+        self.assertEqual(self.stats_manager.get_high_scores(4), self._expected(4))
+        self.assertEqual(self.stats_manager.get_high_scores(3, "easy"), self._expected(3, "easy"))
+        self.assertEqual([g["player_name"] for g in self.stats_manager.get_high_scores(10, "easy")],
+                         ["E", "A", "C"])
+
+    def test_heap_keeps_best(self):
+        """Тест вытеснения худшей игры из заполненного рейтинга."""
+        from core.stats_index import Leaderboard
+        leaderboard = Leaderboard(size=2)
+        for score in (10, 30, 20, 40, 5):
+            leaderboard.add({"score": score, "difficulty": "easy"})
+        self.assertEqual([g["score"] for g in leaderboard.top(2)], [40, 30])
+
+    def test_index_loaded_without_scan(self):
+        """Тест ответа по сохранённому индексу без чтения журнала."""
+        manager = StatsManager(stats_dir=self.temp_dir)
+        with patch.object(manager.storage, "iter_records",
+                          side_effect=AssertionError("чтение журнала")):
+            self.assertEqual(manager.get_high_scores(1)[0]["player_name"], "E")
+
+    def test_rebuilt_after_external_write(self):
+        """Тест перестройки индекса после записи в журнал в обход менеджера."""
+        record = dict(self.stats_manager.load_all_stats()[0], player_name="Z", score=900)
+        with open(self.stats_manager._get_stats_path(), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+        
+        manager = StatsManager(stats_dir=self.temp_dir)
+        self.assertEqual(manager.get_high_scores(1)[0]["player_name"], "Z")
+        self.assertIn("leaderboard", manager.rebuild_indexes())
+
+    def test_ties_ordered_by_time(self):
+        """Тест одинакового порядка равных счетов в индексе, перестройке и SQLite."""
+        temp_dir = tempfile.mkdtemp()
+        manager = StatsManager(stats_dir=temp_dir)
+        base = manager.make_record("X", 800, 1, "easy", 10.0, False)
+        # Более поздние игры дописаны раньше
+        for day, name in ((3, "P"), (2, "Q"), (1, "R")):
+            manager.append_record(dict(base, player_name=name,
+                                       timestamp=f"2025-01-0{day}T10:00:00"))
+
+        expected = ["R", "Q", "P"]
+        names = lambda games: [game["player_name"] for game in games]
+        self.assertEqual(names(manager.get_high_scores(3)), expected)
+        self.assertEqual(names(manager.get_high_scores(3, since="2000-01-01")), expected)
+        manager.rebuild_indexes()
+        self.assertEqual(names(manager.get_high_scores(3)), expected)
+        sqlite = StatsManager(stats_dir=temp_dir, backend="sqlite")
+        self.assertEqual(names(sqlite.get_high_scores(3)), expected)
+
+    def test_incomplete_index_rejected(self):
+        """Тест ошибки при создании индекса без обязательных методов."""
+        from core.stats_index import StatsIndex
+
+        class AddOnly(StatsIndex):
+            def add(self, record):
+                pass
+
+        with self.assertRaises(TypeError):
+            AddOnly()
+
+
+class TestRunningAggregates(unittest.TestCase):
+    """Тесты для накопительных агрегатов статистики."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.stats_manager = StatsManager(stats_dir=self.temp_dir)
+        self.stats_manager.save_game_result("Player1", 1000, 2, "medium", 100.0, True)
+        self.stats_manager.save_game_result("Player1", 500, 1, "easy", 50.25, False)
+        self.stats_manager.save_game_result("Player2", 2000, 3, "hard", 200.0, True)
+
+    def tearDown(self):
+        """Очистка после тестов."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_summary_values(self):
+        """Тест значений общей статистики из агрегатов."""
+        summary = StatsManager(stats_dir=self.temp_dir).get_statistics_summary()
+        self.assertEqual(summary["average_score"], round(3500 / 3, 2))
+        self.assertEqual((summary["min_score"], summary["max_score"]), (500, 2000))
+        self.assertEqual(summary["average_duration"], round(350.25 / 3, 2))
+        self.assertEqual(summary["win_rate"], round(2 / 3 * 100, 2))
+
+    def test_summary_without_scan(self):
+        """Тест ответа по сохранённым агрегатам без чтения журнала."""
+        manager = StatsManager(stats_dir=self.temp_dir)
+        with patch.object(manager.storage, "iter_records",
+                          side_effect=AssertionError("чтение журнала")):
+            self.assertEqual(manager.get_statistics_summary()["total_games"], 3)
+
+    def test_verify_detects_mismatch(self):
+        """Тест сверки агрегатов с журналом и их перестройки."""
+        from core.stats_index import RunningAggregates, load_index, save_index
+        self.assertEqual(self.stats_manager.verify_indexes(),
+                         {"leaderboard": [], "aggregates": [], "distribution": []})
+        
+        # Испортить агрегаты, сохранив подпись журнала
+        path = self.stats_manager._index_path(RunningAggregates)
+        signature = self.stats_manager.storage.signature()
+        aggregates = load_index(path, RunningAggregates, signature)
+        aggregates.wins = 0
+        save_index(path, aggregates, signature)
+        
+        report = StatsManager(stats_dir=self.temp_dir).verify_indexes()
+        self.assertEqual(len(report["aggregates"]), 1)
+        self.assertIn("wins", report["aggregates"][0])
+        
+        self.stats_manager.rebuild_indexes()
+        self.assertEqual(self.stats_manager.verify_indexes()["aggregates"], [])
+
+    def test_verify_after_import_of_older_games(self):
+        """Тест сверки без ложных расхождений после импорта старых игр."""
+        temp_dir = tempfile.mkdtemp()
+        manager = StatsManager(stats_dir=temp_dir)
+        manager.save_game_result("A", 700, 1, "easy", 0.2, False)
+        manager.save_game_result("B", 700, 1, "easy", 0.1, False)
+        base = manager.make_record("C", 700, 1, "easy", 0.3, False)
+        path = os.path.join(temp_dir, "old.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for day in (1, 2):
+                f.write(json.dumps(dict(base, timestamp=f"2020-01-0{day}T10:00:00")) + "\n")
+        manager.import_stats(path)
+
+        self.assertEqual(manager.verify_indexes(),
+                         {"leaderboard": [], "aggregates": [], "distribution": []})
+
+    def test_players_counted_in_fixed_size(self):
+        """Тест оценки уникальных игроков при неизменном размере агрегатов."""
+        from core.stats_index import RunningAggregates
+        record = {"score": 1, "won": False, "game_duration": 1.0}
+        aggregates = RunningAggregates()
+        for i in range(5000):
+            aggregates.add(dict(record, player_name=f"Player{i % 50}"))
+        self.assertEqual(aggregates.summary()["unique_players"], 50)
+        
+        for i in range(1000):
+            aggregates.add(dict(record, player_name=f"Player{i}"))
+        size = len(json.dumps(aggregates.to_dict()["players"]))
+        for i in range(20000):
+            aggregates.add(dict(record, player_name=f"Player{i}"))
+        self.assertEqual(len(json.dumps(aggregates.to_dict()["players"])), size)
+        self.assertAlmostEqual(aggregates.summary()["unique_players"], 20000, delta=20000 * 0.05)
+        restored = RunningAggregates.from_dict(aggregates.to_dict())
+        self.assertEqual(restored.summary(), aggregates.summary())
+
+    def test_indexes_saved_in_batches(self):
+        """Тест записи индексов пачками и дополнения отстающего файла."""
+        from core.stats_index import RunningAggregates, load_index
+        with patch("core.stats_manager.save_index") as save:
+            for i in range(5):
+                self.stats_manager.save_game_result("Player3", 10, 1, "easy", 1.0, False)
+        save.assert_not_called()
+        
+        manager = StatsManager(stats_dir=self.temp_dir)
+        with patch.object(manager.storage, "iter_records",
+                          side_effect=AssertionError("перестроение")):
+            self.assertEqual(manager.get_statistics_summary()["total_games"], 8)
+        path = manager._index_path(RunningAggregates)
+        self.assertIsNotNone(load_index(path, RunningAggregates, manager.storage.signature()))
+
+
+class TestScoreDistribution(unittest.TestCase):
+    """Тесты для скетчей квантилей и гистограмм статистики."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.stats_manager = StatsManager(stats_dir=self.temp_dir)
+        for i in range(1, 101):
+            self.stats_manager.save_game_result(f"Player{i % 7}", i * 10, 1,
+                                                "hard" if i % 4 == 0 else "easy",
+                                                float(i), False)
+
+    def tearDown(self):
+        """Очистка после тестов."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_quantiles_within_accuracy(self):
+        """Тест погрешности квантилей и процентильного ранга."""
+        from core.stats_index import QuantileSketch
+        sketch = QuantileSketch(0.01)
+        values = list(range(1, 10001))
+        for value in reversed(values):
+            sketch.add(value)
+        for level in (0.1, 0.5, 0.9, 0.99):
+            exact = values[int(level * (len(values) - 1))]
+            self.assertLessEqual(abs(sketch.quantile(level) - exact), exact * 0.01)
+        self.assertAlmostEqual(sketch.rank(5000), 50.0, delta=1.0)
+        self.assertEqual((sketch.rank(0), sketch.rank(20000)), (0.0, 100.0))
+
+    def test_percentile_without_scan(self):
+        """Тест ранга и гистограмм по индексу без чтения журнала."""
+        manager = StatsManager(stats_dir=self.temp_dir)
+        with patch.object(manager.storage, "iter_records",
+                          side_effect=AssertionError("чтение журнала")):
+            self.assertAlmostEqual(manager.get_percentile_rank(500), 50.0, delta=1.0)
+            # Из 25 игр hard (40, 80, ... 1000) меньше 500 набрали 12
+            self.assertAlmostEqual(manager.get_percentile_rank(500, "hard"), 48.0, delta=1.0)
+            distribution = manager.get_distribution()
+            histogram = distribution.histogram("hard")
+        self.assertEqual(sum(interval["count"] for interval in histogram), 25)
+        self.assertEqual(histogram[0], {"from": 0, "to": 100, "count": 2})
+        self.assertIsNone(histogram[-1]["to"])
+        self.assertEqual(sum(interval["count"] for interval
+                             in distribution.histogram(field="game_duration")), 100)
+
+    def test_merge_matches_combined_history(self):
+        """Тест объединения распределений двух машин."""
+        from core.stats_index import ScoreDistribution
+        other_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, other_dir, ignore_errors=True)
+        other = StatsManager(stats_dir=other_dir)
+        for i in range(1, 51):
+            other.save_game_result("Remote", i * 100, 1, "medium", 30.0, True)
+        other.flush_indexes()
+        
+        merged = self.stats_manager.get_distribution(
+            [other._index_path(ScoreDistribution)])
+        combined = ScoreDistribution.build(
+            list(self.stats_manager.iter_stats()) + list(other.iter_stats()))
+        self.assertEqual(merged.to_dict(), combined.to_dict())
+        # Собственный индекс не меняется при объединении
+        self.assertIsNone(self.stats_manager.get_distribution().quantiles(difficulty="medium"))
+        
+        coarse = ScoreDistribution(accuracy=0.05)
+        coarse.add(next(other.iter_stats()))
+        with self.assertRaises(ValueError):
+            merged.merge(coarse)
+
+
+class TestSegmentedStats(unittest.TestCase):
+    """Тесты для записи статистики из нескольких процессов."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Очистка после тестов."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _record(self, day, name="Player1"):
+        return {"timestamp": f"2025-03-{day:02d}T12:00:00", "player_name": name,
+                "score": day * 100, "level_reached": 1, "difficulty": "easy",
+                "game_duration": 10.0, "won": False}
+
+    def _dead_pid(self):
+        import subprocess
+        import sys
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        return process.pid
+
+    def test_processes_write_own_segments(self):
+        """Тест записи из нескольких процессов без потерь."""
+        import subprocess
+        import sys
+        script = ("import sys; from core.stats_manager import StatsManager; "
+                  "m = StatsManager(stats_dir=sys.argv[1]); "
+                  "[m.save_game_result(sys.argv[2], i, 1, 'easy', 1.0, False) for i in range(20)]")
+        root = os.path.dirname(os.path.abspath(__file__))
+        processes = [subprocess.Popen([sys.executable, "-c", script, self.temp_dir, f"P{i}"],
+                                      cwd=root) for i in range(4)]
+        for process in processes:
+            self.assertEqual(process.wait(), 0)
+        
+        manager = StatsManager(stats_dir=self.temp_dir)
+        self.assertEqual(manager.get_statistics_summary()["total_games"], 80)
+        
+        # Несколько небольших журналов: сжатие откладывается
+        self.assertEqual(manager.compact_stats(), 0)
+        # Процессы завершились: их сегменты сливаются, когда журналов больше порога
+        with patch("core.stats_storage.STATS_SEGMENT_MAX_FILES", 3):
+            self.assertEqual(manager.compact_stats(), 4)
+        self.assertEqual(manager.storage.signature()[1], ())
+        self.assertEqual(len(manager.load_all_stats()), 80)
+
+    def test_merge_by_time_and_keep_indexes(self):
+        """Тест слияния журналов по времени и сохранения индексов при сжатии."""
+        manager = StatsManager(stats_dir=self.temp_dir)
+        other = StatsManager(stats_dir=self.temp_dir)
+        for day in (1, 4, 5):
+            manager.storage.append(self._record(day))
+        for day in (2, 3):
+            other.storage.append(self._record(day, "Other"))
+        
+        days = [stat["score"] // 100 for stat in manager.iter_stats()]
+        self.assertEqual(days, [1, 2, 3, 4, 5])
+        self.assertEqual([stat["score"] // 100 for stat in manager.iter_stats(reverse=True)],
+                         [5, 4, 3, 2, 1])
+        
+        from core.stats_index import Leaderboard
+        manager.get_high_scores(3)
+        self.assertEqual(manager.compact_stats(force=True), 1)
+        with patch.object(Leaderboard, "build", side_effect=AssertionError("перестроение")):
+            self.assertEqual(manager.get_high_scores(1)[0]["score"], 500)
+        self.assertEqual(len(manager.load_all_stats()), 5)
+
+    def test_import_older_records_keeps_order(self):
+        """Тест запросов с диапазоном после импорта более старых игр."""
+        manager = StatsManager(stats_dir=self.temp_dir)
+        for day in (20, 25):
+            manager.storage.append(self._record(day))
+        path = os.path.join(self.temp_dir, "import.jsonl")
+        with open(path, 'w', encoding='utf-8') as f:
+            for day in (9, 3, 12, 5):
+                f.write(json.dumps(self._record(day, "Imported")) + "\n")
+        # Каждая запись - отдельная пачка, пачки не по порядку
+        with patch("core.stats_storage.STATS_IMPORT_CHUNK", 1):
+            self.assertEqual(manager.import_stats(path), 4)
+        manager.storage.append(self._record(22))
+        manager.storage.append(self._record(21))
+        
+        # Записи не по порядку не открывают новых сегментов
+        self.assertEqual(len(manager.storage.signature()[1]), 1)
+        marker = manager.storage.path + ".unsorted"
+        self.assertTrue(os.path.exists(marker))
+        
+        days = [stat["score"] // 100 for stat in manager.iter_stats(since="2025-03-04",
+                                                                     reverse=True)]
+        self.assertEqual(days, [25, 22, 21, 20, 12, 9, 5])
+        days = [stat["score"] // 100 for stat in manager.iter_stats(until="2025-03-21")]
+        self.assertEqual(days, [3, 5, 9, 12, 20])
+        
+        # Несортированный сегмент сливается без ожидания порогов
+        self.assertEqual(manager.compact_stats(), 1)
+        self.assertEqual(manager.storage.signature()[1], ())
+        self.assertEqual([stat["score"] // 100 for stat in manager.iter_stats()],
+                         [3, 5, 9, 12, 20, 21, 22, 25])
+        manager.compact_stats(force=True)
+        self.assertFalse(os.path.exists(marker))
+
+    def test_interrupted_compaction(self):
+        """Тест сбоя после замены манифеста, до удаления слитого сегмента."""
+        manager = StatsManager(stats_dir=self.temp_dir)
+        storage = manager.storage
+        name = f"{self._dead_pid()}-00000000.jsonl"
+        path = os.path.join(storage.segment_dir, name)
+        os.makedirs(storage.segment_dir, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self._record(2)) + "\n")
+        self.assertEqual(manager.compact_stats(force=True), 1)
+        
+        # Слитый сегмент остаётся до следующего сжатия, но не читается
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(len(manager.load_all_stats()), 1)
+        manager.compact_stats(force=True)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(len(manager.load_all_stats()), 1)
+
+
+class TestPartitionedStats(unittest.TestCase):
+    """Тесты для разделов статистики по месяцам."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.stats_manager = StatsManager(stats_dir=self.temp_dir)
+        for month, score in ((1, 300), (2, 100), (3, 200), (3, 50), (1, 10)):
+            self.stats_manager.storage.append({
+                "timestamp": f"2025-{month:02d}-1{score % 7}T12:00:00", "player_name": "P",
+                "score": score, "level_reached": 1, "difficulty": "easy",
+                "game_duration": 10.0, "won": False})
+        self.stats_manager.compact_stats(force=True)
+
+    def tearDown(self):
+        """Очистка после тестов."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_partitions_by_month(self):
+        """Тест раскладки записей по месяцам в порядке времени."""
+        partitions = self.stats_manager.storage.partitions()
+        self.assertEqual(sorted(partitions), ["2025-01", "2025-02", "2025-03"])
+        self.assertEqual(partitions["2025-01"]["count"], 2)
+        self.assertEqual(partitions["2025-03"]["max_score"], 200)
+        
+        timestamps = [stat["timestamp"] for stat in self.stats_manager.iter_stats()]
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertEqual(len(timestamps), 5)
+
+    def test_time_range_reads_needed_partitions(self):
+        """Тест чтения только разделов из диапазона времени."""
+        from core.stats_storage import JsonlStatsStorage
+        opened = []
+        original = JsonlStatsStorage.iter_records
+        
+        def spy(storage, *args, **kwargs):
+            opened.append(os.path.basename(storage.path)[:7])
+            return original(storage, *args, **kwargs)
+        
+        with patch.object(JsonlStatsStorage, "iter_records", spy):
+            top = self.stats_manager.get_high_scores(5, since="2025-02-01", until="2025-03-01")
+        self.assertEqual([stat["score"] for stat in top], [100])
+        self.assertEqual(opened, ["2025-02"])
+
+    def test_retention_drops_old_months(self):
+        """Тест удаления разделов старше срока хранения."""
+        from datetime import datetime
+        from core.stats_manager import retention_start
+        self.assertEqual(retention_start(2, datetime(2025, 3, 15)), "2025-02")
+        self.assertEqual(retention_start(3, datetime(2025, 1, 1)), "2024-11")
+        
+        self.assertEqual(self.stats_manager.get_statistics_summary()["total_games"], 5)
+        with patch("core.stats_manager.retention_start", return_value="2025-02"):
+            self.assertEqual(self.stats_manager.apply_retention(2), 1)
+        self.assertEqual(self.stats_manager.get_statistics_summary()["total_games"], 3)
+        self.assertEqual(self.stats_manager.get_high_scores(1)[0]["score"], 200)
+
+
+class TestStatsColumns(unittest.TestCase):
+    """Тесты для двоичного представления статистики."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.stats_manager = StatsManager(stats_dir=self.temp_dir)
+        games = [("Ann", 1000, "easy", True), ("Bob", 500, "easy", False),
+                 ("Ann", 2000, "hard", True), ("Cid", 300, "hard", False),
+                 ("Ann", 700, "medium", False)]
+        for day, (name, score, difficulty, won) in enumerate(games, 1):
+            self.stats_manager.storage.append({
+                "timestamp": f"2025-03-0{day}T12:00:00", "player_name": name,
+                "score": score, "level_reached": 1, "difficulty": difficulty,
+                "game_duration": 10.0 * day, "won": won})
+
+    def tearDown(self):
+        """Очистка после тестов."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _streamed(self, field, **kwargs):
+        from core.stats_index import RunningAggregates
+        groups = {}
+        for record in self.stats_manager.iter_stats(**kwargs):
+            groups.setdefault(record[field], RunningAggregates()).add(record)
+        return {name: aggregates.summary() for name, aggregates in groups.items()}
+
+    def test_group_stats_match_streaming(self):
+        """Тест совпадения векторных группировок с потоковым подсчётом."""
+        self.assertEqual(self.stats_manager.get_group_stats("difficulty"),
+                         self._streamed("difficulty"))
+        self.assertEqual(self.stats_manager.get_group_stats("player"),
+                         self._streamed("player_name"))
+        self.assertEqual(self.stats_manager.get_group_stats("player", since="2025-03-03"),
+                         self._streamed("player_name", since="2025-03-03"))
+        self.assertEqual(self.stats_manager.get_columns().summary(),
+                         self.stats_manager.get_statistics_summary())
+
+    def test_columns_cached_and_extended(self):
+        """Тест загрузки столбцов из .npy и дополнения новыми играми."""
+        from core.stats_columns import StatsColumns
+        self.assertEqual(len(self.stats_manager.get_columns()), 5)
+        
+        with patch.object(StatsColumns, "build", side_effect=AssertionError("перестроение")):
+            columns = StatsManager(stats_dir=self.temp_dir).get_columns()
+            self.assertEqual(len(columns), 5)
+            
+            self.stats_manager.save_game_result("Dan", 900, 2, "easy", 5.0, True)
+            columns = self.stats_manager.get_columns()
+        self.assertEqual(len(columns), 6)
+        self.assertEqual(columns.players[columns["player"][-1]], "Dan")
+        self.assertEqual(self.stats_manager.get_group_stats("difficulty")["easy"]["max_score"],
+                         1000)
+
+    def test_records_appended_in_place(self):
+        """Тест дозаписи двоичных записей и пропуска оборванного хвоста."""
+        self.stats_manager.get_columns()
+        path = os.path.join(self.temp_dir, "columns", "records.bin")
+        inode = os.stat(path).st_ino
+        self.stats_manager.save_game_result("Dan", 900, 2, "easy", 5.0, True)
+        self.stats_manager.flush_indexes()
+        self.assertEqual(os.stat(path).st_ino, inode)
+        self.assertEqual(os.path.getsize(path), 6 * 32)
+        
+        # Прерванная дозапись: байты за последней записью из meta.json
+        with open(path, 'ab') as f:
+            f.write(b"\0" * 20)
+        manager = StatsManager(stats_dir=self.temp_dir)
+        self.assertEqual(len(manager.get_columns(build=False)), 6)
+        manager.save_game_result("Eve", 100, 1, "hard", 5.0, False)
+        manager.flush_indexes()
+        self.assertEqual(os.path.getsize(path), 7 * 32)
+        self.assertEqual(StatsManager(stats_dir=self.temp_dir).get_columns(build=False).players,
+                         ["Ann", "Bob", "Cid", "Dan", "Eve"])
+
+    def test_ranged_queries_scan_records(self):
+        """Тест рейтинга и статистики за период по двоичным записям."""
+        top = self.stats_manager.get_high_scores(2, since="2025-03-02")
+        summary = self.stats_manager.get_statistics_summary(since="2025-03-02",
+                                                            until="2025-03-05")
+        easy = self.stats_manager.get_high_scores(5, difficulty="easy", since="2025-03-01")
+        
+        self.stats_manager.get_columns()
+        manager = StatsManager(stats_dir=self.temp_dir)
+        with patch.object(manager.storage, "iter_records",
+                          side_effect=AssertionError("чтение журнала")):
+            self.assertEqual(manager.get_high_scores(2, since="2025-03-02"), top)
+            self.assertEqual(manager.get_statistics_summary(since="2025-03-02",
+                                                            until="2025-03-05"), summary)
+            self.assertEqual(manager.get_high_scores(5, difficulty="easy",
+                                                     since="2025-03-01"), easy)
+        self.assertEqual([stat["score"] for stat in top], [2000, 700])
+        self.assertEqual(top[0]["timestamp"], "2025-03-03T12:00:00")
+
+
+class TestPlayerIndex(unittest.TestCase):
+    """Тесты для индекса игр по игрокам."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.stats_manager = StatsManager(stats_dir=self.temp_dir)
+        for i in range(12):
+            self.stats_manager.save_game_result("Ann" if i % 3 else "Bob", i * 10, 1,
+                                                "easy", 1.0, False)
+
+    def tearDown(self):
+        """Очистка после тестов."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_paging_matches_all_backends(self):
+        """Тест страниц последних игр по индексу, потоку и SQLite."""
+        games = self.stats_manager.get_player_stats("Ann")
+        self.assertEqual([stat["score"] for stat in games],
+                         [10, 20, 40, 50, 70, 80, 100, 110])
+        self.assertEqual(self.stats_manager.get_player_stats("Ann", limit=3), games[-3:])
+        self.assertEqual(self.stats_manager.get_player_stats("Ann", limit=3, offset=3),
+                         games[-6:-3])
+        self.assertEqual(self.stats_manager.get_player_stats("Ann", offset=7), games[:1])
+        self.assertEqual(self.stats_manager.get_player_stats("Nobody", limit=3), [])
+        
+        with patch("core.stats_manager.COLUMNS_AVAILABLE", False):
+            self.assertEqual(self.stats_manager.get_player_stats("Ann", limit=3, offset=3),
+                             games[-6:-3])
+        sqlite = StatsManager(stats_dir=self.temp_dir, backend="sqlite")
+        self.addCleanup(sqlite.storage.close)
+        sqlite.import_stats(self.stats_manager._get_stats_path())
+        self.assertEqual(sqlite.get_player_stats("Ann", limit=3, offset=3), games[-6:-3])
+
+    def test_index_persisted_with_tail(self):
+        """Тест загрузки индекса игроков и просмотра только новых игр."""
+        from core.stats_columns import PlayerIndex
+        self.stats_manager.get_player_stats("Ann")
+        
+        manager = StatsManager(stats_dir=self.temp_dir)
+        with patch.object(PlayerIndex, "build", side_effect=AssertionError("перестроение")):
+            manager.save_game_result("Cid", 500, 1, "hard", 1.0, True)
+            manager.save_game_result("Bob", 600, 1, "hard", 1.0, True)
+            self.assertEqual([stat["score"] for stat in manager.get_player_stats("Bob")],
+                             [0, 30, 60, 90, 600])
+            self.assertEqual(manager.get_player_stats("Cid")[0]["difficulty"], "hard")
+        
+        # Хвост длиннее STATS_PLAYER_INDEX_TAIL - индекс перестраивается
+        with patch("core.stats_manager.STATS_PLAYER_INDEX_TAIL", 1):
+            self.assertEqual(len(manager.get_player_stats("Bob")), 5)
+        self.assertEqual(manager._player_index.count, 14)
+
+
+class TestStatsQuery(unittest.TestCase):
+    """Тесты для запросов к статистике и их потокового вывода."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.stats_manager = StatsManager(stats_dir=self.temp_dir)
+        difficulties = ["easy", "medium", "hard"]
+        for i in range(12):
+            self.stats_manager.save_game_result("Ann" if i % 3 else "Bob", (i * 70) % 500,
+                                                i % 4, difficulties[i % 3], float(i),
+                                                i % 2 == 0)
+        self.games = list(self.stats_manager.iter_stats())
+
+    def tearDown(self):
+        """Очистка после тестов."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_filters_sorting_and_paging(self):
+        """Тест фильтров, ключей сортировки и страниц запроса."""
+        query = self.stats_manager.query
+        self.assertEqual(list(query()), self.games)
+        self.assertEqual(list(query(descending=True, limit=3)), self.games[::-1][:3])
+        self.assertEqual(list(query(player="Ann", won=True)),
+                         [g for g in self.games if g["player_name"] == "Ann" and g["won"]])
+        self.assertEqual(list(query(difficulty="hard", min_score=100)),
+                         [g for g in self.games if g["difficulty"] == "hard" and g["score"] >= 100])
+        
+        by_score = sorted(self.games, key=lambda g: g["score"], reverse=True)
+        self.assertEqual(list(query(sort="score", descending=True, limit=4, offset=2)),
+                         by_score[2:6])
+        self.assertEqual(list(query(sort="score", descending=True, won=False, limit=2)),
+                         [g for g in by_score if not g["won"]][:2])
+        by_duration = sorted(self.games, key=lambda g: g["game_duration"])
+        self.assertEqual(list(query(sort="duration", limit=3, offset=1)), by_duration[1:4])
+        self.assertEqual(list(query(sort="level")),
+                         sorted(self.games, key=lambda g: g["level_reached"]))
+        self.assertEqual(list(query(player="Bob", descending=True, limit=2)),
+                         [g for g in self.games if g["player_name"] == "Bob"][::-1][:2])
+        
+        with self.assertRaises(ValueError):
+            list(query(sort="luck"))
+
+    def test_output_formats(self):
+        """Тест вывода записей в таблицу, JSON Lines и CSV."""
+        import csv
+        import io
+        from core.stats_output import write_records, FIELDS
+        
+        out = io.StringIO()
+        self.assertEqual(write_records(iter(self.games), "json", out, batch=5), 12)
+        self.assertEqual([json.loads(line) for line in out.getvalue().splitlines()],
+                         [{field: g[field] for field in FIELDS} for g in self.games])
+        
+        out = io.StringIO()
+        write_records(iter(self.games), "csv", out)
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual([int(row["score"]) for row in rows], [g["score"] for g in self.games])
+        
+        out = io.StringIO()
+        write_records(iter(self.games[:2]), "table", out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertIn("Победа", lines[2])
+        self.assertIn("Проигрыш", lines[3])
+        
+        with self.assertRaises(ValueError):
+            write_records([], "xml", io.StringIO())
+
+
+class TestSqliteStatsStorage(unittest.TestCase):
+    """Тесты для хранилища статистики в SQLite."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.jsonl = StatsManager(stats_dir=self.temp_dir, backend="jsonl")
+        games = [("Player1", 1000, 2, "medium", 100.0, True),
+                 ("Player1", 500, 1, "easy", 50.0, False),
+                 ("Player2", 2000, 3, "hard", 200.0, True),
+                 ("Player3", 1000, 1, "medium", 75.5, False)]
+        for game in games:
+            self.jsonl.save_game_result(*game)
+        
+        # Новая база заполняется из журнала в той же директории
+        self.sqlite = StatsManager(stats_dir=self.temp_dir, backend="sqlite")
+
+    def tearDown(self):
+        """Очистка после тестов."""
+        self.sqlite.storage.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_queries_match_jsonl(self):
+        """Тест совпадения результатов запросов с журналом JSON Lines."""
+        self.assertEqual(self.sqlite.get_statistics_summary(),
+                         self.jsonl.get_statistics_summary())
+        self.assertEqual(self.sqlite.get_high_scores(3), self.jsonl.get_high_scores(3))
+        self.assertEqual(self.sqlite.get_player_stats("Player1"),
+                         self.jsonl.get_player_stats("Player1"))
+        self.assertEqual(self.sqlite.load_all_stats(), self.jsonl.load_all_stats())
+
+    def test_queries_use_indexes(self):
+        """Тест использования индексов в запросах."""
+        conn = self.sqlite.storage._conn
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM games "
+                            "WHERE player_name = ?", ("Player1",)).fetchall()
+        self.assertIn("idx_games_player", str(plan))
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM games "
+                            "ORDER BY score DESC LIMIT 3").fetchall()
+        self.assertIn("idx_games_score", str(plan))
+
+    def test_save_and_clear(self):
+        """Тест сохранения в базу и её очистки."""
+        self.sqlite.save_game_result("Player4", 3000, 4, "easy", 10.0, False)
+        self.assertEqual(self.sqlite.get_high_scores(1)[0]["player_name"], "Player4")
+        self.assertEqual(len(self.jsonl.load_all_stats()), 4)
+        
+        self.assertTrue(self.sqlite.clear_stats())
+        self.assertIsNone(self.sqlite.get_statistics_summary())
+
+    def test_incomplete_storage_rejected(self):
+        """Тест ошибки при создании хранилища без обязательных методов."""
+        from core.stats_storage import StatsStorage
+
+        class AppendOnly(StatsStorage):
+            def append(self, record):
+                pass
+
+        with self.assertRaises(TypeError):
+            AppendOnly()
+
+
+class TestStatsWriter(unittest.TestCase):
+    """Тесты для фоновой записи статистики."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.stats_manager = StatsManager(stats_dir=self.temp_dir)
+
+    def tearDown(self):
+        """Очистка после тестов."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _record(self, score):
+        return self.stats_manager.make_record("Player1", score, 1, "easy", 10.0, False)
+
+    def test_close_saves_queued_records(self):
+        """Тест сохранения всех записей из очереди при закрытии."""
+        writer = StatsWriter(self.stats_manager)
+        for score in (100, 300, 200):
+            writer.submit(self._record(score))
+        writer.close()
+        
+        self.assertEqual([stat["score"] for stat in self.stats_manager.load_all_stats()],
+                         [100, 300, 200])
+        self.assertEqual(self.stats_manager.get_high_scores(1)[0]["score"], 300)
+        self.assertEqual(writer.pending(), 0)
+        self.assertEqual(writer.failed, 0)
+
+    def test_full_queue_does_not_block(self):
+        """Тест записи в список ожидания при переполненной очереди без записи в игровом потоке."""
+        writer = StatsWriter(self.stats_manager, maxsize=1)
+        # Поток не запускается: очередь заполняется первой записью
+        with patch.object(writer, "_ensure_thread"), \
+                patch.object(self.stats_manager, "append_record",
+                             side_effect=AssertionError("запись в игровом потоке")):
+            writer.submit(self._record(100))
+            writer.submit(self._record(200))
+            writer.submit(self._record(300))
+            with patch("core.stats_writer.STATS_WRITER_OVERFLOW_SIZE", 2):
+                writer.submit(self._record(400))
+        self.assertEqual((writer.dropped, writer.pending()), (1, 3))
+        
+        # Запущенный поток сохраняет очередь, затем список ожидания по порядку
+        writer._ensure_thread()
+        writer.close()
+        self.assertEqual([stat["score"] for stat in self.stats_manager.load_all_stats()],
+                         [100, 200, 300])
+        self.assertEqual(writer.pending(), 0)
+
+    def test_thread_survives_errors(self):
+        """Тест продолжения работы потока после исключений записи и сжатия."""
+        writer = StatsWriter(self.stats_manager)
+        append_record = self.stats_manager.append_record
+        calls = []
+
+        def failing_once(record):
+            calls.append(record["score"])
+            if len(calls) == 1:
+                raise RuntimeError("диск")
+            return append_record(record)
+
+        with patch.object(self.stats_manager, "append_record", side_effect=failing_once), \
+                patch.object(self.stats_manager, "compact_stats",
+                             side_effect=RuntimeError("сжатие")):
+            writer.submit(self._record(100))
+            writer.flush()
+            writer.submit(self._record(200))
+            writer.close()
+        self.assertEqual(writer.failed, 1)
+        self.assertEqual([stat["score"] for stat in self.stats_manager.load_all_stats()], [200])
+
+    def test_close_compacts_over_threshold(self):
+        """Тест сжатия при выходе только при превышении порога."""
+        writer = StatsWriter(self.stats_manager)
+        writer.submit(self._record(100))
+        writer.close()
+        self.assertEqual(self.stats_manager.storage.partitions(), {})
+        
+        writer = StatsWriter(self.stats_manager)
+        writer.submit(self._record(200))
+        with patch("core.stats_storage.STATS_SEGMENT_MAX_BYTES", 0):
+            writer.close()
+        self.assertEqual(sum(info["count"] for info
+                             in self.stats_manager.storage.partitions().values()), 2)
+
+    def test_restart_keeps_writer(self):
+        """Тест сохранения фоновой записи при перезапуске игры."""
+        writer = StatsWriter(self.stats_manager)
+        game = Game(headless=True, stats_writer=writer)
+        game._restart()
+        self.assertIs(game.stats_writer, writer)
+        self.assertIs(game.stats_manager, self.stats_manager)
+
+    def test_headless_game_skips_stats(self):
+        """Тест игры без окна, не открывающей директорию статистики."""
+        with patch("main.StatsManager", side_effect=AssertionError("статистика")):
+            game = Game(headless=True)
+            game._restart()
+        self.assertIsNone(game.stats_writer)
+
 
 class TestPaddle(unittest.TestCase):
     """Тесты для класса платформы."""
@@ -377,12 +1317,598 @@ class TestArgumentParser(unittest.TestCase):
         args = self.parser.parse_args(["--show-stats"])
         self.assertTrue(args.show_stats)
 
+    def test_query_arguments(self):
+        """Тест аргументов запроса к статистике."""
+        args = self.parser.parse_args(["--query", "--player", "Ann", "--lost",
+                                       "--sort", "score", "--desc", "--limit", "5",
+                                       "--format", "csv"])
+        self.assertTrue(args.query)
+        self.assertEqual(args.player, "Ann")
+        self.assertIs(args.won, False)
+        self.assertEqual((args.sort, args.desc, args.limit, args.offset), ("score", True, 5, 0))
+        self.assertIsNone(self.parser.parse_args(["--query"]).won)
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(["--query", "--won", "--lost"])
+
+    def test_query_dates(self):
+        """Тест разбора и проверки дат запроса."""
+        args = self.parser.parse_args(["--query", "--since", "2024-05-01",
+                                       "--until", "2024-06-01T12:30"])
+        self.assertEqual(args.since, "2024-05-01T00:00:00")
+        self.assertEqual(args.until, "2024-06-01T12:30:00")
+        with patch("sys.stderr"):
+            with self.assertRaises(SystemExit):
+                self.parser.parse_args(["--query", "--since", "yesterday"])
+
     def test_invalid_difficulty(self):
         """Тест некорректной сложности."""
         with self.assertRaises(SystemExit):
             self.parser.parse_args(["-d", "impossible"])
 
 
+class TestQualityGovernor(unittest.TestCase):
+    """Тесты для регулятора качества графики."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        self.governor = QualityGovernor(budget_ms=16.0, window=10)
+
+    def _feed(self, frame_ms, frames):
+        """Подать несколько кадров с одинаковым временем."""
+        changed = False
+        for _ in range(frames):
+            changed = self.governor.record_frame(frame_ms) or changed
+        return changed
+
+    def test_downgrade_on_slow_frames(self):
+        """Тест понижения качества при медленных кадрах."""
+        self.assertTrue(self._feed(20.0, 10))
+        self.assertEqual(self.governor.level, 1)
+
+    def test_upgrade_requires_several_windows(self):
+        """Тест отложенного повышения качества."""
+        self._feed(20.0, 10)
+        self.assertFalse(self._feed(2.0, 30))
+        self.assertEqual(self.governor.level, 1)
+        self._feed(2.0, 10)
+        self.assertEqual(self.governor.level, 0)
+
+    def test_no_change_inside_band(self):
+        """Тест отсутствия колебаний внутри полосы гистерезиса."""
+        self._feed(20.0, 10)
+        self.assertFalse(self._feed(10.0, 200))
+        self.assertEqual(self.governor.level, 1)
+
+    def test_level_bounds(self):
+        """Тест границ уровней качества."""
+        self._feed(50.0, 200)
+        self.assertEqual(self.governor.level, len(self.governor.levels) - 1)
+        self.assertEqual(self.governor.settings["particle_scale"], 0.0)
+
+    def test_restart_keeps_governor(self):
+        """Тест сохранения подобранного качества при перезапуске игры."""
+        self._feed(20.0, 10)
+        game = Game(headless=True, quality_governor=self.governor)
+        self.assertIs(game.renderer.quality, self.governor.settings)
+        game._restart()
+        self.assertIs(game.quality_governor, self.governor)
+        self.assertEqual(game.renderer.quality["name"], "medium")
+
+
+class TestReplayExport(unittest.TestCase):
+    """Тесты для записи и экспорта повторов."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        import pygame
+        self.temp_dir = tempfile.mkdtemp()
+        self.replay_path = os.path.join(self.temp_dir, "replay.json")
+
+        replay = Replay("Tester", "medium", 5)
+        replay.add_frame([pygame.K_SPACE], 0)  # Меню -> игра
+        replay.add_frame([pygame.K_SPACE], 0)  # Запуск шара
+        for _ in range(4):
+            replay.add_frame([], INPUT_RIGHT)
+        replay.save(self.replay_path)
+
+    def test_replay_roundtrip(self):
+        """Тест сохранения и загрузки записи."""
+        loaded = Replay.load(self.replay_path)
+        self.assertEqual(len(loaded), 6)
+        self.assertEqual(loaded.frames[2], ([], INPUT_RIGHT))
+
+    def test_split_range(self):
+        """Тест разбиения диапазона кадров."""
+        self.assertEqual(split_range(0, 10, 3), [(0, 4), (4, 7), (7, 10)])
+        self.assertEqual(split_range(0, 2, 8), [(0, 1), (1, 2)])
+        self.assertEqual(split_range(5, 5, 4), [])
+
+    def test_parallel_export_matches_serial(self):
+        """Тест совпадения параллельного и последовательного экспорта."""
+        serial = os.path.join(self.temp_dir, "serial.rgb")
+        parallel = os.path.join(self.temp_dir, "parallel.rgb")
+
+        self.assertEqual(export_replay(self.replay_path, serial, "rgb", workers=1), 6)
+        self.assertEqual(export_replay(self.replay_path, parallel, "rgb", workers=3), 6)
+
+        with open(serial, 'rb') as a, open(parallel, 'rb') as b:
+            serial_bytes = a.read()
+            self.assertEqual(serial_bytes, b.read())
+        self.assertEqual(len(serial_bytes), 6 * WINDOW_WIDTH * WINDOW_HEIGHT * 3)
+
+
+class TestScaledPresenter(unittest.TestCase):
+    """Тесты для масштабированного вывода кадра."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        import pygame
+        self.frame = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.frame.fill((255, 0, 0))
+
+    def _window(self, width, height):
+        """Создать поверхность-окно заданного размера."""
+        import pygame
+        return pygame.Surface((width, height), 0, self.frame)
+
+    def test_integer_scale(self):
+        """Тест целочисленного масштаба."""
+        presenter = ScaledPresenter(self._window(1920, 1080), mode="integer")
+        self.assertEqual(presenter.target_rect.size, (WINDOW_WIDTH, WINDOW_HEIGHT))
+        presenter.resize(self._window(WINDOW_WIDTH * 2, WINDOW_HEIGHT * 2 + 10))
+        self.assertEqual(presenter.target_rect.size, (WINDOW_WIDTH * 2, WINDOW_HEIGHT * 2))
+
+    def test_letterbox_keeps_aspect(self):
+        """Тест сохранения пропорций и полей по краям."""
+        window = self._window(1920, 1080)
+        presenter = ScaledPresenter(window, mode="smooth")
+        presenter.present(self.frame)
+
+        rect = presenter.target_rect
+        self.assertEqual(rect.height, 1080)
+        self.assertEqual(rect.width, 1080 * WINDOW_WIDTH // WINDOW_HEIGHT)
+        self.assertEqual(tuple(window.get_at(rect.center))[:3], (255, 0, 0))
+        self.assertEqual(tuple(window.get_at((0, 0)))[:3], (0, 0, 0))
+
+    def test_unknown_mode(self):
+        """Тест некорректного режима масштабирования."""
+        with self.assertRaises(ValueError):
+            ScaledPresenter(self._window(100, 100), mode="bicubic")
+
+
+class TestParticleSystem(unittest.TestCase):
+    """Тесты для системы частиц."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        self.particles = ParticleSystem(capacity=64)
+
+    def test_emit_brick_break(self):
+        """Тест выпуска частиц при разрушении кирпича."""
+        brick = Brick(100, 50)
+        self.particles.emit_brick_break(brick)
+        self.assertGreater(self.particles.active_count(), 0)
+
+    def test_capacity_is_fixed(self):
+        """Тест фиксированной ёмкости пула."""
+        pos = self.particles.pos
+        for _ in range(10):
+            self.particles.emit(100, 100, 0, 20)
+        self.assertEqual(self.particles.active_count(), 64)
+        self.assertIs(self.particles.pos, pos)
+
+    def test_particles_expire(self):
+        """Тест исчезновения частиц по окончании жизни."""
+        from config import PARTICLE_LIFE
+        self.particles.emit(100, 100, 0, 10)
+        for _ in range(PARTICLE_LIFE + 1):
+            self.particles.update()
+        self.assertEqual(self.particles.active_count(), 0)
+
+    def test_draw(self):
+        """Тест отрисовки частиц."""
+        import pygame
+        screen = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.particles.emit(100, 100, 0, 10, speed=(0.0, 0.0))
+        self.particles.draw(screen)
+        self.assertNotEqual(tuple(screen.get_at((101, 101)))[:3], (0, 0, 0))
+
+    def test_draw_pixels_match_sprites(self):
+        """Тест отрисовки в пиксели: как спрайтами, без них при полном пуле."""
+        import numpy as np
+        import pygame
+        for i in range(7):
+            self.particles.emit(20 + i * 10, 40 + i, i, 1, speed=(0.0, 0.0))
+        self.particles.life[:7] = np.linspace(5, 40, 7)
+        expected = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        expected.fill((10, 200, 30))
+        self.particles._draw_sprites(expected, np.flatnonzero(self.particles.life > 0))
+        screen = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        screen.fill((10, 200, 30))
+        self.particles.draw(screen)
+        difference = np.abs(pygame.surfarray.array3d(screen).astype(int)
+                            - pygame.surfarray.array3d(expected))
+        self.assertLessEqual(difference.max(), 2)
+
+        # Полный пул внутри экрана рисуется без спрайтов
+        self.particles.emit(5, WINDOW_HEIGHT - 10, 0, self.particles.capacity,
+                            speed=(0.0, 0.0))
+        with patch.object(ParticleSystem, "_draw_sprites",
+                          side_effect=AssertionError("спрайты")):
+            self.particles.draw(screen)
+        self.assertNotEqual(tuple(screen.get_at((5, WINDOW_HEIGHT - 10)))[:3], (10, 200, 30))
+
+        # Частица за краем экрана обрезается
+        self.particles.clear()
+        self.particles.emit(-1, WINDOW_HEIGHT - 1, 0, 1, speed=(0.0, 0.0))
+        self.particles.draw(screen)
+        self.assertNotEqual(tuple(screen.get_at((0, WINDOW_HEIGHT - 1)))[:3], (10, 200, 30))
+
+
+class TestSoundManager(unittest.TestCase):
+    """Тесты для менеджера звуков."""
+
+    def test_async_load(self):
+        """Тест фоновой загрузки звуков."""
+        manager = SoundManager(async_load=True)
+        self.assertTrue(manager.wait_until_loaded(5))
+        self.assertTrue(manager.is_loaded())
+
+    def test_restart_reuses_decoded_sounds(self):
+        """Тест повторного использования загруженных звуков."""
+        first = SoundManager(async_load=False)
+        second = SoundManager(async_load=False)
+        for key, sound in first.sounds.items():
+            if sound is not None:
+                self.assertIs(second.sounds[key], sound)
+
+    def test_same_frame_hits_coalesce(self):
+        """Тест схлопывания повторных эффектов в одном кадре."""
+        manager = SoundManager(async_load=False)
+        if manager.sounds["brick_hit"] is None:
+            self.skipTest("Звуковое устройство недоступно")
+
+        for _ in range(5):
+            manager.play_brick_hit()
+        manager.play_wall_hit()
+        self.assertEqual(list(manager._pending), ["brick_hit", "wall_hit"])
+
+        manager.end_frame()
+        self.assertEqual(len(manager._pending), 0)
+
+    def test_voice_limits(self):
+        """Тест ограничения числа голосов эффекта."""
+        from config import SOUND_VOICE_LIMITS
+        manager = SoundManager(async_load=False)
+        if not manager._channels:
+            self.skipTest("Звуковое устройство недоступно")
+
+        self.assertEqual(len(manager._channels["brick_hit"]), SOUND_VOICE_LIMITS["brick_hit"])
+        self.assertEqual(len(manager._channels["victory"]), 1)
+        for _ in range(10):
+            manager.play_brick_hit()
+            manager.end_frame()
+        busy = sum(1 for channel in manager._channels["brick_hit"] if channel.get_busy())
+        self.assertLessEqual(busy, SOUND_VOICE_LIMITS["brick_hit"])
+
+    def test_play_before_loaded(self):
+        """Тест пропуска звука, который ещё не загружен."""
+        release = threading.Event()
+        load_sounds = SoundManager._load_sounds
+
+        def held_load(manager):
+            release.wait(5)
+            return load_sounds(manager)
+
+        with patch.object(SoundManager, "_load_sounds", held_load), \
+                patch.object(SoundManager, "_play_now") as play_now:
+            manager = SoundManager(async_load=True)
+            manager.play_brick_hit()
+            manager.play_victory()
+            self.assertFalse(manager.is_loaded())
+            self.assertEqual(manager._pending, {})
+            release.set()
+            self.assertTrue(manager.wait_until_loaded(5))
+            manager.end_frame()
+        play_now.assert_not_called()
+
+    def test_play_before_channels_reserved(self):
+        """Тест пропуска звука, уже декодированного, но без пула каналов."""
+        release = threading.Event()
+        reached = threading.Event()
+        reserve_channels = SoundManager._reserve_channels
+
+        def held_reserve(manager):
+            reached.set()
+            release.wait(5)
+            return reserve_channels(manager)
+
+        with patch.object(SoundManager, "_reserve_channels", held_reserve), \
+                patch.object(SoundManager, "_play_now") as play_now:
+            manager = SoundManager(async_load=True)
+            self.assertTrue(reached.wait(5))
+            manager.play_brick_hit()
+            manager.end_frame()
+            self.assertEqual(manager._pending, {})
+            release.set()
+            self.assertTrue(manager.wait_until_loaded(5))
+        play_now.assert_not_called()
+
+
+class TestSynth(unittest.TestCase):
+    """Тесты для синтеза звуковых эффектов."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        import pygame
+        self.cache_dir = tempfile.mkdtemp()
+        if not pygame.mixer.get_init():
+            try:
+                pygame.mixer.init()
+            except pygame.error:
+                self.skipTest("Звуковое устройство недоступно")
+
+    def test_synthesize_range(self):
+        """Тест длины и амплитуды синтезированного сигнала."""
+        params = synth.SYNTH_PRESETS["ball_launch"]
+        signal = synth.synthesize(params, 22050)
+        self.assertEqual(len(signal), int(22050 * 0.12))
+        self.assertLessEqual(float(abs(signal).max()), 1.0)
+
+    def test_mixer_format(self):
+        """Тест преобразования в формат микшера."""
+        signal = synth.synthesize(synth.SYNTH_PRESETS["victory"], 8000)
+        pcm = synth.to_mixer_format(signal, -16, 2)
+        self.assertEqual(pcm.shape, (len(signal), 2))
+        self.assertEqual(pcm.dtype.name, "int16")
+
+    def test_cache_reused(self):
+        """Тест повторного использования PCM из кэша на диске."""
+        sound = synth.load_or_synthesize("ball_lost", cache_dir=self.cache_dir)
+        self.assertIsNotNone(sound)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        with patch.object(synth, "synthesize", side_effect=AssertionError("повторный синтез")):
+            cached = synth.load_or_synthesize("ball_lost", cache_dir=self.cache_dir)
+        self.assertEqual(cached.get_length(), sound.get_length())
+
+    def test_missing_effects_filled(self):
+        """Тест заполнения эффектов без WAV файлов."""
+        manager = SoundManager(async_load=False)
+        for key in synth.SYNTH_PRESETS:
+            self.assertIsNotNone(manager.sounds[key])
+
+
+class TestMusicPlayer(unittest.TestCase):
+    """Тесты для потоковой фоновой музыки."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        import pygame
+        import wave
+        self.music_dir = tempfile.mkdtemp()
+        with wave.open(os.path.join(self.music_dir, "level.wav"), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(22050)
+            f.writeframes(b"\x00\x00" * 2205)
+        self.player = MusicPlayer(music_dir=self.music_dir, fade_ms=0,
+                                  tracks={"menu": "menu.ogg", "level": "level.wav"})
+        if not pygame.mixer.get_init():
+            try:
+                pygame.mixer.init()
+            except pygame.error:
+                self.skipTest("Звуковое устройство недоступно")
+
+    def tearDown(self):
+        """Остановить музыку после теста."""
+        import pygame
+        if pygame.mixer.get_init():
+            pygame.mixer.music.stop()
+
+    def test_resolve_level_fallback(self):
+        """Тест общего трека для уровней без собственного."""
+        path = os.path.join(self.music_dir, "level.wav")
+        self.assertEqual(self.player.resolve("level_3"), path)
+        self.assertIsNone(self.player.resolve("menu"))  # Файла нет
+        self.assertIsNone(self.player.resolve(None))
+
+    def test_request_starts_track(self):
+        """Тест запуска трека и тишины для отсутствующего."""
+        self.player.request("menu")
+        self.assertIsNone(self.player.current_path)
+
+        self.player.request("level_1")
+        self.player.update()
+        self.assertEqual(self.player.current_path, self.player.resolve("level"))
+
+    def test_game_requests_music_by_state(self):
+        """Тест запросов музыки игрой при смене состояний."""
+        import pygame
+        audio = RecordingAudioBackend()
+        game = Game(headless=True, audio=audio)
+        game.apply_input([pygame.K_SPACE], 0)  # Меню -> игра
+
+        self.assertEqual([key for _, key in audio.music_requests], ["menu", "level_1"])
+        self.assertEqual(audio.events, [(0, "level_start")])
+
+
+class TestSoundVariants(unittest.TestCase):
+    """Тесты для банка стерео вариантов эффектов."""
+
+    def setUp(self):
+        """Подготовка к тестам."""
+        import pygame
+        if not pygame.mixer.get_init():
+            try:
+                pygame.mixer.init()
+            except pygame.error:
+                self.skipTest("Звуковое устройство недоступно")
+
+    def test_pan_index_bounds(self):
+        """Тест ступеней панорамы по позиции X."""
+        self.assertEqual(variants.pan_index(-10, 5, 800), 0)
+        self.assertEqual(variants.pan_index(400, 5, 800), 2)
+        self.assertEqual(variants.pan_index(800, 5, 800), 4)
+
+    def test_build_variants_pans_channels(self):
+        """Тест размеров банка и громкости каналов по краям."""
+        import pygame
+        import numpy as np
+        if pygame.mixer.get_init()[2] < 2:
+            self.skipTest("Микшер не стерео")
+
+        sound = synth.load_or_synthesize("ball_launch", cache_dir=tempfile.mkdtemp())
+        table = variants.build_variants(sound, pan_steps=3, pan_width=1.0, pitches=(0.5, 1.0))
+        self.assertEqual((len(table), len(table[0])), (3, 2))
+
+        left = pygame.sndarray.array(table[0][1]).astype(np.float64)
+        self.assertGreater(np.abs(left[:, 0]).sum(), 100 * np.abs(left[:, 1]).sum())
+        # Понижение тона в два раза удлиняет звук в два раза
+        self.assertAlmostEqual(table[1][0].get_length(), 2 * table[1][1].get_length(), places=2)
+
+    def test_manager_selects_variant_by_position(self):
+        """Тест выбора варианта по позиции и чередования высоты тона."""
+        manager = SoundManager(async_load=False)
+        if "brick_hit" not in manager.variants:
+            self.skipTest("Варианты звука недоступны")
+
+        table = manager.variants["brick_hit"]
+        first = manager._select_sound("brick_hit", 0)
+        second = manager._select_sound("brick_hit", 0)
+        self.assertIn(first, table[0])
+        self.assertIsNot(first, second)
+        self.assertIs(manager._select_sound("brick_hit", None), manager.sounds["brick_hit"])
+
+    def test_variants_published_with_pitch(self):
+        """Тест счётчиков высоты тона для банков, видимых во время загрузки."""
+        release = threading.Event()
+        reached = threading.Event()
+        reserve_channels = SoundManager._reserve_channels
+
+        def held_reserve(manager):
+            reached.set()
+            release.wait(5)
+            return reserve_channels(manager)
+
+        with patch.object(SoundManager, "_reserve_channels", held_reserve):
+            manager = SoundManager(async_load=True)
+            try:
+                self.assertTrue(reached.wait(5))
+                for sound_key in list(manager.variants):
+                    self.assertIn(sound_key, manager._next_pitch)
+                    self.assertIsNotNone(manager._select_sound(sound_key, 0))
+            finally:
+                release.set()
+                manager.wait_until_loaded(5)
+
+    def test_game_passes_hit_position(self):
+        """Тест передачи позиции удара в звуковой бэкенд."""
+        audio = RecordingAudioBackend()
+        game = Game(headless=True, audio=audio)
+        game.events.push(WALL_HIT, 12.0, 300.0)
+        game.update()
+        self.assertEqual(audio.events, [(0, "wall_hit")])
+        self.assertEqual(audio.positions, [12.0])
+
+
+class TestAudioBackends(unittest.TestCase):
+    """Тесты для звуковых бэкендов."""
+
+    def test_create_backend(self):
+        """Тест создания бэкенда по имени."""
+        self.assertIsInstance(create_audio_backend("null"), NullAudioBackend)
+        self.assertIsInstance(create_audio_backend("pygame"), SoundManager)
+        with self.assertRaises(ValueError):
+            create_audio_backend("alsa")
+
+    def test_headless_game_uses_null_backend(self):
+        """Тест отсутствия звука в игре без окна."""
+        game = Game(headless=True)
+        self.assertIsInstance(game.sound_manager, NullAudioBackend)
+
+    def test_recording_backend_logs_ticks(self):
+        """Тест записи звуковых событий игры по тикам."""
+        import pygame
+        audio = RecordingAudioBackend()
+        game = Game(headless=True, audio=audio)
+
+        game.apply_input([pygame.K_SPACE], 0)  # Меню -> игра
+        game.update()
+        audio.end_frame()
+        game.apply_input([pygame.K_SPACE], 0)  # Запуск шара
+        game.update()
+        audio.end_frame()
+
+        self.assertEqual(audio.events, [(0, "level_start"), (1, "ball_launch")])
+
+    def test_restart_keeps_backend(self):
+        """Тест сохранения бэкенда при перезапуске игры."""
+        audio = RecordingAudioBackend()
+        game = Game(headless=True, audio=audio)
+        game._restart()
+        self.assertIs(game.sound_manager, audio)
+
+    def test_incomplete_backend_rejected(self):
+        """Тест ошибки при создании бэкенда без _play_sound."""
+        from audio.backends import AudioBackend
+
+        class Silent(AudioBackend):
+            pass
+
+        with self.assertRaises(TypeError):
+            Silent()
+
+
+class TestEventQueue(unittest.TestCase):
+    """Тесты для очереди игровых событий."""
+
+    def test_push_and_clear(self):
+        """Тест добавления и очистки событий."""
+        queue = EventQueue(capacity=4)
+        brick = Brick(0, 0)
+        queue.push(BRICK_DESTROYED, 1.0, 2.0, brick)
+        self.assertEqual(len(queue), 1)
+        self.assertIs(queue.refs[0], brick)
+
+        queue.clear()
+        self.assertEqual(len(queue), 0)
+        self.assertIsNone(queue.refs[0])
+
+    def test_capacity_overflow(self):
+        """Тест переполнения очереди."""
+        queue = EventQueue(capacity=2)
+        for _ in range(5):
+            queue.push(WALL_HIT)
+        self.assertEqual(len(queue), 2)
+        self.assertEqual(queue.dropped, 3)
+
+    def test_ball_pushes_wall_hit(self):
+        """Тест события удара о стену вместо прямого вызова звука."""
+        queue = EventQueue()
+        ball = Ball(5, 300, events=queue)
+        ball.vx = -10
+        ball.update()
+        self.assertEqual(queue.kinds[:queue.count], [WALL_HIT])
+
+    def test_game_processes_brick_events(self):
+        """Тест пакетной обработки разрушения кирпичей."""
+        audio = RecordingAudioBackend()
+        game = Game(headless=True, audio=audio)
+        seen = []
+        game.add_event_consumer(lambda events: seen.append(events.count))
+
+        brick = game.level.bricks.bricks[0]
+        brick.destroy()
+        game.events.push(BRICK_DESTROYED, brick.x, brick.y, brick)
+        game.update()
+
+        self.assertEqual(game.level.score, 10)
+        self.assertEqual(audio.effects(), ["brick_hit"])
+        self.assertEqual(seen, [1])
+        self.assertEqual(len(game.events), 0)
+
+
 def run_tests():
     """Запустить все тесты."""
     unittest.main(argv=[''], exit=False, verbosity=2)